@@ -0,0 +1,203 @@
+#!/usr/bin/env python
+"""
+Microbenchmarks of the rankers on a grid of (decision makers, alternatives, criteria) sizes,
+and of the service re-ranking of a service type (`update_slr_profile_rankings_of_service_type`).
+Results are saved as JSON, and compared to a baseline results file as a percentage delta of the min times
+(the least noisy estimate of the time per call).
+
+    $ python -m slr_worker_ranking.benchmark --output baseline.json
+    $ python -m slr_worker_ranking.benchmark --output results.json --baseline baseline.json
+"""
+import argparse
+import datetime
+import itertools
+import json
+import platform
+import statistics
+import sys
+import timeit
+import zlib
+
+import numpy as np
+
+from slr_worker_ranking.mcdm.registry import get_ranker_class
+from slr_worker_ranking.workload import RATING_LINGUISTIC_TERMS, WEIGHT_LINGUISTIC_TERMS
+
+
+RANKER_TYPES = ('chen-ftopsis', 'alt-ftopsis', 'crisp-topsis')
+# (decision makers, alternatives, criteria)
+RANKER_GRID = list(itertools.product((1, 3), (10, 100, 500), (3, 8)))
+QUICK_RANKER_GRID = [(1, 10, 3), (3, 10, 3)]
+# (alternatives, SLR profiles)
+SERVICE_GRID = [(10, 10), (100, 10), (100, 100), (500, 100)]
+QUICK_SERVICE_GRID = [(10, 5)]
+
+
+def benchmark_rng(seed, name):
+    "each benchmark has its own random data, so it doesn't change when other benchmarks are filtered out"
+    return np.random.default_rng([seed, zlib.crc32(name.encode('utf-8'))])
+
+
+def is_selected(name, name_filter):
+    return not name_filter or name_filter in name
+
+
+def random_fuzzy_numbers(rng, linguistic_terms, shape):
+    terms = np.array(list(linguistic_terms.values()), dtype=float)
+    return terms[rng.integers(len(terms), size=shape)]
+
+
+def ranker_problem(rng, ranker_type, num_decision_makers, num_alternatives, num_criteria):
+    "decision matrices and criteria weights of each decision maker (crisp rankers use the middle of the fuzzy numbers)"
+    decision_matrices = random_fuzzy_numbers(rng, RATING_LINGUISTIC_TERMS, (num_decision_makers, num_alternatives, num_criteria))
+    criteria_weights = random_fuzzy_numbers(rng, WEIGHT_LINGUISTIC_TERMS, (num_decision_makers, num_criteria))
+    if ranker_type == 'crisp-topsis':
+        decision_matrices, criteria_weights = decision_matrices[..., 1], criteria_weights[..., 1]
+    return decision_matrices.tolist(), criteria_weights.tolist()
+
+
+def time_function(function, repeat=5, min_time=0.05):
+    "min and median seconds per call, over `repeat` runs of as many loops as needed to take at least `min_time`"
+    timer = timeit.Timer(function)
+    number, _ = timer.autorange()
+    number = max(1, int(number * min_time / 0.2))
+    times = [t / number for t in timer.repeat(repeat=repeat, number=number)]
+    return {'min': min(times), 'median': statistics.median(times), 'loops': number}
+
+
+def benchmark_rankers(grid, seed, repeat, name_filter=None):
+    results = {}
+    for ranker_type in RANKER_TYPES:
+        ranker_cls = get_ranker_class(ranker_type)
+        for num_decision_makers, num_alternatives, num_criteria in grid:
+            name = f'ranker.evaluate:{ranker_type}:dm={num_decision_makers},alt={num_alternatives},crit={num_criteria}'
+            # crisp TOPSIS has a single decision maker
+            if not is_selected(name, name_filter) or (ranker_type == 'crisp-topsis' and num_decision_makers > 1):
+                continue
+            rng = benchmark_rng(seed, name)
+            decision_matrices, criteria_weights = ranker_problem(rng, ranker_type, num_decision_makers, num_alternatives, num_criteria)
+            ranker = ranker_cls(criteria_benefit_indicator=[i % 2 == 0 for i in range(num_criteria)])
+
+            def evaluate():
+                ranker.reset()
+                for decision_matrix, weights in zip(decision_matrices, criteria_weights):
+                    ranker.add_decision_maker(decision_matrix=decision_matrix, criteria_weights=weights)
+                ranker.evaluate()
+
+            results[name] = time_function(evaluate, repeat=repeat)
+    return results
+
+
+def benchmark_service(grid, seed, repeat, name_filter=None):
+    "full re-ranking of a service type (as after a worker change), including the publishing of its profiles"
+    from slr_worker_ranking.replay import create_replay_service
+
+    results = {}
+    for ranker_type in RANKER_TYPES:
+        for num_alternatives, num_profiles in grid:
+            name = f'service.update_slr_profile_rankings_of_service_type:{ranker_type}:alt={num_alternatives},profiles={num_profiles}'
+            if not is_selected(name, name_filter):
+                continue
+            rng = benchmark_rng(seed, name)
+            service = create_replay_service(ranker_type=ranker_type)
+            num_criteria = len(service.ranker_criteria)
+            decision_matrix, _ = ranker_problem(rng, ranker_type, 1, num_alternatives, num_criteria)
+            service.alternatives_by_service_type['SomeService'] = {
+                f'worker-{i}': alternative for i, alternative in enumerate(decision_matrix[0])
+            }
+            service.slr_profiles_by_service['SomeService'] = {}
+            for i in range(num_profiles):
+                _, criteria_weights = ranker_problem(rng, ranker_type, 1, 1, num_criteria)
+                service.slr_profiles_by_service['SomeService'][f'profile-{i}'] = {
+                    'query_ids': [f'query-{i}'], 'criteria_weights': criteria_weights[0],
+                }
+            pub_streams = list(service.pub_event_stream_map.values())
+
+            def update_slr_profile_rankings():
+                service.invalidate_service_type_ranker('SomeService')
+                service.update_slr_profile_rankings_of_service_type('SomeService')
+                for pub_stream in pub_streams:
+                    pub_stream.mocked_values.clear()
+
+            results[name] = time_function(update_slr_profile_rankings, repeat=repeat)
+    return results
+
+
+def run_benchmarks(quick=False, repeat=5, seed=0, name_filter=None):
+    results = {}
+    results.update(benchmark_rankers(QUICK_RANKER_GRID if quick else RANKER_GRID, seed, repeat, name_filter))
+    results.update(benchmark_service(QUICK_SERVICE_GRID if quick else SERVICE_GRID, seed, repeat, name_filter))
+    return {
+        'meta': {
+            'date': datetime.datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'quick': quick,
+            'repeat': repeat,
+        },
+        'results': results,
+    }
+
+
+def compare_to_baseline(results, baseline, threshold=10.0):
+    """
+    Percentage delta of the min time of each benchmark in both results.
+    Returns the comparison rows, and the names of the benchmarks that are slower than the threshold.
+    """
+    comparison = []
+    regressions = []
+    for name, result in results['results'].items():
+        baseline_result = baseline['results'].get(name)
+        if baseline_result is None:
+            continue
+        delta = (result['min'] - baseline_result['min']) / baseline_result['min'] * 100
+        comparison.append((name, baseline_result['min'], result['min'], delta))
+        if delta > threshold:
+            regressions.append(name)
+    return comparison, regressions
+
+
+def format_results(results, comparison=None):
+    lines = []
+    if comparison is None:
+        for name, result in results['results'].items():
+            lines.append(f"{name}: {result['min'] * 1e3:.4f}ms (median {result['median'] * 1e3:.4f}ms)")
+    else:
+        for name, baseline_time, time, delta in comparison:
+            lines.append(f'{name}: {baseline_time * 1e3:.4f}ms -> {time * 1e3:.4f}ms ({delta:+.1f}%)')
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Runs the rankers and service microbenchmarks.')
+    parser.add_argument('--output', help='JSON file to save the results to (e.g. to be used as a baseline later)')
+    parser.add_argument('--baseline', help='JSON results file to compare the results with')
+    parser.add_argument('--threshold', type=float, default=10.0, help='slowdown percentage that is reported as a regression')
+    parser.add_argument('--filter', dest='name_filter', help='only keeps the benchmarks with this in their names')
+    parser.add_argument('--quick', action='store_true', help='only the smallest sizes, as a smoke test')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(quick=args.quick, repeat=args.repeat, seed=args.seed, name_filter=args.name_filter)
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            json.dump(results, output_file, indent=2)
+
+    if not args.baseline:
+        print(format_results(results))
+        return 0
+    with open(args.baseline) as baseline_file:
+        baseline = json.load(baseline_file)
+    comparison, regressions = compare_to_baseline(results, baseline, threshold=args.threshold)
+    print(format_results(results, comparison))
+    if regressions:
+        print(f'{len(regressions)} benchmarks are more than {args.threshold}% slower than the baseline:')
+        print('\n'.join(regressions))
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -25,13 +25,61 @@ def criteria_expand(val):
 
 RANKER_CRITERIA = config('RANKER_CRITERIA', cast=criteria_expand)
 
+# seconds without new changes in a service type before its SLR profiles are re-ranked and published (0 re-ranks immediately)
+RERANK_QUIET_PERIOD = config('RERANK_QUIET_PERIOD', cast=float, default=0)
+# max seconds a changed service type can wait for its re-ranking, even if it keeps changing
+RERANK_MAX_DELAY = config('RERANK_MAX_DELAY', cast=float, default=2)
+
+# publish only the new or changed SLR profiles of a service type, instead of all of them
+PUBLISH_DELTA_SLR_PROFILES = config('PUBLISH_DELTA_SLR_PROFILES', cast=bool, default=False)
+
+# skip publishing SLR profiles whose ranking didn't change since the last publish:
+# 'off', 'order' (same alternatives ranking order) or 'scores' (same order and scores within the epsilon)
+SLR_PROFILES_PUBLISH_SUPPRESSION = config('SLR_PROFILES_PUBLISH_SUPPRESSION', default='off')
+SLR_PROFILES_SCORE_EPSILON = config('SLR_PROFILES_SCORE_EPSILON', cast=float, default=1e-6)
+
+# criteria weights are rounded to this resolution before building the SLR profile id (0 to use the exact weights)
+SLR_PROFILE_WEIGHTS_RESOLUTION = config('SLR_PROFILE_WEIGHTS_RESOLUTION', cast=float, default=1e-6)
+
+# least recently used SLR profiles (in total) and workers (per service type) are evicted above these caps (0 for no cap)
+MAX_SLR_PROFILES = config('MAX_SLR_PROFILES', cast=int, default=0)
+MAX_ALTERNATIVES_PER_SERVICE_TYPE = config('MAX_ALTERNATIVES_PER_SERVICE_TYPE', cast=int, default=0)
+
+# local file where the service state is periodically saved and restored from on start (empty to disable)
+SNAPSHOT_PATH = config('SNAPSHOT_PATH', default='')
+SNAPSHOT_INTERVAL = config('SNAPSHOT_INTERVAL', cast=float, default=60)
+
+# latency histograms of each ranking stage, by ranker type and problem shape (logged with the service state)
+RANKER_STAGE_TIMERS = config('RANKER_STAGE_TIMERS', cast=bool, default=False)
+
+# port of the HTTP server with the Prometheus metrics (0 to disable the metrics)
+METRICS_PORT = config('METRICS_PORT', cast=int, default=0)
+
+# seconds between the logged summaries of the events processing latency percentiles (0 to disable)
+LATENCY_SUMMARY_INTERVAL = config('LATENCY_SUMMARY_INTERVAL', cast=float, default=60)
+
+# profiles (cProfile and tracemalloc) the first N processed events after the service starts (0 to only profile on request),
+# and writes the results to the profiling dir
+PROFILING_EVENTS = config('PROFILING_EVENTS', cast=int, default=0)
+PROFILING_DIR = config('PROFILING_DIR', default='profiles')
+
 
 LISTEN_EVENT_TYPE_WORKER_PROFILE_RATED = config('LISTEN_EVENT_TYPE_WORKER_PROFILE_RATED')
 LISTEN_EVENT_TYPE_QUERY_SERVICES_QOS_CRITERIA_RANKED = config('LISTEN_EVENT_TYPE_QUERY_SERVICES_QOS_CRITERIA_RANKED')
+LISTEN_EVENT_TYPE_WORKER_PROFILE_REMOVED = config('LISTEN_EVENT_TYPE_WORKER_PROFILE_REMOVED', default='WorkerProfileRemoved')
+LISTEN_EVENT_TYPE_SERVICE_SLR_PROFILES_SNAPSHOT_REQUESTED = config(
+    'LISTEN_EVENT_TYPE_SERVICE_SLR_PROFILES_SNAPSHOT_REQUESTED', default='ServiceSLRProfilesSnapshotRequested')
+LISTEN_EVENT_TYPE_QUERY_REMOVED = config('LISTEN_EVENT_TYPE_QUERY_REMOVED', default='QueryRemoved')
+LISTEN_EVENT_TYPE_SERVICE_PROFILING_REQUESTED = config(
+    'LISTEN_EVENT_TYPE_SERVICE_PROFILING_REQUESTED', default='ServiceProfilingRequested')
 
 SERVICE_CMD_KEY_LIST = [
     LISTEN_EVENT_TYPE_WORKER_PROFILE_RATED,
+    LISTEN_EVENT_TYPE_WORKER_PROFILE_REMOVED,
+    LISTEN_EVENT_TYPE_SERVICE_SLR_PROFILES_SNAPSHOT_REQUESTED,
     LISTEN_EVENT_TYPE_QUERY_SERVICES_QOS_CRITERIA_RANKED,
+    LISTEN_EVENT_TYPE_QUERY_REMOVED,
+    LISTEN_EVENT_TYPE_SERVICE_PROFILING_REQUESTED,
 ]
 
 PUB_EVENT_TYPE_SERVICE_SLR_PROFILES_RANKED = config('PUB_EVENT_TYPE_SERVICE_SLR_PROFILES_RANKED')
@@ -0,0 +1,76 @@
+import bisect
+import math
+
+
+# upper bounds (in seconds) of the latency histogram buckets, the last one catches everything above
+LATENCY_BUCKETS = (
+    0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005,
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, math.inf,
+)
+
+
+class LatencyHistogram(object):
+    """
+    Fixed buckets histogram of latencies (in seconds): observing is a bisect and a few additions,
+    and the percentiles are approximated by the upper bound of the bucket they fall in (capped by the max latency).
+    """
+    __slots__ = ('buckets', 'bucket_counts', 'count', 'sum', 'max')
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.reset()
+
+    def reset(self):
+        self.bucket_counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        self.bucket_counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, percentile):
+        if not self.count:
+            return 0.0
+        rank = percentile / 100 * self.count
+        cumulative_count = 0
+        for upper_bound, bucket_count in zip(self.buckets, self.bucket_counts):
+            cumulative_count += bucket_count
+            if cumulative_count >= rank:
+                return min(upper_bound, self.max)
+        return self.max
+
+    def summary(self, percentiles=(50, 95, 99)):
+        summary = {
+            'count': self.count,
+            'mean': self.sum / self.count if self.count else 0.0,
+            'max': self.max,
+        }
+        for percentile in percentiles:
+            summary[f'p{percentile}'] = self.percentile(percentile)
+        return summary
+
+
+class LatencyHistograms(object):
+    "latency histograms by key, created on the first observation of each key"
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.histograms = {}
+
+    def observe(self, key, seconds):
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = LatencyHistogram(self.buckets)
+        histogram.observe(seconds)
+
+    def summary(self, percentiles=(50, 95, 99)):
+        return {key: histogram.summary(percentiles) for key, histogram in self.histograms.items()}
+
+    def reset(self):
+        self.histograms = {}
@@ -1,14 +1,93 @@
+import time
+
+
+def shape_bucket(size):
+    "rounds a problem size up to a power of two, so that the histograms of similar sized problems are kept together"
+    return 1 << (size - 1).bit_length() if size > 0 else 0
+
+
 class BaseTOPSIS(object):
 
+    # `LatencyHistograms` where the duration of each ranking stage is observed (disabled when None)
+    stage_timers = None
 
     def __init__(self, criteria_benefit_indicator):
         self.criteria_benefit_indicator = criteria_benefit_indicator
 
+    def get_problem_shape(self):
+        """
+        Shape of the current problem, as a "dm=..,alt=..,crit=..,batch=.." string where the number of alternatives
+        and the criteria weights batch size are rounded up to a power of two (batch=0 when there is no batch).
+        """
+        raise NotImplementedError()
+
+    def _run_stage(self, stage, *args):
+        """
+        Calls the ranking stage method, and observes its duration in the `stage_timers` histograms
+        keyed by (ranker class, problem shape, stage name). When the timers are disabled this is only a call.
+        """
+        if self.stage_timers is None:
+            return stage(*args)
+        start = time.perf_counter()
+        result = stage(*args)
+        duration = time.perf_counter() - start
+        self.stage_timers.observe((type(self).__name__, self.get_problem_shape(), stage.__name__), duration)
+        return result
+
     def add_decision_maker(self, decision_matrix, criteria_weights):
         raise NotImplementedError()
 
     def evaluate(self, validate_first=True):
         raise NotImplementedError()
 
-    def get_alternatives_ranking_scores(self):
+    def reset(self):
+        """
+        Clears the current problem, so that the same ranker instance can be reused for a new one
+        (e.g., add_decision_maker and evaluate again), instead of creating a new ranker.
+        """
+        raise NotImplementedError()
+
+    def get_alternatives_ranking_scores(self, batch_indexes=None):
+        "`batch_indexes` selects the scores of only some of the criteria weights in the evaluated batch."
+        raise NotImplementedError()
+
+    def set_decision_matrix(self, decision_matrix):
+        """
+        Sets the decision matrix of a single decision maker, and runs only the steps that
+        do not depend on the criteria weights (e.g., normalisation).
+        """
+        raise NotImplementedError()
+
+    def evaluate_criteria_weights_batch(self, criteria_weights_batch):
+        """
+        Ranks the alternatives of the current decision matrix once for each of the N criteria weights in the batch.
+        Returns a list with the N ranking indexes, and `get_alternatives_ranking_scores` returns the N scores lists.
+        """
+        raise NotImplementedError()
+
+    def append_criteria_weights_batch(self, criteria_weights_batch):
+        """
+        Ranks only the new criteria weights and appends them to the end of the evaluated batch.
+        Returns the ranking indexes of the new criteria weights.
+        """
+        raise NotImplementedError()
+
+    def remove_criteria_weights(self, batch_index):
+        "Removes the criteria weights at `batch_index` from the evaluated batch, without re-evaluating the others."
+        raise NotImplementedError()
+
+    def add_alternative(self, alternative):
+        """
+        Adds a new alternative at the end of the decision matrix set by `set_decision_matrix`,
+        updating the ranking of the evaluated criteria weights batch (if any) incrementally.
+        Returns the ranking indexes of the whole batch, or None if no batch was evaluated yet.
+        """
+        raise NotImplementedError()
+
+    def replace_alternative(self, alt_index, alternative):
+        "Same as `add_alternative`, but replacing the alternative at `alt_index`."
+        raise NotImplementedError()
+
+    def remove_alternative(self, alt_index):
+        "Same as `add_alternative`, but removing the alternative at `alt_index`."
         raise NotImplementedError()
@@ -1,14 +1,155 @@
-import skcriteria as skc
-from skcriteria.preprocessing import invert_objectives, scalers
-from skcriteria.pipeline import mkpipe
-from skcriteria.madm.similarity import TOPSIS as SKC_TOPSIS
+import numpy as np
+
+from slr_worker_ranking.mcdm.base import BaseTOPSIS, shape_bucket
 
-from slr_worker_ranking.mcdm.base import BaseTOPSIS
 
 class CrispTOPSIS(BaseTOPSIS):
-    "interface class to scikit-criteria topsis"
+    """
+    Crisp TOPSIS with the same steps as the scikit-criteria pipeline
+    (NegateMinimize, VectorScaler on the matrix, SumScaler on the weights and TOPSIS),
+    but calculated directly on numpy arrays.
+    `SKCriteriaCrispTOPSIS` is the scikit-criteria implementation, kept as a reference for validation.
+    """
 
     def __init__(self, criteria_benefit_indicator):
+        self.criteria_benefit_indicator = criteria_benefit_indicator
+        self.criteria_benefit_mask = np.asarray(criteria_benefit_indicator, dtype=bool)
+        self.num_criteria = len(criteria_benefit_indicator)
+        self.reset()
+
+    def reset(self):
+        self.criteria_weights = None
+        self.decision_matrix = None
+        self.criteria_weights_batch = None
+        self.norm_decision_matrix = None
+        self.weighted_norm_decision_matrix = None
+        self.ideal_distances = None
+        self.anti_ideal_distances = None
+        self.closeness_coefficients = None
+        self.ranking_indexes = None
+
+    def get_problem_shape(self):
+        num_alternatives = len(self.decision_matrix) if self.decision_matrix is not None else 0
+        batch_size = len(self.criteria_weights_batch) if self.criteria_weights_batch is not None else 0
+        return f'dm=1,alt={shape_bucket(num_alternatives)},crit={self.num_criteria},batch={shape_bucket(batch_size)}'
+
+    def add_decision_maker(self, decision_matrix, criteria_weights):
+        "crisp TOPSIS has a single decision maker, so this replaces the current problem"
+        self.set_decision_matrix(decision_matrix)
+        self.criteria_weights = criteria_weights
+
+    def evaluate(self, validate_first=True):
+        self.ranking_indexes = self.evaluate_criteria_weights_batch([self.criteria_weights])[0]
+        self.criteria_weights_batch = None
+        self.closeness_coefficients = self.closeness_coefficients[0]
+        return self.ranking_indexes
+
+    def set_decision_matrix(self, decision_matrix):
+        """
+        Cost criteria are negated (so that all criteria are maximized),
+        and each criterion is divided by its vector norm over all alternatives.
+        """
+        decision_matrix = np.array(decision_matrix, dtype=float)
+        assert decision_matrix.ndim == 2 and decision_matrix.shape[1] == self.num_criteria, f"invalid decision matrix shape: {decision_matrix.shape}"
+        self.decision_matrix = decision_matrix
+        self.criteria_weights_batch = None
+        self._run_stage(self._normalized_decision_matrix)
+
+    def evaluate_criteria_weights_batch(self, criteria_weights_batch):
+        """
+        Sum scaled weights and euclidean distance to ideal and anti-ideal,
+        for all N criteria weights at once over a (N, alternatives, criteria) weighted matrix.
+        After the negation of the cost criteria all criteria are maximized.
+        """
+        criteria_weights_batch = np.asarray(criteria_weights_batch, dtype=float)
+        assert criteria_weights_batch.ndim == 2 and criteria_weights_batch.shape[1] == self.num_criteria, f"invalid criteria weights batch shape: {criteria_weights_batch.shape}"
+        self.criteria_weights_batch = criteria_weights_batch
+        self._run_stage(self._weighted_normalized_decision_matrix)
+        self._run_stage(self._distance_from_ideal_solutions)
+        self._run_stage(self._calculate_closeness_coefficients)
+        self._run_stage(self._rank_alternatives)
+        return self.ranking_indexes
+
+    def _normalized_decision_matrix(self):
+        norm_decision_matrix = np.where(self.criteria_benefit_mask, self.decision_matrix, -self.decision_matrix)
+        self.norm_decision_matrix = norm_decision_matrix / np.sqrt(np.square(norm_decision_matrix).sum(axis=0))
+
+    def _weighted_normalized_decision_matrix(self):
+        criteria_weights_batch = self.criteria_weights_batch / self.criteria_weights_batch.sum(axis=-1, keepdims=True)
+        self.weighted_norm_decision_matrix = self.norm_decision_matrix[np.newaxis] * criteria_weights_batch[:, np.newaxis, :]
+
+    def _distance_from_ideal_solutions(self):
+        weighted_matrix = self.weighted_norm_decision_matrix
+        ideal = weighted_matrix.max(axis=-2, keepdims=True)
+        anti_ideal = weighted_matrix.min(axis=-2, keepdims=True)
+        self.ideal_distances = np.sqrt(np.square(weighted_matrix - ideal).sum(axis=-1))
+        self.anti_ideal_distances = np.sqrt(np.square(weighted_matrix - anti_ideal).sum(axis=-1))
+
+    def _calculate_closeness_coefficients(self):
+        self.closeness_coefficients = self.anti_ideal_distances / (self.ideal_distances + self.anti_ideal_distances)
+
+    def _rank_alternatives(self):
+        self.ranking_indexes = np.argsort(-self.closeness_coefficients, axis=-1, kind='stable').tolist()
+
+    def append_criteria_weights_batch(self, criteria_weights_batch):
+        "ranks only the new criteria weights, and appends them to the current batch"
+        if self.criteria_weights_batch is None:
+            return self.evaluate_criteria_weights_batch(criteria_weights_batch)
+
+        previous_criteria_weights_batch = self.criteria_weights_batch
+        previous_closeness_coefficients = self.closeness_coefficients
+        previous_ranking_indexes = self.ranking_indexes
+        ranking_indexes = self.evaluate_criteria_weights_batch(criteria_weights_batch)
+        self.criteria_weights_batch = np.concatenate([previous_criteria_weights_batch, self.criteria_weights_batch])
+        self.closeness_coefficients = np.concatenate([previous_closeness_coefficients, self.closeness_coefficients])
+        self.ranking_indexes = previous_ranking_indexes + ranking_indexes
+        return ranking_indexes
+
+    def remove_criteria_weights(self, batch_index):
+        assert self.criteria_weights_batch is not None and len(self.criteria_weights_batch) > 1, "Can't remove the only criteria weights of the batch."
+        self.criteria_weights_batch = np.delete(self.criteria_weights_batch, batch_index, axis=0)
+        self.closeness_coefficients = np.delete(self.closeness_coefficients, batch_index, axis=0)
+        self.ranking_indexes = self.ranking_indexes[:batch_index] + self.ranking_indexes[batch_index + 1:]
+
+    def add_alternative(self, alternative):
+        return self._update_decision_matrix(np.concatenate([self.decision_matrix, [alternative]]))
+
+    def replace_alternative(self, alt_index, alternative):
+        decision_matrix = self.decision_matrix.copy()
+        decision_matrix[alt_index] = alternative
+        return self._update_decision_matrix(decision_matrix)
+
+    def remove_alternative(self, alt_index):
+        return self._update_decision_matrix(np.delete(self.decision_matrix, alt_index, axis=0))
+
+    def _update_decision_matrix(self, decision_matrix):
+        """
+        The vector scaler normalises each criterion by the norm over all alternatives,
+        so any change in the alternatives changes every column: the (cheap) crisp matrix is normalized again
+        and the current criteria weights batch is evaluated again.
+        """
+        criteria_weights_batch = self.criteria_weights_batch
+        self.set_decision_matrix(decision_matrix)
+        if criteria_weights_batch is None:
+            return None
+        return self.evaluate_criteria_weights_batch(criteria_weights_batch)
+
+    def get_alternatives_ranking_scores(self, batch_indexes=None):
+        if self.closeness_coefficients is None:
+            return None
+        if batch_indexes is not None:
+            return self.closeness_coefficients[batch_indexes].tolist()
+        return self.closeness_coefficients.tolist()
+
+
+class SKCriteriaCrispTOPSIS(BaseTOPSIS):
+    "interface class to scikit-criteria topsis, only used as a reference implementation (scikit-criteria is an optional dependency)"
+
+    def __init__(self, criteria_benefit_indicator):
+        from skcriteria.preprocessing import invert_objectives, scalers
+        from skcriteria.pipeline import mkpipe
+        from skcriteria.madm.similarity import TOPSIS as SKC_TOPSIS
+
         self.setup_skc_objectives(criteria_benefit_indicator)
         self.skc_dm = None
         ranker_pipe = mkpipe(
@@ -19,12 +160,18 @@ class CrispTOPSIS(BaseTOPSIS):
         )
         self.skc_ranker = ranker_pipe
         self.skc_result = None
+        self.ranking_indexes = None
 
+    def reset(self):
+        self.skc_dm = None
+        self.skc_result = None
+        self.ranking_indexes = None
 
     def setup_skc_objectives(self, criteria_benefit_indicator):
         self.skc_objectives = [max if c else min for c in criteria_benefit_indicator]
 
     def add_decision_maker(self, decision_matrix, criteria_weights):
+        import skcriteria as skc
         self.skc_dm = skc.mkdm(
             matrix=decision_matrix,
             objectives=self.skc_objectives,
@@ -40,8 +187,8 @@ class CrispTOPSIS(BaseTOPSIS):
         )
         return self.ranking_indexes
 
-    def get_alternatives_ranking_scores(self):
+    def get_alternatives_ranking_scores(self, batch_indexes=None):
         if self.skc_result is None:
             return None
 
-        return self.skc_result.e_['similarity'].tolist()
\ No newline at end of file
+        return self.skc_result.e_['similarity'].tolist()
@@ -1,13 +1,18 @@
-from os import closerange
 import numpy as np
 
-from slr_worker_ranking.mcdm.base import BaseTOPSIS
+from slr_worker_ranking.mcdm.base import BaseTOPSIS, shape_bucket
+from slr_worker_ranking.mcdm.tfn import TFN, tfn_array
 
 
 class FuzzyTOPSIS(BaseTOPSIS):
     """
     Class for running the Fuzzy TOPSIS ranking. Using [1] for the default aggregation methods of alternatives, criteria and normalisation.
 
+    The problem is stored as a (decision_makers, alternatives, criteria, 3) float tensor, and every step
+    runs as a whole-array operation over it. The intermediate matrices (`agg_decision_matrix`, `norm_decision_matrix`,
+    `weighted_norm_decision_matrix`, `FPIS_value`, etc) are `tfn_array`s, where the last axis holds the
+    (left, middle, right) values of each triangular fuzzy number. Single fuzzy numbers are returned as `TFN`.
+
 
     Parameters
     ----------
@@ -29,6 +34,10 @@ class FuzzyTOPSIS(BaseTOPSIS):
     weights_list = [decision_maker_1_weights, decision_maker_2_weights]
     criteria_benefit_indicator = [True, False, True] # indicates that crit1 and 3 are benefit, and crit 2 is cost.
 
+    agg_alt_fuzzy_method, agg_crit_fuzzy_method and norm_alt_fuzzy_method are optional per-cell methods
+    (same signatures as `_defaut_alt_agg_fuzzy_rating_method`, `_defaut_crit_agg_fuzzy_weight_method`
+    and `_default_normalize_alternative_method`). When not given, the vectorized defaults are used.
+
     Notes
     -----
     Algorithm implemented from  [1]_.
@@ -40,6 +49,14 @@ class FuzzyTOPSIS(BaseTOPSIS):
 
     """
 
+    # attributes with a leading criteria weights batch axis, after `evaluate_criteria_weights_batch`
+    CRITERIA_WEIGHTS_BATCH_ATTRIBUTES = (
+        'criteria_weights_batch', 'weighted_norm_decision_matrix',
+        'fpis_distances_per_criterion', 'fpis_distances', 'fnis_distances_per_criterion', 'fnis_distances',
+        'closeness_coefficients',
+    )
+    # intermediate matrices that are overwritten in place by the next evaluation with the same shape
+    BUFFER_ATTRIBUTES = ('weighted_norm_decision_matrix', 'fpis_distances_per_criterion', 'fnis_distances_per_criterion')
 
     def __init__(self, criteria_benefit_indicator,
                  decision_matrix_list=None, criteria_weights_list=None,
@@ -54,47 +71,79 @@ class FuzzyTOPSIS(BaseTOPSIS):
             num_decision_makers = len(decision_matrix_list)
 
         self.criteria_benefit_indicator = criteria_benefit_indicator
+        self.criteria_benefit_mask = np.asarray(criteria_benefit_indicator, dtype=bool)
         self.num_alternatives = num_alternatives
-        self.num_decision_makers = num_alternatives
+        self.num_decision_makers = num_decision_makers
         self.num_criteria = len(self.criteria_benefit_indicator)
 
 
         self.decision_matrix_list = decision_matrix_list
         self.criteria_weights_list = criteria_weights_list
+        self.decision_matrix_tensor = None
+        self.criteria_weights_tensor = None
 
         self.validate_inputs(criteria_benefit_indicator,decision_matrix_list, criteria_weights_list)
 
-        if agg_alt_fuzzy_method is None:
-            agg_alt_fuzzy_method = self._defaut_alt_agg_fuzzy_rating_method
         self.agg_alt_fuzzy_method = agg_alt_fuzzy_method
-
-        if agg_crit_fuzzy_method is None:
-            agg_crit_fuzzy_method = self._defaut_crit_agg_fuzzy_weight_method
         self.agg_crit_fuzzy_method = agg_crit_fuzzy_method
-
-        if norm_alt_fuzzy_method is None:
-            norm_alt_fuzzy_method = self._default_normalize_alternative_method
         self.norm_alt_fuzzy_method = norm_alt_fuzzy_method
 
+        self.buffers = {}
+        # name -> array with spare alternatives, of which the current matrix is a view (see `_append_alternatives`)
+        self.alternatives_capacity = {}
+        self._reset_intermediate_results()
+
+    def _reset_intermediate_results(self):
         self.agg_decision_matrix = None
         self.agg_criteria_weights = None
+        self.criteria_weights_batch = None
+        self.minl_or_maxr_criteria = None
         self.norm_decision_matrix = None
         self.weighted_norm_decision_matrix = None
 
         self.FPIS_value = None
-        # self.FPIS_indexes = None
         self.fpis_distances = None
         self.fpis_distances_per_criterion = None
 
         self.FNIS_value = None
-        # self.FNIS_indexes = None
         self.fnis_distances = None
         self.fnis_distances_per_criterion = None
 
         self.closeness_coefficients = None
         self.ranking_indexes = None
 
-
+    def reset(self):
+        """
+        Clears the current problem, so that the same instance can be used for a new one.
+        The intermediate matrices are kept as buffers, and are overwritten by the next evaluation with the same shape.
+        """
+        self.buffers = {
+            name: getattr(self, name) for name in self.BUFFER_ATTRIBUTES if isinstance(getattr(self, name), np.ndarray)
+        }
+        self.decision_matrix_list = []
+        self.criteria_weights_list = []
+        self.num_alternatives = None
+        self.num_decision_makers = None
+        self.decision_matrix_tensor = None
+        self.criteria_weights_tensor = None
+        self._reset_intermediate_results()
+
+    def get_problem_shape(self):
+        batch_size = len(self.criteria_weights_batch) if self.criteria_weights_batch is not None else 0
+        return (
+            f'dm={self.num_decision_makers or 0},alt={shape_bucket(self.num_alternatives or 0)},'
+            f'crit={self.num_criteria},batch={shape_bucket(batch_size)}'
+        )
+
+    def _get_buffer(self, name, shape):
+        """
+        Returns the current `name` matrix (or the one kept by `reset`) if it has the given shape, to be overwritten in place.
+        Otherwise, a new matrix is allocated.
+        """
+        for buffer in (getattr(self, name), self.buffers.pop(name, None)):
+            if isinstance(buffer, np.ndarray) and buffer.shape == shape:
+                return buffer
+        return np.empty(shape)
 
     def validate_inputs(self, criteria_benefit_indicator, decision_matrix_list, criteria_weights_list):
         assert self.num_criteria > 0, "Number of criteria should be more than zero."
@@ -111,13 +160,16 @@ class FuzzyTOPSIS(BaseTOPSIS):
                 self._validate_decision_maker(dm, cw)
 
 
-    def _validate_decision_maker(self, decision_matrix, criteria_weights):
+    def _validate_decision_matrix(self, decision_matrix):
         num_alternatives = len(decision_matrix)
         num_criteria = len(decision_matrix[0])
         if self.num_alternatives is not None:
             assert num_alternatives == self.num_alternatives, f"invalid number of alternatives in decision matrix: {num_alternatives} != {self.num_alternatives}"
 
         assert num_criteria == self.num_criteria, f"invalid number of criteria in decision matrix: {num_criteria} != {self.num_criteria}"
+
+    def _validate_decision_maker(self, decision_matrix, criteria_weights):
+        self._validate_decision_matrix(decision_matrix)
         num_criteria_w = len(criteria_weights)
         assert num_criteria_w == self.num_criteria,  f"invalid number of criteria in criteria weights: {num_criteria_w} != {self.num_criteria}"
 
@@ -131,90 +183,328 @@ class FuzzyTOPSIS(BaseTOPSIS):
         self.decision_matrix_list.append(decision_matrix)
         self.criteria_weights_list.append(criteria_weights)
         self.num_decision_makers = len(self.decision_matrix_list)
+        self.decision_matrix_tensor = None
+        self.criteria_weights_tensor = None
 
     def evaluate(self, validate_first=True):
         if validate_first:
-            self.validate_inputs(self.criteria_benefit_indicator, self.decision_matrix_list, self.criteria_weights_list)
+            self._run_stage(self.validate_inputs, self.criteria_benefit_indicator, self.decision_matrix_list, self.criteria_weights_list)
+
+        self._run_stage(self._aggregated_ratings_and_weights)
+        self._run_stage(self._normalized_decision_matrix)
+        self._run_stage(self._weighted_normalized_decision_matrix)
+        self._run_stage(self._calculate_FPIS_FNIS)
+        self._run_stage(self._distance_from_FPIS_FNIS)
+        self._run_stage(self._calculate_closeness_coefficients)
+        self._run_stage(self._rank_alternatives)
+        return self.ranking_indexes
 
-        self._aggregated_ratings_and_weights()
-        self._normalized_decision_matrix()
-        self._weighted_normalized_decision_matrix()
-        self._calculate_FPIS_FNIS()
-        self._distance_from_FPIS_FNIS()
-        self._calculate_closeness_coefficients()
-        self._rank_alternatives()
+    def set_decision_matrix(self, decision_matrix):
+        """
+        Replaces the problem with the decision matrix of a single decision maker,
+        and calculates its aggregated and normalized decision matrix (steps that don't depend on the criteria weights).
+        """
+        self.num_alternatives = len(decision_matrix)
+        self._validate_decision_matrix(decision_matrix)
+        decision_matrix = tfn_array(decision_matrix, shape=(self.num_alternatives, self.num_criteria))
+        self.decision_matrix_list = [decision_matrix]
+        self.criteria_weights_list = []
+        self.num_decision_makers = 1
+        self.decision_matrix_tensor = decision_matrix[np.newaxis]
+        self.criteria_weights_tensor = None
+        self.criteria_weights_batch = None
+
+        self._run_stage(self._aggregated_ratings)
+        self._run_stage(self._normalized_decision_matrix)
+
+    def evaluate_criteria_weights_batch(self, criteria_weights_batch):
+        """
+        Ranks the current normalized decision matrix for each of the N criteria weights in the batch,
+        in a single pass over a (N, alternatives, criteria, 3) weighted normalized decision matrix.
+        Each criteria weights in the batch is considered to be from a single decision maker, so there is nothing to aggregate.
+        """
+        criteria_weights_batch = tfn_array(criteria_weights_batch)
+        assert criteria_weights_batch.ndim == 3 and criteria_weights_batch.shape[1:] == (self.num_criteria, 3), f"invalid criteria weights batch shape: {criteria_weights_batch.shape}"
+
+        self.criteria_weights_batch = criteria_weights_batch
+        self.agg_criteria_weights = criteria_weights_batch
+        self._run_stage(self._weighted_normalized_decision_matrix)
+        self._run_stage(self._calculate_FPIS_FNIS)
+        self._run_stage(self._distance_from_FPIS_FNIS)
+        self._run_stage(self._calculate_closeness_coefficients)
+        self._run_stage(self._rank_alternatives)
+        return self.ranking_indexes
+
+    def append_criteria_weights_batch(self, criteria_weights_batch):
+        """
+        Ranks the new criteria weights and appends them to the end of the current criteria weights batch,
+        without re-evaluating the criteria weights already in it.
+        Returns only the ranking indexes of the new criteria weights.
+        """
+        if self.criteria_weights_batch is None:
+            return self.evaluate_criteria_weights_batch(criteria_weights_batch)
+
+        previous_batch = {attr: getattr(self, attr) for attr in self.CRITERIA_WEIGHTS_BATCH_ATTRIBUTES}
+        previous_ranking_indexes = self.ranking_indexes
+        for attr in self.BUFFER_ATTRIBUTES:
+            setattr(self, attr, None)
+        ranking_indexes = self.evaluate_criteria_weights_batch(criteria_weights_batch)
+        for attr, previous_value in previous_batch.items():
+            setattr(self, attr, np.concatenate([previous_value, getattr(self, attr)]))
+        self.agg_criteria_weights = self.criteria_weights_batch
+        self.ranking_indexes = previous_ranking_indexes + ranking_indexes
+        return ranking_indexes
+
+    def remove_criteria_weights(self, batch_index):
+        "the rankings of each criteria weights are independent, so the other ones in the batch are kept as they are"
+        assert self.criteria_weights_batch is not None and len(self.criteria_weights_batch) > 1, "Can't remove the only criteria weights of the batch."
+        for attr in self.CRITERIA_WEIGHTS_BATCH_ATTRIBUTES:
+            setattr(self, attr, np.delete(getattr(self, attr), batch_index, axis=0))
+        self.agg_criteria_weights = self.criteria_weights_batch
+        self.ranking_indexes = self.ranking_indexes[:batch_index] + self.ranking_indexes[batch_index + 1:]
+
+    def add_alternative(self, alternative):
+        """
+        Incremental ranking mode, for adding a new alternative (ratings of the single decision maker from `set_decision_matrix`)
+        at the end of the current decision matrix.
+        The normalisation bounds are updated with the new alternative, and only the criteria whose bound changed are normalized again.
+        If a criteria weights batch was already evaluated, the distances of the other alternatives are reused for every criterion
+        where neither the normalisation nor the ideal solutions changed.
+        The matrices grow along the alternatives axis into spare capacity (see `_append_alternatives`), so they are only
+        copied when the capacity doubles instead of on every added alternative. The distances sums, closeness coefficients
+        and ranking of the batch are still calculated again, in O(batch x alternatives).
+        Returns the new ranking indexes of the criteria weights batch, or None if no batch was evaluated yet.
+        """
+        self._validate_incremental_ranking(alternative)
+        alternative = tfn_array(alternative, shape=(1, self.num_criteria))
+        decision_matrix = self._append_alternatives('decision_matrix', tfn_array(self.decision_matrix_list[0]), alternative)
+        self.decision_matrix_list = [decision_matrix]
+        self.decision_matrix_tensor = decision_matrix[np.newaxis]
+        self.num_alternatives += 1
+        alt_i = self.num_alternatives - 1
+
+        new_agg_alternative = self._aggregate_fuzzy_numbers(alternative[np.newaxis])
+        self.agg_decision_matrix = self._append_alternatives('agg_decision_matrix', self.agg_decision_matrix, new_agg_alternative)
+        self.norm_decision_matrix = self._append_alternatives(
+            'norm_decision_matrix', self.norm_decision_matrix, np.empty_like(new_agg_alternative))
+        minl_or_maxr_criteria = np.where(
+            self.criteria_benefit_mask,
+            np.maximum(self.minl_or_maxr_criteria, new_agg_alternative[0, :, 2]),
+            np.minimum(self.minl_or_maxr_criteria, new_agg_alternative[0, :, 0])
+        )
+        changed_criteria = self._run_stage(self._update_normalized_decision_matrix, minl_or_maxr_criteria, [alt_i])
+
+        if self.criteria_weights_batch is None:
+            return None
+        batch_size = len(self.criteria_weights_batch)
+        self.weighted_norm_decision_matrix = self._append_alternatives(
+            'weighted_norm_decision_matrix', self.weighted_norm_decision_matrix,
+            np.empty((batch_size, 1, self.num_criteria, 3)), axis=1)
+        self.fpis_distances_per_criterion = self._append_alternatives(
+            'fpis_distances_per_criterion', self.fpis_distances_per_criterion, np.empty((batch_size, 1, self.num_criteria)), axis=1)
+        self.fnis_distances_per_criterion = self._append_alternatives(
+            'fnis_distances_per_criterion', self.fnis_distances_per_criterion, np.empty((batch_size, 1, self.num_criteria)), axis=1)
+        self._run_stage(self._update_criteria_weights_batch, changed_criteria, [alt_i], None, True)
         return self.ranking_indexes
 
+    def _append_alternatives(self, name, matrix, new_alternatives, axis=0):
+        """
+        Returns the `matrix` with the `new_alternatives` appended along its alternatives `axis`, as a view of a larger array
+        with spare alternatives. When the matrix is not a view of the `name` array (e.g., it was evaluated again) or it is full,
+        the array is allocated again with twice the alternatives, so the matrix is only copied once in a while.
+        """
+        num_alternatives = matrix.shape[axis]
+        new_num_alternatives = num_alternatives + new_alternatives.shape[axis]
+        alternatives_slice = (slice(None),) * axis
+        capacity = self.alternatives_capacity.get(name)
+        if capacity is None or matrix.base is not capacity or capacity.shape[axis] < new_num_alternatives:
+            capacity_shape = list(matrix.shape)
+            capacity_shape[axis] = 2 * new_num_alternatives
+            capacity = np.empty(capacity_shape)
+            capacity[alternatives_slice + (slice(0, num_alternatives),)] = matrix
+            self.alternatives_capacity[name] = capacity
+        capacity[alternatives_slice + (slice(num_alternatives, new_num_alternatives),)] = new_alternatives
+        return capacity[alternatives_slice + (slice(0, new_num_alternatives),)]
+
+    def replace_alternative(self, alt_index, alternative):
+        """
+        Incremental ranking mode, for replacing the ratings of an alternative of the current decision matrix (e.g., a re-rated worker).
+        Only that alternative and the criteria whose normalisation bound changed are normalized and weighted again.
+        Returns the new ranking indexes of the criteria weights batch, or None if no batch was evaluated yet.
+        """
+        self._validate_incremental_ranking(alternative)
+        alternative = tfn_array(alternative, shape=(self.num_criteria,))
+        decision_matrix = tfn_array(self.decision_matrix_list[0])
+        decision_matrix[alt_index] = alternative
+        self.decision_matrix_list = [decision_matrix]
+        self.decision_matrix_tensor = decision_matrix[np.newaxis]
+
+        self.agg_decision_matrix[alt_index] = self._aggregate_fuzzy_numbers(alternative[np.newaxis])
+        changed_criteria = self._run_stage(
+            self._update_normalized_decision_matrix, self._get_min_left_or_max_right_for_all_criteria(), [alt_index])
+
+        if self.criteria_weights_batch is None:
+            return None
+        self._run_stage(self._update_criteria_weights_batch, changed_criteria, [alt_index])
+        return self.ranking_indexes
 
-    def _defaut_alt_agg_fuzzy_rating_method(self, alt_i, crit_j):
+    def remove_alternative(self, alt_index):
         """
-            Same method for aggregating fuzzy ratings used in Chen [1].
-            Returns the avg of each individual value in the triangular fuzzy number
+        Incremental ranking mode, for removing an alternative of the current decision matrix.
+        Only the criteria whose normalisation bound changed are normalized and weighted again.
+        Returns the new ranking indexes of the criteria weights batch, or None if no batch was evaluated yet.
         """
-        avg_left = 0
-        avg_middle = 0
-        avg_right = 0
-        for dm in self.decision_matrix_list:
-            alternative = dm[alt_i]
-            criterion = alternative[crit_j]
-            c_left, c_middle, c_right = criterion
+        self._validate_incremental_ranking()
+        assert self.num_alternatives > 1, "Can't remove the only alternative of the decision matrix."
+        decision_matrix = np.delete(tfn_array(self.decision_matrix_list[0]), alt_index, axis=0)
+        self.decision_matrix_list = [decision_matrix]
+        self.decision_matrix_tensor = decision_matrix[np.newaxis]
+        self.num_alternatives -= 1
+
+        self.agg_decision_matrix = np.delete(self.agg_decision_matrix, alt_index, axis=0)
+        self.norm_decision_matrix = np.delete(self.norm_decision_matrix, alt_index, axis=0)
+        changed_criteria = self._run_stage(
+            self._update_normalized_decision_matrix, self._get_min_left_or_max_right_for_all_criteria(), [])
+
+        if self.criteria_weights_batch is None:
+            return None
+        self.weighted_norm_decision_matrix = np.delete(self.weighted_norm_decision_matrix, alt_index, axis=-3)
+        self.fpis_distances_per_criterion = np.delete(self.fpis_distances_per_criterion, alt_index, axis=-2)
+        self.fnis_distances_per_criterion = np.delete(self.fnis_distances_per_criterion, alt_index, axis=-2)
+        self._run_stage(self._update_criteria_weights_batch, changed_criteria, [], alt_index)
+        return self.ranking_indexes
+
+    def _validate_incremental_ranking(self, alternative=None):
+        assert self.num_decision_makers == 1, "Incremental ranking is only available for a single decision maker (see set_decision_matrix)."
+        assert self.agg_alt_fuzzy_method is None and self.norm_alt_fuzzy_method is None, "Incremental ranking is only available with the default methods."
+        if alternative is not None:
+            assert len(alternative) == self.num_criteria, f"invalid number of criteria in alternative: {len(alternative)} != {self.num_criteria}"
 
-            avg_left += c_left
-            avg_middle += c_middle
-            avg_right += c_right
-        avg_left = avg_left / self.num_decision_makers
-        avg_middle = avg_middle / self.num_decision_makers
-        avg_right = avg_right / self.num_decision_makers
+    def _update_normalized_decision_matrix(self, minl_or_maxr_criteria, updated_alternatives):
+        """
+        Sets the new normalisation bounds, and normalizes again only the updated alternatives and the criteria whose bound changed.
+        Returns the mask of the changed criteria.
+        """
+        changed_criteria = minl_or_maxr_criteria != self.minl_or_maxr_criteria
+        self.minl_or_maxr_criteria = minl_or_maxr_criteria
+        if len(updated_alternatives) > 0:
+            self.norm_decision_matrix[updated_alternatives] = self._normalize_all_alternatives(
+                self.agg_decision_matrix[updated_alternatives], minl_or_maxr_criteria)
+        if changed_criteria.any():
+            self.norm_decision_matrix[:, changed_criteria] = self._normalize_all_alternatives(
+                self.agg_decision_matrix[:, changed_criteria],
+                minl_or_maxr_criteria[changed_criteria],
+                self.criteria_benefit_mask[changed_criteria]
+            )
+        return changed_criteria
+
+    def _update_criteria_weights_batch(self, changed_criteria, updated_alternatives, removed_alternative=None, appended_alternative=False):
+        """
+        Updates the evaluated criteria weights batch after the normalized decision matrix changed
+        in the updated alternatives and in the changed criteria. Everything else is reused.
+        """
+        agg_criteria_weights = self.agg_criteria_weights
+        weighted_norm_decision_matrix = self.weighted_norm_decision_matrix
+        if len(updated_alternatives) > 0:
+            weighted_norm_decision_matrix[:, updated_alternatives] = (
+                self.norm_decision_matrix[updated_alternatives] * agg_criteria_weights[:, np.newaxis]
+            )
+        if changed_criteria.any():
+            weighted_norm_decision_matrix[..., changed_criteria, :] = (
+                self.norm_decision_matrix[:, changed_criteria] * agg_criteria_weights[:, np.newaxis, changed_criteria]
+            )
+
+        recompute_fpis, recompute_fnis = self._update_ideal_solutions(
+            changed_criteria, updated_alternatives, removed_alternative, appended_alternative)
+        fpis, fnis = self._get_ideal_solutions(weighted_norm_decision_matrix)
+        self._update_distances_per_criterion(self.fpis_distances_per_criterion, fpis, updated_alternatives, recompute_fpis)
+        self._update_distances_per_criterion(self.fnis_distances_per_criterion, fnis, updated_alternatives, recompute_fnis)
+        self.fpis_distances = self.fpis_distances_per_criterion.sum(axis=-1)
+        self.fnis_distances = self.fnis_distances_per_criterion.sum(axis=-1)
+
+        self._calculate_closeness_coefficients()
+        self._rank_alternatives()
+
+    def _update_ideal_solutions(self, changed_criteria, updated_alternatives, removed_alternative=None, appended_alternative=False):
+        """
+        Chen's FPIS and FNIS don't depend on the alternatives, so only the criteria with a new normalisation
+        need their distances calculated again (returned as a (batch, criteria) mask for FPIS and FNIS respectively).
+        """
+        recompute = np.broadcast_to(changed_criteria, (len(self.criteria_weights_batch), self.num_criteria))
+        return recompute, recompute
+
+    def _update_distances_per_criterion(self, distances_per_criterion, ideal_solution, updated_alternatives, recompute):
+        "calculates again (in place) the distances of the updated alternatives, and of all alternatives for the (batch, criteria) to recompute"
+        weighted_norm_decision_matrix = self.weighted_norm_decision_matrix
+        ideal_solution = np.broadcast_to(
+            ideal_solution, weighted_norm_decision_matrix.shape[:-3] + (1,) + weighted_norm_decision_matrix.shape[-2:])
+        if len(updated_alternatives) > 0:
+            distances_per_criterion[:, updated_alternatives] = self._fuzzy_number_distance_calculation(
+                weighted_norm_decision_matrix[:, updated_alternatives], ideal_solution)
+
+        batch_i, crit_j = np.nonzero(recompute)
+        if batch_i.size > 0:
+            distances_per_criterion[batch_i, :, crit_j] = self._fuzzy_number_distance_calculation(
+                weighted_norm_decision_matrix[batch_i, :, crit_j], ideal_solution[batch_i, :, crit_j]
+            )
+
+    def _get_decision_matrix_tensor(self):
+        "(decision_makers, alternatives, criteria, 3) tensor of all decision makers ratings."
+        if self.decision_matrix_tensor is None:
+            self.decision_matrix_tensor = tfn_array(
+                self.decision_matrix_list, shape=(len(self.decision_matrix_list), self.num_alternatives, self.num_criteria)
+            )
+        return self.decision_matrix_tensor
+
+    def _get_criteria_weights_tensor(self):
+        "(decision_makers, criteria, 3) tensor of all decision makers criteria weights."
+        if self.criteria_weights_tensor is None:
+            self.criteria_weights_tensor = tfn_array(
+                self.criteria_weights_list, shape=(len(self.criteria_weights_list), self.num_criteria)
+            )
+        return self.criteria_weights_tensor
+
+    def _aggregate_fuzzy_numbers(self, fuzzy_numbers):
+        """
+            Same method for aggregating fuzzy ratings and weights used in Chen [1].
+            Returns the avg of each individual value in the triangular fuzzy numbers, reducing the first (decision makers) axis.
+        """
+        return fuzzy_numbers.mean(axis=0)
 
-        agg_alt_i_crit_j = [avg_left, avg_middle, avg_right]
-        return agg_alt_i_crit_j
+    def _defaut_alt_agg_fuzzy_rating_method(self, alt_i, crit_j):
+        "Aggregated fuzzy rating of a single alternative and criterion."
+        return TFN.from_array(self._aggregate_fuzzy_numbers(self._get_decision_matrix_tensor()[:, alt_i, crit_j]))
 
 
     def _all_agg_ratings(self):
         """
             Function used to aggregate the fuzzy ratings for the alternatives for each decision maker
         """
-        agg_decision_matrix = []
+        if self.agg_alt_fuzzy_method is None:
+            return self._aggregate_fuzzy_numbers(self._get_decision_matrix_tensor())
+
+        agg_decision_matrix = np.empty((self.num_alternatives, self.num_criteria, 3))
         for alt_i in range(self.num_alternatives):
-            agg_alt_i_criteria = []
             for crit_j in range(self.num_criteria):
-                agg_alt_i_crit_j = self.agg_alt_fuzzy_method(alt_i, crit_j)
-                agg_alt_i_criteria.append(agg_alt_i_crit_j)
-
-            agg_decision_matrix.append(agg_alt_i_criteria)
+                agg_decision_matrix[alt_i, crit_j] = self.agg_alt_fuzzy_method(alt_i, crit_j)
         return agg_decision_matrix
 
 
     def _defaut_crit_agg_fuzzy_weight_method(self, crit_j):
-        # for each decision maker K weight specified for this criteria (initialising with first K)
-        avg_left_value = 0
-        avg_middle_value = 0
-        avg_right_value = 0
-        for weights in self.criteria_weights_list:
-            criterion_w = weights[crit_j]
-
-            left_value, middle_value, right_value = criterion_w
-            avg_left_value += left_value
-            avg_middle_value += middle_value
-            avg_right_value += right_value
-
-        avg_left_value = avg_left_value / self.num_decision_makers
-        avg_middle_value = avg_middle_value / self.num_decision_makers
-        avg_right_value = avg_right_value / self.num_decision_makers
-
-        return [avg_left_value, avg_middle_value, avg_right_value]
+        "Aggregated fuzzy weight of a single criterion."
+        return TFN.from_array(self._aggregate_fuzzy_numbers(self._get_criteria_weights_tensor()[:, crit_j]))
 
     def _all_agg_weights(self):
         """
             Function used to aggregate the fuzzy weights for the benefit and
             cost criteria respectivelly
         """
+        if self.agg_crit_fuzzy_method is None:
+            return self._aggregate_fuzzy_numbers(self._get_criteria_weights_tensor())
 
-        agg_weights = []
+        agg_weights = np.empty((self.num_criteria, 3))
         for crit_j in range(self.num_criteria):
-            agg_crit_j = self.agg_crit_fuzzy_method(crit_j)
-            agg_weights.append(agg_crit_j)
-
+            agg_weights[crit_j] = self.agg_crit_fuzzy_method(crit_j)
         return agg_weights
 
     def _aggregated_ratings_and_weights(self):
@@ -225,22 +515,19 @@ class FuzzyTOPSIS(BaseTOPSIS):
         self.agg_decision_matrix = self._all_agg_ratings()
         self.agg_criteria_weights = self._all_agg_weights()
 
+    def _aggregated_ratings(self):
+        "same as `_aggregated_ratings_and_weights`, for `set_decision_matrix` where the criteria weights come later in a batch"
+        self.agg_decision_matrix = self._all_agg_ratings()
+
+    def _get_min_left_or_max_right_for_all_criteria(self):
+        "max right value for each benefit criterion and min left value for each cost criterion."
+        agg_decision_matrix = tfn_array(self.agg_decision_matrix)
+        max_right = np.maximum(agg_decision_matrix[..., 2].max(axis=0), 0)
+        min_left = agg_decision_matrix[..., 0].min(axis=0)
+        return np.where(self.criteria_benefit_mask, max_right, min_left)
 
     def _get_min_left_or_max_right_for_criteria(self, crit_j):
-        is_benefit_criterion = self.criteria_benefit_indicator[crit_j]
-        final_value = 0
-        if is_benefit_criterion is False:
-            final_value = np.inf
-        # get min/max for cost/benefit criteria
-        for alternative in self.agg_decision_matrix:
-            criterion = alternative[crit_j]
-            left_value, middle_value, right_value = criterion
-
-            if is_benefit_criterion:
-                final_value = max(final_value, right_value)
-            else:
-                final_value = min(final_value, left_value)
-        return final_value
+        return self._get_min_left_or_max_right_for_all_criteria()[crit_j]
 
     def _default_normalize_alternative_method(self, alt_i, crit_j, minl_or_maxr_criteria):
 
@@ -251,38 +538,49 @@ class FuzzyTOPSIS(BaseTOPSIS):
         norm_alt_crit_j = None
         is_benefit_criterion = self.criteria_benefit_indicator[crit_j]
         if is_benefit_criterion:
-            norm_alt_crit_j = ((left_value / minl_or_maxr_criteria), (middle_value / minl_or_maxr_criteria), (right_value / minl_or_maxr_criteria))
+            norm_alt_crit_j = TFN((left_value / minl_or_maxr_criteria), (middle_value / minl_or_maxr_criteria), (right_value / minl_or_maxr_criteria))
         else:
-            norm_alt_crit_j = ((minl_or_maxr_criteria / right_value), (minl_or_maxr_criteria / middle_value), (minl_or_maxr_criteria / left_value))
+            norm_alt_crit_j = TFN((minl_or_maxr_criteria / right_value), (minl_or_maxr_criteria / middle_value), (minl_or_maxr_criteria / left_value))
         return norm_alt_crit_j
 
+    def _normalize_all_alternatives(self, agg_decision_matrix, minl_or_maxr_criteria, criteria_benefit_mask=None):
+        """
+        Normalizes all alternatives at once: benefit criteria are divided by their max right value,
+        and cost criteria are the min left value divided by the reversed (right, middle, left) fuzzy number.
+        """
+        benefit = self.criteria_benefit_mask if criteria_benefit_mask is None else criteria_benefit_mask
+        cost = ~benefit
+        norm_decision_matrix = np.empty_like(agg_decision_matrix)
+        norm_decision_matrix[..., benefit, :] = agg_decision_matrix[..., benefit, :] / minl_or_maxr_criteria[benefit, np.newaxis]
+        norm_decision_matrix[..., cost, :] = minl_or_maxr_criteria[cost, np.newaxis] / agg_decision_matrix[..., cost, ::-1]
+        return norm_decision_matrix
+
     def _normalized_decision_matrix(self):
         """
         Third step in fuzzy TOPSIS, in which the normalized fuzzy decision matrix is calculated.
         """
-
-        self.norm_decision_matrix = [[None for j in range(self.num_criteria)] for i in range(self.num_alternatives)]
+        minl_or_maxr_criteria = self._get_min_left_or_max_right_for_all_criteria()
+        self.minl_or_maxr_criteria = minl_or_maxr_criteria
+        if self.norm_alt_fuzzy_method is None:
+            agg_decision_matrix = tfn_array(self.agg_decision_matrix)
+            self.norm_decision_matrix = self._normalize_all_alternatives(agg_decision_matrix, minl_or_maxr_criteria)
+            return
+
+        self.norm_decision_matrix = np.empty((self.num_alternatives, self.num_criteria, 3))
         for crit_j in range(self.num_criteria):
-            minl_or_maxr_criteria = self._get_min_left_or_max_right_for_criteria(crit_j)
-
             for alt_i in range(self.num_alternatives):
-                norm_alt_crit_j = self.norm_alt_fuzzy_method(alt_i, crit_j, minl_or_maxr_criteria)
-                self.norm_decision_matrix[alt_i][crit_j] = norm_alt_crit_j
+                norm_alt_crit_j = self.norm_alt_fuzzy_method(alt_i, crit_j, minl_or_maxr_criteria[crit_j])
+                self.norm_decision_matrix[alt_i, crit_j] = norm_alt_crit_j
 
     def _weighted_normalized_decision_matrix(self):
         """
         Fourth step in fuzzy TOPSIS, in which the weighted normalized fuzzy decision matrix is calculated.
         """
-        self.weighted_norm_decision_matrix = []
-        for alternative in self.norm_decision_matrix:
-            alt_weighted_norm_criteria = []
-            for crit_j, criterion in enumerate(alternative):
-                weight_norm_criterion = []
-                weight = self.agg_criteria_weights[crit_j]
-                for i in range(3):
-                    weight_norm_criterion.append(criterion[i] * weight[i])
-                alt_weighted_norm_criteria.append(weight_norm_criterion)
-            self.weighted_norm_decision_matrix.append(alt_weighted_norm_criteria)
+        norm_decision_matrix = tfn_array(self.norm_decision_matrix)
+        agg_criteria_weights = tfn_array(self.agg_criteria_weights)[..., np.newaxis, :, :]
+        weighted_norm_decision_matrix = self._get_buffer(
+            'weighted_norm_decision_matrix', np.broadcast(norm_decision_matrix, agg_criteria_weights).shape)
+        self.weighted_norm_decision_matrix = np.multiply(norm_decision_matrix, agg_criteria_weights, out=weighted_norm_decision_matrix)
 
     def _calculate_FPIS_FNIS(self):
         """
@@ -292,89 +590,86 @@ class FuzzyTOPSIS(BaseTOPSIS):
             FPIS: (1, 1, 1)... simplification where positive and negative ideal are an alternative with 1s and 0s respectivelly
             FNIS: (0, 0, 0)...
         """
-        self.FPIS_value = []
-        self.FNIS_value = []
-        for crit_j in range(self.num_criteria):
-            fpis = [1, 1, 1]
-            fnis = [0, 0, 0]
-            self.FPIS_value.append(fpis)
-            self.FNIS_value.append(fnis)
+        self.FPIS_value = np.ones((self.num_criteria, 3))
+        self.FNIS_value = np.zeros((self.num_criteria, 3))
 
 
-    def _fuzzy_number_distance_calculation(self, val1, val2):
-        "euclidian distance of two triangular fuzzy numbers proposed by Chen, C.T., 2000"
-        first_part = 0
-        for vi in range(3):
-            first_part += (val1[vi] - val2[vi])**2
-        second_part = first_part / 3
-        third_part = np.sqrt(second_part)
-        return third_part
+    def _fuzzy_number_distance_calculation(self, val1, val2, out=None):
+        """
+        euclidian distance of two triangular fuzzy numbers proposed by Chen, C.T., 2000.
+        Works on single fuzzy numbers or on whole arrays of them (last axis holding the 3 values),
+        in which case the distances can be written into the `out` array.
+        """
+        diff = np.subtract(val1, val2)
+        np.multiply(diff, diff, out=diff)
+        if out is None:
+            return np.sqrt(np.sum(diff, axis=-1) / 3)
+        np.sum(diff, axis=-1, out=out)
+        np.divide(out, 3, out=out)
+        return np.sqrt(out, out=out)
 
 
     def _calculate_distance_from_ideal_solutions(self, alt_i, crit_j, is_positive=True):
         if is_positive:
-            # ideal_solution_index = self.FPIS_indexes[crit_j]
             ideal_solution = self.FPIS_value
         else:
             ideal_solution = self.FNIS_value
-            # ideal_solution_index = self.FNIS_indexes[crit_j]
         ideal_criterion = ideal_solution[crit_j]
         criterion = self.weighted_norm_decision_matrix[alt_i][crit_j]
-        dist = 0
-        # if any(alt_i[i] != ideal_solution[i] for i in range(self.num_criteria):
         dist = self._fuzzy_number_distance_calculation(criterion, ideal_criterion)
         return dist
 
+    def _get_ideal_solutions(self, weighted_norm_decision_matrix):
+        "FPIS and FNIS fuzzy numbers, in a shape that broadcasts against the weighted normalized decision matrix."
+        return tfn_array(self.FPIS_value), tfn_array(self.FNIS_value)
+
     def _distance_from_FPIS_FNIS(self):
         """
         Sixth step in fuzzy TOPSIS, where the distances from each alternative to the
         Fuzzy Positive Ideal Solution (FPIS) and Fuzzy Negative Ideal Solution (FNIS) are calculated.
         """
-        self.fpis_distances = []
-        self.fpis_distances_per_criterion = []
-        self.fnis_distances = []
-        self.fnis_distances_per_criterion = []
-        for alt_i, alternative in enumerate(self.weighted_norm_decision_matrix):
-            alt_fpis_distances = []
-            alt_fnis_distances = []
-            for crit_j, criterion in enumerate(alternative):
-                fpis_dist = self._calculate_distance_from_ideal_solutions(alt_i, crit_j, is_positive=True)
-                fnis_dist = self._calculate_distance_from_ideal_solutions(alt_i, crit_j, is_positive=False)
-
-                alt_fpis_distances.append(fpis_dist)
-                alt_fnis_distances.append(fnis_dist)
-
-            self.fpis_distances_per_criterion.append(alt_fpis_distances)
-            self.fpis_distances.append(sum(alt_fpis_distances))
-            self.fnis_distances_per_criterion.append(alt_fnis_distances)
-            self.fnis_distances.append(sum(alt_fnis_distances))
+        weighted_norm_decision_matrix = tfn_array(self.weighted_norm_decision_matrix)
+        fpis, fnis = self._get_ideal_solutions(weighted_norm_decision_matrix)
+
+        distances_shape = weighted_norm_decision_matrix.shape[:-1]
+        self.fpis_distances_per_criterion = self._fuzzy_number_distance_calculation(
+            weighted_norm_decision_matrix, fpis, out=self._get_buffer('fpis_distances_per_criterion', distances_shape))
+        self.fpis_distances = self.fpis_distances_per_criterion.sum(axis=-1)
+        self.fnis_distances_per_criterion = self._fuzzy_number_distance_calculation(
+            weighted_norm_decision_matrix, fnis, out=self._get_buffer('fnis_distances_per_criterion', distances_shape))
+        self.fnis_distances = self.fnis_distances_per_criterion.sum(axis=-1)
 
     def _calculate_closeness_coefficients(self):
         """
         Seventh step in fuzzy TOPSIS, where it is calculated the closeness coefficient for each alternative.
         """
-        self.closeness_coefficients = []
-        for alt_j in range(self.num_alternatives):
-            nominator = self.fnis_distances[alt_j]
-            denominator = self.fnis_distances[alt_j] + self.fpis_distances[alt_j]
-            close_coeff = nominator / denominator
-            self.closeness_coefficients.append(close_coeff)
-
-    def get_alternatives_ranking_scores(self):
-        return self.closeness_coefficients
+        fnis_distances = np.asarray(self.fnis_distances, dtype=float)
+        fpis_distances = np.asarray(self.fpis_distances, dtype=float)
+        self.closeness_coefficients = fnis_distances / (fnis_distances + fpis_distances)
+
+    def get_alternatives_ranking_scores(self, batch_indexes=None):
+        if self.closeness_coefficients is None:
+            return None
+        closeness_coefficients = np.asarray(self.closeness_coefficients)
+        if batch_indexes is not None:
+            closeness_coefficients = closeness_coefficients[batch_indexes]
+        return closeness_coefficients.tolist()
 
     def _rank_alternatives(self):
         """
         Eight and last step in fuzzy TOPSIS, in which final alternative ranks are calculated as crips values.
+        Uses a stable sort, so alternatives with the same closeness coefficient keep their original order.
         """
-
-        self.ranking_indexes = sorted(range(self.num_alternatives), key=lambda k: self.closeness_coefficients[k], reverse=True)
+        closeness_coefficients = np.asarray(self.closeness_coefficients, dtype=float)
+        self.ranking_indexes = np.argsort(-closeness_coefficients, axis=-1, kind='stable').tolist()
 
 
 
 
 class AltFuzzyTOPSIS(FuzzyTOPSIS):
 
+    CRITERIA_WEIGHTS_BATCH_ATTRIBUTES = FuzzyTOPSIS.CRITERIA_WEIGHTS_BATCH_ATTRIBUTES + ('FPIS_indexes', 'FNIS_indexes')
+
     def __init__(self, criteria_benefit_indicator,
                  decision_matrix_list=None, criteria_weights_list=None,
                  agg_alt_fuzzy_method=None, agg_crit_fuzzy_method=None, norm_alt_fuzzy_method=None):
@@ -383,43 +678,18 @@ class AltFuzzyTOPSIS(FuzzyTOPSIS):
             decision_matrix_list, criteria_weights_list,
             agg_alt_fuzzy_method, agg_crit_fuzzy_method, norm_alt_fuzzy_method)
 
+    def _reset_intermediate_results(self):
+        super(AltFuzzyTOPSIS, self)._reset_intermediate_results()
         self.FPIS_indexes = None
         self.FNIS_indexes = None
 
-    def _defaut_alt_agg_fuzzy_rating_method(self, alt_i, crit_j):
+    def _aggregate_fuzzy_numbers(self, fuzzy_numbers):
         "from Sorin N˘ad˘aban et al. / Procedia Computer Science 91 ( 2016 ) 823"
-        min_left = np.inf
-        avg_middle = 0
-        max_right = 0
-        for dm in self.decision_matrix_list:
-            alternative = dm[alt_i]
-            criterion = alternative[crit_j]
-            c_left, c_middle, c_right = criterion
-
-            min_left = min(min_left, c_left)
-            avg_middle += c_middle
-            max_right = max(max_right, c_right)
-        avg_middle = avg_middle / self.num_decision_makers
-
-        agg_alt_i_crit_j = [min_left, avg_middle, max_right]
-        return agg_alt_i_crit_j
-
-    def _defaut_crit_agg_fuzzy_weight_method(self, crit_j):
-        "from Sorin N˘ad˘aban et al. / Procedia Computer Science 91 ( 2016 ) 823"
-        min_left_value = np.inf
-        avg_middle_value = 0
-        max_right_value = 0
-        for weights in self.criteria_weights_list:
-            criterion_w = weights[crit_j]
-
-            left_value, middle_value, right_value = criterion_w
-            min_left_value = min(min_left_value, left_value)
-            avg_middle_value += middle_value
-            max_right_value = max(max_right_value, right_value)
-
-        avg_middle_value = avg_middle_value / self.num_decision_makers
-
-        return (min_left_value, avg_middle_value, max_right_value)
+        aggregated = np.empty(fuzzy_numbers.shape[1:])
+        aggregated[..., 0] = fuzzy_numbers[..., 0].min(axis=0)
+        aggregated[..., 1] = fuzzy_numbers[..., 1].mean(axis=0)
+        aggregated[..., 2] = np.maximum(fuzzy_numbers[..., 2].max(axis=0), 0)
+        return aggregated
 
 
     def _calculate_FPIS_FNIS(self):
@@ -429,36 +699,72 @@ class AltFuzzyTOPSIS(FuzzyTOPSIS):
         Yuen’s method:
             FPIS: get the max alternative value of each criterion. compare alternatives first based on the right, then middle, then left.
             FNIS: get the min alternative value of each criterion. compare alternatives first based on the left, then middle, then right.
-        """
-        self.FPIS_indexes = []
-        self.FNIS_indexes = []
-        for crit_j in range(self.num_criteria):
-            fpis = self.weighted_norm_decision_matrix[0][crit_j]
-            fpis_alt_i = 0
-            fnis = self.weighted_norm_decision_matrix[0][crit_j]
-            fnis_alt_i = 0
-            for alt_i, alternative in enumerate(self.weighted_norm_decision_matrix):
-                criterion = alternative[crit_j]
-                found_vi_min = False
-                found_vi_max = False
-
-                # compare each fuzzy number value
-                for vi_min in range(3):
-                    vi_max = 2 - vi_min
-
-                    if not found_vi_max and criterion[vi_max] > fpis[vi_max]:
-                        fpis = criterion
-                        fpis_alt_i = alt_i
-                        found_vi_max = True
-                    if not found_vi_min and criterion[vi_min] < fnis[vi_min]:
-                        fnis = criterion
-                        fnis_alt_i = alt_i
-                        found_vi_min = True
-
-            self.FPIS_indexes.append(fpis_alt_i)
-            self.FNIS_indexes.append(fnis_alt_i)
 
+        The current FPIS (FNIS) is replaced by any later alternative with a greater (smaller) value in one of its
+        fuzzy number values, so the result depends on the alternatives order. Because of that the alternatives are
+        scanned in order, but each step compares all criteria at once.
+        """
+        weighted_norm_decision_matrix = tfn_array(self.weighted_norm_decision_matrix)
+        self.FPIS_indexes, self.FNIS_indexes = self._scan_ideal_solutions_indexes(weighted_norm_decision_matrix)
+
+    def _scan_ideal_solutions_indexes(self, weighted_norm_decision_matrix):
+        num_alternatives = weighted_norm_decision_matrix.shape[-3]
+        fpis = weighted_norm_decision_matrix[..., 0, :, :].copy()
+        fnis = fpis.copy()
+        fpis_indexes = np.zeros(fpis.shape[:-1], dtype=int)
+        fnis_indexes = np.zeros(fnis.shape[:-1], dtype=int)
+        for alt_i in range(1, num_alternatives):
+            criteria = weighted_norm_decision_matrix[..., alt_i, :, :]
+            is_new_fpis = np.greater(criteria, fpis).any(axis=-1)
+            is_new_fnis = np.less(criteria, fnis).any(axis=-1)
+            np.copyto(fpis, criteria, where=is_new_fpis[..., np.newaxis])
+            np.copyto(fnis, criteria, where=is_new_fnis[..., np.newaxis])
+            np.copyto(fpis_indexes, alt_i, where=is_new_fpis)
+            np.copyto(fnis_indexes, alt_i, where=is_new_fnis)
+        return fpis_indexes, fnis_indexes
+
+    def _update_ideal_solutions(self, changed_criteria, updated_alternatives, removed_alternative=None, appended_alternative=False):
+        """
+        For an appended alternative, criteria with a new normalisation are scanned again, and for the other criteria the scan just
+        continues from the current FPIS and FNIS with the new (last) alternative.
+        Otherwise, since the scan depends on the order of the alternatives, it is done again for all criteria.
+        Distances need to be calculated again wherever the normalisation or the ideal solution changed.
+        """
+        weighted_norm_decision_matrix = self.weighted_norm_decision_matrix
+        if appended_alternative:
+            new_alt_i = weighted_norm_decision_matrix.shape[-3] - 1
+            if changed_criteria.any():
+                fpis_indexes, fnis_indexes = self._scan_ideal_solutions_indexes(weighted_norm_decision_matrix[..., changed_criteria, :])
+                self.FPIS_indexes[..., changed_criteria] = fpis_indexes
+                self.FNIS_indexes[..., changed_criteria] = fnis_indexes
+
+            fpis, fnis = self._get_ideal_solutions(weighted_norm_decision_matrix)
+            new_alternative = weighted_norm_decision_matrix[..., new_alt_i:, :, :]
+            is_new_fpis = np.greater(new_alternative, fpis).any(axis=-1)[..., 0, :] & ~changed_criteria
+            is_new_fnis = np.less(new_alternative, fnis).any(axis=-1)[..., 0, :] & ~changed_criteria
+            np.copyto(self.FPIS_indexes, new_alt_i, where=is_new_fpis)
+            np.copyto(self.FNIS_indexes, new_alt_i, where=is_new_fnis)
+            return changed_criteria | is_new_fpis, changed_criteria | is_new_fnis
+
+        previous_fpis_indexes = self.FPIS_indexes
+        previous_fnis_indexes = self.FNIS_indexes
+        if removed_alternative is not None:
+            # alternatives after the removed one are shifted back, and the removed one can't be the ideal solution anymore
+            previous_fpis_indexes = np.where(previous_fpis_indexes == removed_alternative, -1, previous_fpis_indexes)
+            previous_fpis_indexes = previous_fpis_indexes - (previous_fpis_indexes > removed_alternative)
+            previous_fnis_indexes = np.where(previous_fnis_indexes == removed_alternative, -1, previous_fnis_indexes)
+            previous_fnis_indexes = previous_fnis_indexes - (previous_fnis_indexes > removed_alternative)
+        self._calculate_FPIS_FNIS()
+        recompute_fpis = changed_criteria | (self.FPIS_indexes != previous_fpis_indexes) | np.isin(self.FPIS_indexes, updated_alternatives)
+        recompute_fnis = changed_criteria | (self.FNIS_indexes != previous_fnis_indexes) | np.isin(self.FNIS_indexes, updated_alternatives)
+        return recompute_fpis, recompute_fnis
 
+    def _get_ideal_solutions(self, weighted_norm_decision_matrix):
+        fpis_indexes = np.asarray(self.FPIS_indexes)[..., np.newaxis, :, np.newaxis]
+        fnis_indexes = np.asarray(self.FNIS_indexes)[..., np.newaxis, :, np.newaxis]
+        fpis = np.take_along_axis(weighted_norm_decision_matrix, fpis_indexes, axis=-3)
+        fnis = np.take_along_axis(weighted_norm_decision_matrix, fnis_indexes, axis=-3)
+        return fpis, fnis
 
     def _calculate_distance_from_ideal_solutions(self, alt_i, crit_j, is_positive=True):
         ideal_solution_index = self.FPIS_indexes[crit_j]
@@ -470,4 +776,4 @@ class AltFuzzyTOPSIS(FuzzyTOPSIS):
         if alt_i != ideal_solution_index:
             ideal_solution = self.weighted_norm_decision_matrix[ideal_solution_index][crit_j]
             dist = self._fuzzy_number_distance_calculation(criterion, ideal_solution)
-        return dist
\ No newline at end of file
+        return dist
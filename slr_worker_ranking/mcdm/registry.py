@@ -0,0 +1,35 @@
+import importlib
+
+
+# ranker type -> ranker class, or the "module:ClassName" path of a backend that is only imported on first use
+RANKER_TYPES = {
+    'chen-ftopsis': 'slr_worker_ranking.mcdm.ftopsis:FuzzyTOPSIS',
+    'alt-ftopsis': 'slr_worker_ranking.mcdm.ftopsis:AltFuzzyTOPSIS',
+    'crisp-topsis': 'slr_worker_ranking.mcdm.crisptopsis:CrispTOPSIS',
+}
+
+
+def register_ranker_type(ranker_type, ranker_cls=None):
+    """
+    Registers a new ranker type, as a BaseTOPSIS class or as a "module:ClassName" path to be imported lazily.
+    Can also be used as a class decorator: `@register_ranker_type('my-topsis')`.
+    """
+    if ranker_cls is None:
+        def decorator(cls):
+            RANKER_TYPES[ranker_type] = cls
+            return cls
+        return decorator
+    RANKER_TYPES[ranker_type] = ranker_cls
+    return ranker_cls
+
+
+def get_ranker_class(ranker_type):
+    "resolves the ranker type to its class, importing the backend module on the first use"
+    if ranker_type not in RANKER_TYPES:
+        raise ValueError(f'Unknown ranker type: {ranker_type}. Available types: {", ".join(RANKER_TYPES.keys())}')
+    ranker_cls = RANKER_TYPES[ranker_type]
+    if isinstance(ranker_cls, str):
+        module_path, cls_name = ranker_cls.split(':')
+        ranker_cls = getattr(importlib.import_module(module_path), cls_name)
+        RANKER_TYPES[ranker_type] = ranker_cls
+    return ranker_cls
@@ -0,0 +1,56 @@
+import numpy as np
+
+
+class TFN(object):
+    """
+    Compact triangular fuzzy number (left, middle, right), for scalar use.
+    Behaves as a 3 values sequence, so it can be used anywhere a (left, middle, right) tuple is expected.
+    Matrices of fuzzy numbers should be kept as `tfn_array` instead.
+    """
+    __slots__ = ('left', 'middle', 'right')
+
+    def __init__(self, left, middle, right):
+        self.left = left
+        self.middle = middle
+        self.right = right
+
+    @classmethod
+    def from_array(cls, values):
+        left, middle, right = np.asarray(values, dtype=float).tolist()
+        return cls(left, middle, right)
+
+    def __iter__(self):
+        yield self.left
+        yield self.middle
+        yield self.right
+
+    def __len__(self):
+        return 3
+
+    def __getitem__(self, index):
+        return (self.left, self.middle, self.right)[index]
+
+    def __eq__(self, other):
+        try:
+            return tuple(self) == tuple(other)
+        except TypeError:
+            return NotImplemented
+
+    def __hash__(self):
+        return hash(tuple(self))
+
+    def __repr__(self):
+        return f'TFN({self.left}, {self.middle}, {self.right})'
+
+
+def tfn_array(fuzzy_numbers, shape=None):
+    """
+    Container for matrices of triangular fuzzy numbers: a C-contiguous float array of shape (..., 3),
+    where the last axis holds the (left, middle, right) values.
+    Accepts nested lists/tuples of fuzzy numbers (or TFNs), and doesn't copy inputs that already are such an array.
+    """
+    fuzzy_numbers = np.ascontiguousarray(fuzzy_numbers, dtype=float)
+    if shape is not None:
+        fuzzy_numbers = fuzzy_numbers.reshape(tuple(shape) + (3,))
+    assert fuzzy_numbers.ndim > 0 and fuzzy_numbers.shape[-1] == 3, f"invalid triangular fuzzy numbers shape: {fuzzy_numbers.shape}"
+    return fuzzy_numbers
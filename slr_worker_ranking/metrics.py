@@ -0,0 +1,85 @@
+import math
+
+from prometheus_client import CollectorRegistry, Histogram, start_http_server
+from prometheus_client.core import GaugeMetricFamily, HistogramMetricFamily
+
+
+METRICS_PREFIX = 'slr_worker_ranking'
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+PAYLOAD_BYTES_BUCKETS = tuple(256 * 4 ** i for i in range(9))
+
+
+class ServiceStateCollector(object):
+    """
+    Collects the gauges of the service state (profiles, alternatives, queries and streams backlog)
+    and the ranker stage timers when the metrics are scraped, so nothing is updated while the events are processed.
+    """
+
+    def __init__(self, service):
+        self.service = service
+
+    def collect(self):
+        service = self.service
+        slr_profiles = GaugeMetricFamily(
+            f'{METRICS_PREFIX}_slr_profiles', 'Number of SLR profiles of each service type', labels=['service_type'])
+        for service_type, service_slr_profiles in list(service.slr_profiles_by_service.items()):
+            slr_profiles.add_metric([service_type], len(service_slr_profiles))
+        yield slr_profiles
+
+        alternatives = GaugeMetricFamily(
+            f'{METRICS_PREFIX}_alternatives', 'Number of alternatives (rated workers) of each service type', labels=['service_type'])
+        for service_type, service_alternatives in list(service.alternatives_by_service_type.items()):
+            alternatives.add_metric([service_type], len(service_alternatives))
+        yield alternatives
+
+        yield GaugeMetricFamily(
+            f'{METRICS_PREFIX}_queries', 'Number of queries with SLR profiles', value=len(service.query_slr_profiles_map))
+        yield GaugeMetricFamily(
+            f'{METRICS_PREFIX}_service_types_waiting_rerank', 'Number of service types waiting for their re-ranking',
+            value=len(service.dirty_service_types))
+
+        stream_backlog = GaugeMetricFamily(
+            f'{METRICS_PREFIX}_stream_backlog', 'Events of each listened stream not yet read by the service consumer group',
+            labels=['event_type'])
+        for event_type, backlog in service.get_stream_backlogs().items():
+            stream_backlog.add_metric([event_type], backlog)
+        yield stream_backlog
+
+        if service.ranker_stage_timers is not None:
+            yield self.ranker_stage_histograms(service.ranker_stage_timers)
+
+    def ranker_stage_histograms(self, ranker_stage_timers):
+        ranker_stage_seconds = HistogramMetricFamily(
+            f'{METRICS_PREFIX}_ranker_stage_seconds', 'Latency of each ranking stage, by ranker and problem shape',
+            labels=['ranker', 'problem_shape', 'stage'])
+        for labels, histogram in list(ranker_stage_timers.histograms.items()):
+            buckets = []
+            cumulative_count = 0
+            for upper_bound, bucket_count in zip(histogram.buckets, histogram.bucket_counts):
+                cumulative_count += bucket_count
+                buckets.append(('+Inf' if math.isinf(upper_bound) else str(upper_bound), cumulative_count))
+            ranker_stage_seconds.add_metric(list(labels), buckets, histogram.sum)
+        return ranker_stage_seconds
+
+
+class ServiceMetrics(object):
+    """
+    Prometheus metrics of the service, in their own registry (not the process global one),
+    so they are only served by the service metrics HTTP server (`start_http_server`).
+    """
+
+    def __init__(self, service):
+        self.registry = CollectorRegistry()
+        self.event_processing_seconds = Histogram(
+            f'{METRICS_PREFIX}_event_processing_seconds', 'Latency of the processing of each event type',
+            ['event_type'], buckets=LATENCY_BUCKETS, registry=self.registry)
+        self.ranking_seconds = Histogram(
+            f'{METRICS_PREFIX}_ranking_seconds', 'Time spent ranking the SLR profiles and alternatives of each service type',
+            ['service_type'], buckets=LATENCY_BUCKETS, registry=self.registry)
+        self.publish_payload_bytes = Histogram(
+            f'{METRICS_PREFIX}_publish_payload_bytes', 'Size of the serialized events published to each stream',
+            ['event_type'], buckets=PAYLOAD_BYTES_BUCKETS, registry=self.registry)
+        self.registry.register(ServiceStateCollector(service))
+
+    def start_http_server(self, port, addr=''):
+        start_http_server(port, addr=addr, registry=self.registry)
@@ -0,0 +1,64 @@
+import cProfile
+import io
+import os
+import pstats
+import time
+import tracemalloc
+
+
+class EventsProfiler(object):
+    """
+    Profiles a bounded window of calls (e.g., the processing of the next N events) with cProfile,
+    and optionally takes a tracemalloc snapshot at the end of the window.
+    The results are written to `output_dir` as a pstats `.prof` file (e.g., for snakeviz or `python -m pstats`),
+    a `.tracemalloc` snapshot (see `tracemalloc.Snapshot.load`) and a `.txt` report with the top functions and allocations.
+    """
+    TOP_FUNCTIONS = 50
+    TOP_ALLOCATIONS = 30
+
+    def __init__(self, output_dir, num_calls, trace_memory=True):
+        self.output_dir = output_dir
+        self.num_calls = num_calls
+        self.trace_memory = trace_memory
+        self.calls = 0
+        self.profile = cProfile.Profile()
+        # tracemalloc is only stopped at the end if it was started by this profiler
+        self.started_tracemalloc = trace_memory and not tracemalloc.is_tracing()
+        if self.started_tracemalloc:
+            tracemalloc.start()
+
+    def runcall(self, function, *args, **kwargs):
+        self.calls += 1
+        self.profile.enable()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            self.profile.disable()
+
+    def is_done(self):
+        return self.calls >= self.num_calls
+
+    def write_results(self, name='profile'):
+        "writes the results of the profiled calls so far, and returns the written file paths"
+        os.makedirs(self.output_dir, exist_ok=True)
+        path_prefix = os.path.join(self.output_dir, f'{name}-{time.strftime("%Y%m%d-%H%M%S")}-{os.getpid()}')
+        paths = [f'{path_prefix}.prof', f'{path_prefix}.txt']
+        self.profile.dump_stats(paths[0])
+
+        report = io.StringIO()
+        report.write(f'{self.calls} profiled calls\n\n')
+        pstats.Stats(self.profile, stream=report).sort_stats('cumulative').print_stats(self.TOP_FUNCTIONS)
+        if self.trace_memory and tracemalloc.is_tracing():
+            snapshot = tracemalloc.take_snapshot()
+            snapshot.dump(f'{path_prefix}.tracemalloc')
+            paths.append(f'{path_prefix}.tracemalloc')
+            report.write(f'Top {self.TOP_ALLOCATIONS} memory allocations:\n')
+            for statistic in snapshot.statistics('lineno')[:self.TOP_ALLOCATIONS]:
+                report.write(f'{statistic}\n')
+        with open(paths[1], 'w') as report_file:
+            report_file.write(report.getvalue())
+        return paths
+
+    def stop(self):
+        if self.started_tracemalloc:
+            tracemalloc.stop()
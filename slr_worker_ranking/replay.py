@@ -0,0 +1,164 @@
+#!/usr/bin/env python
+"""
+Offline replay of a JSONL event log through the service, using the in-memory streams of `event_service_utils.tests`
+instead of Redis. Each line of the log is an event: `{"event_type": "WorkerProfileRated", "event_data": {...}}`.
+Reports the events/sec, the latency percentiles of each event type and the peak memory.
+
+    $ python -m slr_worker_ranking.replay events.jsonl --json
+"""
+import argparse
+import json
+import resource
+import time
+import tracemalloc
+import uuid
+
+import numpy as np
+import opentracing
+from event_service_utils.tests.json_msg_helper import prepare_event_msg_tuple
+from event_service_utils.tests.mocked_streams import MockedStreamFactory
+
+from slr_worker_ranking.service import SLRWorkerRanking
+
+from slr_worker_ranking.conf import (
+    SERVICE_STREAM_KEY,
+    SERVICE_CMD_KEY_LIST,
+    PUB_EVENT_LIST,
+    RANKER_CRITERIA,
+    RANKER_TYPE,
+    criteria_expand,
+)
+
+
+LATENCY_PERCENTILES = (50, 90, 95, 99)
+
+
+def load_events(path):
+    "yields the (event type, event data) of each line in the JSONL event log"
+    with open(path) as events_file:
+        for line in events_file:
+            line = line.strip()
+            if line:
+                event = json.loads(line)
+                yield event['event_type'], event['event_data']
+
+
+def create_replay_service(**service_kwargs):
+    "creates the service with in-memory streams and a no-op tracer, so nothing is sent anywhere"
+    service_name = SLRWorkerRanking.__name__
+    stream_factory = MockedStreamFactory(mocked_dict={
+        SERVICE_STREAM_KEY: [],
+        f'cg-{service_name}': {},
+    })
+    kwargs = {
+        'service_stream_key': SERVICE_STREAM_KEY,
+        'service_cmd_key_list': SERVICE_CMD_KEY_LIST,
+        'pub_event_list': PUB_EVENT_LIST,
+        'service_details': None,
+        'ranker_type': RANKER_TYPE,
+        'ranker_criteria': RANKER_CRITERIA,
+        'logging_level': 'ERROR',
+        'tracer_configs': {'reporting_host': None, 'reporting_port': None},
+    }
+    kwargs.update(service_kwargs)
+    service = SLRWorkerRanking(stream_factory=stream_factory, **kwargs)
+    # jaeger only initializes the first tracer of the process, the others are None
+    if service.tracer is not None:
+        service.tracer.close()
+    service.tracer = opentracing.Tracer()
+    return service
+
+
+def latency_percentiles(latencies):
+    "latency percentiles (in milliseconds) of the given latencies (in seconds)"
+    latencies_ms = np.asarray(latencies) * 1000
+    return {f'p{percentile}': float(np.percentile(latencies_ms, percentile)) for percentile in LATENCY_PERCENTILES}
+
+
+def replay_events(service, events, trace_memory=False):
+    """
+    Feeds each event into `process_event_type` through the in-memory command stream (`service.process_cmd`),
+    as fast as possible, and returns the throughput, latency and memory statistics of the replay.
+    The published events are only counted, and dropped from the in-memory streams after each event.
+    """
+    if trace_memory:
+        tracemalloc.start()
+    latencies_by_event_type = {}
+    num_published_events = 0
+    replay_start = time.perf_counter()
+    for event_type, event_data in events:
+        event_data.setdefault('id', str(uuid.uuid4()))
+        service.service_cmd.mocked_values_dict = {event_type.encode('utf-8'): [prepare_event_msg_tuple(event_data)]}
+
+        start = time.perf_counter()
+        service.process_cmd()
+        latencies_by_event_type.setdefault(event_type, []).append(time.perf_counter() - start)
+
+        for pub_stream in service.pub_event_stream_map.values():
+            num_published_events += len(pub_stream.mocked_values)
+            pub_stream.mocked_values.clear()
+    replay_duration = time.perf_counter() - replay_start
+
+    num_events = sum(len(latencies) for latencies in latencies_by_event_type.values())
+    stats = {
+        'events': num_events,
+        'published_events': num_published_events,
+        'duration_secs': replay_duration,
+        'events_per_sec': num_events / replay_duration if replay_duration > 0 else 0.0,
+        'latency_ms': {
+            event_type: dict(count=len(latencies), **latency_percentiles(latencies))
+            for event_type, latencies in latencies_by_event_type.items()
+        },
+        # ru_maxrss is in kilobytes on linux
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+    if service.ranker_stage_timers is not None:
+        stats['ranker_stage_timings'] = service.get_ranker_stage_timings()
+    if trace_memory:
+        _, peak_traced_memory = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        stats['peak_traced_memory_mb'] = peak_traced_memory / (1024 * 1024)
+    return stats
+
+
+def format_stats(stats):
+    lines = [
+        f"events: {stats['events']} (published: {stats['published_events']})",
+        f"duration: {stats['duration_secs']:.3f} secs ({stats['events_per_sec']:.1f} events/sec)",
+        f"peak rss: {stats['peak_rss_mb']:.1f} MB",
+    ]
+    if 'peak_traced_memory_mb' in stats:
+        lines.append(f"peak traced memory: {stats['peak_traced_memory_mb']:.1f} MB")
+    for event_type, latency in stats['latency_ms'].items():
+        percentiles = ' '.join(f'{p}={latency[p]:.3f}ms' for p in latency.keys() if p != 'count')
+        lines.append(f"{event_type} ({latency['count']}): {percentiles}")
+    for ranker_cls_name, timings_by_shape in stats.get('ranker_stage_timings', {}).items():
+        for problem_shape, timings_by_stage in timings_by_shape.items():
+            lines.append(f'{ranker_cls_name} ({problem_shape}):')
+            for stage, timing in timings_by_stage.items():
+                lines.append(
+                    f"  {stage} ({timing['count']}): mean={timing['mean'] * 1e3:.3f}ms p95={timing['p95'] * 1e3:.3f}ms")
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Replays a JSONL event log through the service, without Redis.')
+    parser.add_argument('events_path', help='JSONL file with one {"event_type": ..., "event_data": {...}} per line')
+    parser.add_argument('--ranker-type', default=RANKER_TYPE)
+    parser.add_argument(
+        '--ranker-criteria', type=criteria_expand, default=RANKER_CRITERIA,
+        help='same format as RANKER_CRITERIA, e.g. "criterion_0:benefit,criterion_1:cost" for a generated workload')
+    parser.add_argument('--trace-memory', action='store_true', help='also reports the peak python memory (slower replay)')
+    parser.add_argument('--stage-timers', action='store_true', help='also reports the latency of each ranking stage')
+    parser.add_argument('--json', action='store_true', help='prints the statistics as JSON')
+    args = parser.parse_args(argv)
+
+    service = create_replay_service(
+        ranker_type=args.ranker_type, ranker_criteria=args.ranker_criteria, ranker_stage_timers=args.stage_timers)
+    stats = replay_events(service, load_events(args.events_path), trace_memory=args.trace_memory)
+    print(json.dumps(stats, indent=2) if args.json else format_stats(stats))
+    return stats
+
+
+if __name__ == '__main__':
+    main()
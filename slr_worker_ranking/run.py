@@ -14,16 +14,47 @@ from slr_worker_ranking.conf import (
     TRACER_REPORTING_PORT,
     RANKER_CRITERIA,
     RANKER_TYPE,
+    RERANK_QUIET_PERIOD,
+    RERANK_MAX_DELAY,
+    PUBLISH_DELTA_SLR_PROFILES,
+    SLR_PROFILES_PUBLISH_SUPPRESSION,
+    SLR_PROFILES_SCORE_EPSILON,
+    SLR_PROFILE_WEIGHTS_RESOLUTION,
+    MAX_SLR_PROFILES,
+    MAX_ALTERNATIVES_PER_SERVICE_TYPE,
+    SNAPSHOT_PATH,
+    SNAPSHOT_INTERVAL,
+    RANKER_STAGE_TIMERS,
+    METRICS_PORT,
+    LATENCY_SUMMARY_INTERVAL,
+    PROFILING_EVENTS,
+    PROFILING_DIR,
     SERVICE_DETAILS,
 )
 
 
+def get_stream_read_block(rerank_quiet_period, latency_summary_interval, snapshot_path, snapshot_interval):
+    """
+    Milliseconds the stream reads block waiting for events (0 blocks forever).
+    The pending re-rankings, latency summary and snapshot only run after a read returns, so the reads
+    must time out within the shortest of their periods, otherwise they would wait for the next event.
+    """
+    periods = [rerank_quiet_period, latency_summary_interval]
+    if snapshot_path:
+        periods.append(snapshot_interval)
+    periods = [period for period in periods if period > 0]
+    if not periods:
+        return 0
+    return max(int(min(periods) * 1000), 1)
+
+
 def run_service():
     tracer_configs = {
         'reporting_host': TRACER_REPORTING_HOST,
         'reporting_port': TRACER_REPORTING_PORT,
     }
-    stream_factory = RedisStreamFactory(host=REDIS_ADDRESS, port=REDIS_PORT)
+    block = get_stream_read_block(RERANK_QUIET_PERIOD, LATENCY_SUMMARY_INTERVAL, SNAPSHOT_PATH, SNAPSHOT_INTERVAL)
+    stream_factory = RedisStreamFactory(host=REDIS_ADDRESS, port=REDIS_PORT, block=block)
     service = SLRWorkerRanking(
         service_stream_key=SERVICE_STREAM_KEY,
         service_cmd_key_list=SERVICE_CMD_KEY_LIST,
@@ -32,6 +63,21 @@ def run_service():
         stream_factory=stream_factory,
         ranker_criteria=RANKER_CRITERIA,
         ranker_type=RANKER_TYPE,
+        rerank_quiet_period=RERANK_QUIET_PERIOD,
+        rerank_max_delay=RERANK_MAX_DELAY,
+        publish_delta_slr_profiles=PUBLISH_DELTA_SLR_PROFILES,
+        publish_suppression=SLR_PROFILES_PUBLISH_SUPPRESSION,
+        publish_score_epsilon=SLR_PROFILES_SCORE_EPSILON,
+        slr_profile_weights_resolution=SLR_PROFILE_WEIGHTS_RESOLUTION,
+        max_slr_profiles=MAX_SLR_PROFILES,
+        max_alternatives_per_service_type=MAX_ALTERNATIVES_PER_SERVICE_TYPE,
+        snapshot_path=SNAPSHOT_PATH,
+        snapshot_interval=SNAPSHOT_INTERVAL,
+        ranker_stage_timers=RANKER_STAGE_TIMERS,
+        metrics_port=METRICS_PORT,
+        latency_summary_interval=LATENCY_SUMMARY_INTERVAL,
+        profiling_events=PROFILING_EVENTS,
+        profiling_dir=PROFILING_DIR,
         logging_level=LOGGING_LEVEL,
         tracer_configs=tracer_configs
     )
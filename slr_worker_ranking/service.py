@@ -1,21 +1,47 @@
+from collections import OrderedDict
 from re import S
+import contextlib
+import hashlib
+import logging
+import os
 import threading
+import time
+
+import numpy as np
+from walrus.containers import make_python_attr as walrus_normalized_cg_stream_key
 
-from event_service_utils.logging.decorators import timer_logger
 from event_service_utils.services.event_driven import BaseEventDrivenCMDService
 from event_service_utils.tracing.jaeger import init_tracer
 
-from slr_worker_ranking.mcdm.ftopsis import FuzzyTOPSIS, AltFuzzyTOPSIS
-from slr_worker_ranking.mcdm.crisptopsis import CrispTOPSIS
+from slr_worker_ranking.histograms import LatencyHistograms
+from slr_worker_ranking.metrics import ServiceMetrics
+from slr_worker_ranking.mcdm.registry import get_ranker_class
+from slr_worker_ranking.profiling import EventsProfiler
+from slr_worker_ranking.snapshot import read_snapshot, write_snapshot
 
 from slr_worker_ranking.conf import (
     LISTEN_EVENT_TYPE_WORKER_PROFILE_RATED,
     LISTEN_EVENT_TYPE_QUERY_SERVICES_QOS_CRITERIA_RANKED,
+    LISTEN_EVENT_TYPE_WORKER_PROFILE_REMOVED,
+    LISTEN_EVENT_TYPE_SERVICE_SLR_PROFILES_SNAPSHOT_REQUESTED,
+    LISTEN_EVENT_TYPE_QUERY_REMOVED,
+    LISTEN_EVENT_TYPE_SERVICE_PROFILING_REQUESTED,
     PUB_EVENT_TYPE_SERVICE_SLR_PROFILES_RANKED
 )
 
+SERVICE_TYPE_TAG = 'service-type'
+ALTERNATIVES_COUNT_TAG = 'alternatives-count'
+SLR_PROFILES_COUNT_TAG = 'slr-profiles-count'
+RANKER_TYPE_TAG = 'ranker-type'
+
 
 class SLRWorkerRanking(BaseEventDrivenCMDService):
+    PUBLISH_SUPPRESSION_MODES = ('off', 'order', 'scores')
+    # max events counted in a stream backlog, when redis doesn't report the consumer group lag (before redis 7)
+    STREAM_BACKLOG_COUNT_LIMIT = 10000
+    # events profiled after a profiling request that doesn't say how many
+    DEFAULT_PROFILING_EVENTS = 100
+
     def __init__(self,
                  service_stream_key, service_cmd_key_list,
                  pub_event_list, service_details,
@@ -23,7 +49,22 @@ class SLRWorkerRanking(BaseEventDrivenCMDService):
                  ranker_type,
                  ranker_criteria,
                  logging_level,
-                 tracer_configs):
+                 tracer_configs,
+                 rerank_quiet_period=0,
+                 rerank_max_delay=None,
+                 publish_delta_slr_profiles=False,
+                 publish_suppression='off',
+                 publish_score_epsilon=1e-6,
+                 slr_profile_weights_resolution=1e-6,
+                 max_slr_profiles=0,
+                 max_alternatives_per_service_type=0,
+                 snapshot_path=None,
+                 snapshot_interval=60,
+                 ranker_stage_timers=False,
+                 metrics_port=0,
+                 latency_summary_interval=60,
+                 profiling_events=0,
+                 profiling_dir='profiles'):
         tracer = init_tracer(self.__class__.__name__, **tracer_configs)
         super(SLRWorkerRanking, self).__init__(
             name=self.__class__.__name__,
@@ -39,40 +80,225 @@ class SLRWorkerRanking(BaseEventDrivenCMDService):
         self.data_validation_fields = ['id']
         self.ranker_criteria = ranker_criteria
         self.ranker_type = ranker_type
+        # shared by all the rankers, so the stages of every service type are aggregated by ranker type and problem shape
+        self.ranker_stage_timers = LatencyHistograms() if ranker_stage_timers else None
         self.ranker = None
         self.initialize_ranker()
         self.alternatives_by_service_type = {}
         self.query_slr_profiles_map = {}
+        # query id -> ids of its evicted profiles, the only ones a resent query can create again
+        self.evicted_query_slr_profiles_map = {}
         # self.query_criteria_weights_profile = {
         #     'query1': [],
         # }
         self.slr_profiles_by_service = {}
         # self.slr_profile_rankings = {}
+        self.ranker_by_service_type = {}
+        # invalidated rankers, reset and reused by the next ranker of their service type (see `invalidate_service_type_ranker`)
+        self.idle_ranker_by_service_type = {}
+        self.rerank_quiet_period = rerank_quiet_period
+        self.rerank_max_delay = rerank_max_delay
+        # service type -> (first, last) time it was marked as needing a re-rank
+        self.dirty_service_types = {}
+        self.publish_delta_slr_profiles = publish_delta_slr_profiles
+        self.slr_profiles_version_by_service = {}
+        assert publish_suppression in self.PUBLISH_SUPPRESSION_MODES, f'Invalid publish suppression mode: {publish_suppression}'
+        self.publish_suppression = publish_suppression
+        self.publish_score_epsilon = publish_score_epsilon
+        self.suppressed_publishes_by_service = {}
+        self.slr_profile_weights_resolution = slr_profile_weights_resolution
+        self.max_slr_profiles = max_slr_profiles
+        self.max_alternatives_per_service_type = max_alternatives_per_service_type
+        # (service type, profile id) from the least to the most recently used by a query
+        self.slr_profiles_lru = OrderedDict()
+        # service type -> worker stream keys from the least to the most recently rated
+        self.alternatives_lru_by_service_type = {}
+        self.evicted_slr_profiles_by_service = {}
+        self.evicted_alternatives_by_service = {}
+        self.snapshot_path = snapshot_path
+        self.snapshot_interval = snapshot_interval
+        self.last_snapshot_at = time.monotonic()
+        # event type -> id of the last event processed from its stream
+        self.stream_offsets = {}
+        # service type -> profile id -> ranking of the profile in the last publish
+        self.published_slr_profile_rankings_by_service = {}
+        # service type -> ids of the profiles removed since the last publish
+        self.removed_slr_profile_ids_by_service = {}
+        self.metrics_port = metrics_port
+        self.metrics = ServiceMetrics(self) if metrics_port else None
+        # processing latency of each event type, logged as a summary every interval instead of a log line per event
+        self.event_latency_histograms = LatencyHistograms()
+        self.latency_summary_interval = latency_summary_interval
+        self.last_latency_summary_at = time.monotonic()
+        # eviction totals at the last summary, the evictions since then are logged with it
+        self.summarized_evictions = self.get_eviction_totals()
+        self.profiling_events = profiling_events
+        self.profiling_dir = profiling_dir
+        # only set while a window of events is being profiled
+        self.profiler = None
 
 
 
-    def initialize_ranker(self):
-        ranker_type_class_map = {
-            'chen-ftopsis': FuzzyTOPSIS,
-            'alt-ftopsis': AltFuzzyTOPSIS,
-            'crisp-topsis': CrispTOPSIS,
+    def create_ranker(self):
+        "the ranker backend is only imported the first time its type is used (see `mcdm.registry.register_ranker_type`)"
+        ranker_cls = get_ranker_class(self.ranker_type)
+        ranker = ranker_cls(criteria_benefit_indicator=list(self.ranker_criteria.values()))
+        ranker.stage_timers = self.ranker_stage_timers
+        return ranker
+
+    def time_ranking(self, service_type):
+        "context manager that observes the ranking time of the service type in the metrics (if enabled)"
+        if self.metrics is None:
+            # contextlib.nullcontext is only available from python 3.7
+            return contextlib.suppress()
+        return self.metrics.ranking_seconds.labels(service_type=service_type).time()
+
+    def start_ranking_span(self, operation_name, service_type, num_slr_profiles, tags=None):
+        "starts an active span (child of the current active span, if any) tagged with the service type ranking problem size"
+        span_tags = {
+            SERVICE_TYPE_TAG: service_type,
+            ALTERNATIVES_COUNT_TAG: len(self.alternatives_by_service_type.get(service_type, {})),
+            SLR_PROFILES_COUNT_TAG: num_slr_profiles,
+            RANKER_TYPE_TAG: self.ranker_type,
         }
-        ranker_cls = ranker_type_class_map[self.ranker_type]
-        self.ranker = ranker_cls(criteria_benefit_indicator=list(self.ranker_criteria.values()))
+        if tags is not None:
+            span_tags.update(tags)
+        return self.tracer.start_active_span(operation_name, tags=span_tags)
+
+    def get_ranker_stage_timings(self):
+        "latency summary (in seconds) of each ranking stage, as ranker class -> problem shape -> stage -> summary"
+        if self.ranker_stage_timers is None:
+            return {}
+        timings = {}
+        for (ranker_cls_name, problem_shape, stage), summary in self.ranker_stage_timers.summary().items():
+            timings.setdefault(ranker_cls_name, {}).setdefault(problem_shape, {})[stage] = summary
+        return timings
+
+    def initialize_ranker(self):
+        "the current ranker instance is reset for a new problem instead of creating a new one"
+        if self.ranker is None:
+            self.ranker = self.create_ranker()
+        else:
+            self.ranker.reset()
 
-    def publish_service_slr_profiles_ranked(self, service_type):
-        slr_profiles = self.slr_profiles_by_service.get(service_type, None)
-        if slr_profiles:
+    def get_service_type_ranker(self, service_type):
+        """
+        Returns the ranker with the service type decision matrix already set, so its aggregated and normalized
+        decision matrix (which don't depend on the SLR profiles criteria weights) is only calculated once.
+        The ranker keeps all the SLR profiles of the service type evaluated as its criteria weights batch (in the same order),
+        so new alternatives and new profiles can be ranked incrementally.
+        """
+        ranker = self.ranker_by_service_type.get(service_type, None)
+        if ranker is None:
+            ranker = self.idle_ranker_by_service_type.pop(service_type, None) or self.create_ranker()
+            decision_matrix = list(self.alternatives_by_service_type[service_type].values())
+            ranker.set_decision_matrix(decision_matrix)
+            service_slr_profiles = self.slr_profiles_by_service.get(service_type, {})
+            if service_slr_profiles:
+                ranker.evaluate_criteria_weights_batch(
+                    [slr_profile['criteria_weights'] for slr_profile in service_slr_profiles.values()]
+                )
+            self.ranker_by_service_type[service_type] = ranker
+        return ranker
+
+    def invalidate_service_type_ranker(self, service_type):
+        """
+        The ranker is reset and kept idle instead of discarded, so when the service type needs a ranker again
+        its intermediate matrices with the same shape are overwritten instead of allocated again.
+        """
+        ranker = self.ranker_by_service_type.pop(service_type, None)
+        if ranker is not None:
+            ranker.reset()
+            self.idle_ranker_by_service_type[service_type] = ranker
+
+    def get_slr_profile_ranking(self, slr_profile):
+        return (
+            tuple(slr_profile.get('alternatives_ids', ())),
+            tuple(slr_profile.get('ranking_index', ())),
+            tuple(slr_profile.get('ranking_scores', ())),
+        )
+
+    def is_slr_profile_ranking_changed(self, published_ranking, slr_profile_ranking):
+        """
+        Without a suppression mode any difference counts as a change.
+        'order' only compares the ranked alternatives, and 'scores' also compares the scores up to the epsilon.
+        """
+        if published_ranking is None:
+            return True
+        if self.publish_suppression == 'off':
+            return published_ranking != slr_profile_ranking
+        published_alternatives_ids, published_ranking_index, published_ranking_scores = published_ranking
+        alternatives_ids, ranking_index, ranking_scores = slr_profile_ranking
+        if published_alternatives_ids != alternatives_ids or published_ranking_index != ranking_index:
+            return True
+        if self.publish_suppression == 'scores':
+            return any(
+                abs(published_score - score) > self.publish_score_epsilon
+                for published_score, score in zip(published_ranking_scores, ranking_scores)
+            )
+        return False
+
+    def pop_changed_slr_profiles(self, service_type, slr_profiles, full_snapshot=False):
+        "returns the new SLR profiles, or the ones with a different ranking from when they were last published"
+        published_rankings = self.published_slr_profile_rankings_by_service.setdefault(service_type, {})
+        changed_slr_profiles = {}
+        for slr_profile_id, slr_profile in slr_profiles.items():
+            slr_profile_ranking = self.get_slr_profile_ranking(slr_profile)
+            if full_snapshot or self.is_slr_profile_ranking_changed(published_rankings.get(slr_profile_id), slr_profile_ranking):
+                published_rankings[slr_profile_id] = slr_profile_ranking
+                changed_slr_profiles[slr_profile_id] = slr_profile
+        return changed_slr_profiles
+
+    def publish_service_slr_profiles_ranked(self, service_type, full_snapshot=False):
+        """
+        Publishes the SLR profiles of the service type, with a version number that is incremented on every publish.
+        In delta mode only the new or changed profiles are published,
+        and consumers that miss a version can request a full snapshot.
+        The publish is skipped (and counted as suppressed) when no profile changed,
+        which with a suppression mode ignores score changes that keep the same ranking order.
+        """
+        slr_profiles = self.slr_profiles_by_service.get(service_type, {})
+        removed_slr_profile_ids = self.removed_slr_profile_ids_by_service.get(service_type, [])
+        if slr_profiles or removed_slr_profile_ids:
+            is_delta = self.publish_delta_slr_profiles and not full_snapshot
+            if self.publish_delta_slr_profiles or self.publish_suppression != 'off':
+                changed_slr_profiles = self.pop_changed_slr_profiles(service_type, slr_profiles, full_snapshot=full_snapshot)
+                if not changed_slr_profiles and not removed_slr_profile_ids:
+                    self.suppressed_publishes_by_service[service_type] = self.suppressed_publishes_by_service.get(service_type, 0) + 1
+                    self.logger.debug(f'Suppressed publish of unchanged SLR profiles of service type: {service_type}')
+                    return
+                if is_delta:
+                    slr_profiles = changed_slr_profiles
+            version = self.slr_profiles_version_by_service.get(service_type, 0) + 1
+            self.slr_profiles_version_by_service[service_type] = version
             new_event_data = {
                 'id': self.service_based_random_event_id(),
                 'service_type': service_type,
+                'version': version,
+                'is_delta': is_delta,
                 'slr_profiles': slr_profiles,
             }
-            self.publish_event_type_to_stream(event_type=PUB_EVENT_TYPE_SERVICE_SLR_PROFILES_RANKED, new_event_data=new_event_data)
+            if is_delta:
+                new_event_data['removed_slr_profile_ids'] = removed_slr_profile_ids
+            self.removed_slr_profile_ids_by_service.pop(service_type, None)
+            span_tags = {'slr-profiles-version': version, 'is-delta': is_delta}
+            with self.start_ranking_span('publish_service_slr_profiles_ranked', service_type, len(slr_profiles or {}), tags=span_tags):
+                self.publish_event_type_to_stream(event_type=PUB_EVENT_TYPE_SERVICE_SLR_PROFILES_RANKED, new_event_data=new_event_data)
+
+    def get_canonical_criteria_weights(self, criteria_weights):
+        "criteria weights (crisp or fuzzy) rounded to the profile weights resolution, so that float noise is ignored"
+        criteria_weights = np.asarray(criteria_weights, dtype=float)
+        if self.slr_profile_weights_resolution > 0:
+            return np.rint(criteria_weights / self.slr_profile_weights_resolution).astype(np.int64)
+        return criteria_weights + 0.0
 
     def get_slr_profile_id_from_service_type_and_criteria_weights(self, service_type, criteria_weights):
-        criterias_str = '-'.join([f'{cw}' for cw in criteria_weights])
-        slr_id = f'{service_type}-{criterias_str}'
+        "queries with the same quantized criteria weights share the same SLR profile id"
+        canonical_weights = self.get_canonical_criteria_weights(criteria_weights)
+        weights_hash = hashlib.blake2b(digest_size=8)
+        weights_hash.update(repr(canonical_weights.shape).encode('utf-8'))
+        weights_hash.update(canonical_weights.tobytes())
+        slr_id = f'{service_type}-{weights_hash.hexdigest()}'
         return slr_id
 
     # def get_ranked_alternatives(self, service_alternatives, ranking_index):
@@ -82,31 +308,91 @@ class SLRWorkerRanking(BaseEventDrivenCMDService):
     #         ranked_alternatives.append(alternatives_index_to_id[i])
     #     return ranked_alternatives
 
+    def rank_slr_profiles(self, service_type, slr_profiles, only_new_profiles=False):
+        """
+        sets the ranking of the given SLR profiles against the current alternatives of the service type.
+        The service type ranker already has all its profiles evaluated, or if `only_new_profiles` is set,
+        the given profiles are the new ones at the end of the service type profiles, and are appended to the ranker batch.
+        """
+        # a ranker without criteria weights has no rankings to read
+        if not slr_profiles:
+            return
+        service_alternatives = self.alternatives_by_service_type.get(service_type, {})
+        decision_matrix = list(service_alternatives.values())
+        # with one (or no) alternative there is nothing to rank
+        rankings_indexes = [list(range(len(decision_matrix))) for slr_profile in slr_profiles]
+        rankings_scores = [[0] * len(decision_matrix) for slr_profile in slr_profiles] # check if this should be 0 or 1, just for consistency, if only one alt, then it should have the highest score
+        if len(decision_matrix) > 1:
+            span_tags = {'only-new-profiles': only_new_profiles}
+            with self.start_ranking_span('rank_slr_profiles', service_type, len(slr_profiles), tags=span_tags), self.time_ranking(service_type):
+                is_new_ranker = service_type not in self.ranker_by_service_type
+                ranker = self.get_service_type_ranker(service_type)
+                batch_indexes = slice(-len(slr_profiles), None)
+                if only_new_profiles and not is_new_ranker:
+                    criteria_weights_batch = [slr_profile['criteria_weights'] for slr_profile in slr_profiles]
+                    rankings_indexes = ranker.append_criteria_weights_batch(criteria_weights_batch)
+                else:
+                    # a new ranker already evaluated every profile of the service type
+                    rankings_indexes = ranker.ranking_indexes[batch_indexes]
+                rankings_scores = ranker.get_alternatives_ranking_scores(batch_indexes=batch_indexes)
+
+        for slr_profile, ranking_index, ranking_scores in zip(slr_profiles, rankings_indexes, rankings_scores):
+            slr_profile['alternatives_ids'] = list(service_alternatives.keys())
+            slr_profile['ranking_index'] = ranking_index
+            slr_profile['ranking_scores'] = ranking_scores
+            # slr_ranked_alternatives = self.get_ranked_alternatives(service_alternatives, ranking_index)
+            # slr_profile['ranked_alternatives'] = slr_ranked_alternatives
+
     def update_slr_profile_rankings_of_service_type(self, service_type):
-        "inefficient, should only update the profiles that are missing or update all profiles of a type that changed (new worker)"
+        "re-ranks all the SLR profiles of the service type, only needed when the service type alternatives change"
         service_slr_profiles = self.slr_profiles_by_service.get(service_type, None)
         if service_slr_profiles is not None:
-            for slr_profile_id, slr_profile in service_slr_profiles.items():
-                service_alternatives = self.alternatives_by_service_type[service_type]
-                decision_matrix = list(service_alternatives.values())
-                criteria_weights = slr_profile['criteria_weights']
-                # import ipdb;ipdb.set_trace()
-                ranking_index = [0]
-                ranking_scores = [0] # check if this should be 0 or 1, just for consistency, if only one alt, then it should have the highest score
-                if len(decision_matrix) > 1:
-                    # for query, criteria_weights_profile in self.query_criteria_weights_profile.items():
-                    self.initialize_ranker()
-                    self.ranker.add_decision_maker(decision_matrix=decision_matrix, criteria_weights=criteria_weights)
-                    # import ipdb; ipdb.set_trace()
-                    ranking_index = self.ranker.evaluate()
-                    ranking_scores = self.ranker.get_alternatives_ranking_scores()
-                slr_profile['alternatives_ids'] = list(service_alternatives.keys())
-                slr_profile['ranking_index'] = ranking_index
-                slr_profile['ranking_scores'] = ranking_scores
-                # slr_ranked_alternatives = self.get_ranked_alternatives(service_alternatives, ranking_index)
-                # slr_profile['ranked_alternatives'] = slr_ranked_alternatives
+            with self.start_ranking_span('update_slr_profile_rankings_of_service_type', service_type, len(service_slr_profiles)):
+                self.rank_slr_profiles(service_type, list(service_slr_profiles.values()))
+                self.publish_service_slr_profiles_ranked(service_type)
+        elif self.removed_slr_profile_ids_by_service.get(service_type):
+            # its last profiles were removed while it was waiting for the re-rank, which skipped their publish
+            self.publish_service_slr_profiles_ranked(service_type)
+
+    def update_new_slr_profile_ranking(self, service_type, slr_profile):
+        "ranks only the new SLR profile, since the ranking of the other profiles of the service type didn't change"
+        self.rank_slr_profiles(service_type, [slr_profile], only_new_profiles=True)
+        # a service type waiting for its re-ranking will publish the new profile with the others
+        if self.alternatives_by_service_type.get(service_type) and service_type not in self.dirty_service_types:
             self.publish_service_slr_profiles_ranked(service_type)
 
+    def schedule_slr_profile_rankings_update(self, service_type):
+        """
+        Marks the service type as needing a re-rank of its SLR profiles, so that a burst of changes in its workers
+        is coalesced into a single ranking and publish, after the quiet period (or max delay) has passed.
+        Without a quiet period the service type is re-ranked right away.
+        """
+        if not self.rerank_quiet_period:
+            self.update_slr_profile_rankings_of_service_type(service_type)
+            return
+        now = time.monotonic()
+        first_marked_at, _ = self.dirty_service_types.get(service_type, (now, now))
+        self.dirty_service_types[service_type] = (first_marked_at, now)
+
+    def flush_dirty_service_types(self, force=False):
+        """
+        Re-ranks the service types that stopped changing for the quiet period, or that are waiting for longer than the max delay.
+        This runs outside the processing of any event, so a failed re-rank is only logged (and the service type is dropped
+        with its ranker, which is rebuilt by its next change) instead of stopping the service.
+        """
+        now = time.monotonic()
+        for service_type, (first_marked_at, last_marked_at) in list(self.dirty_service_types.items()):
+            is_quiet = now - last_marked_at >= self.rerank_quiet_period
+            is_late = self.rerank_max_delay is not None and now - first_marked_at >= self.rerank_max_delay
+            if force or is_quiet or is_late:
+                del self.dirty_service_types[service_type]
+                try:
+                    self.update_slr_profile_rankings_of_service_type(service_type)
+                except Exception as e:
+                    self.logger.error(f'Error re-ranking the SLR profiles of service type: {service_type}')
+                    self.logger.exception(e)
+                    self.invalidate_service_type_ranker(service_type)
+
     def get_alternative_from_rated_worker(self, rated_worker):
         return [rated_worker[k] for k in self.ranker_criteria.keys()]
 
@@ -120,12 +406,149 @@ class SLRWorkerRanking(BaseEventDrivenCMDService):
         # }
         stream_key = rated_worker['stream_key']
         service_type = rated_worker['service_type']
-        if stream_key in self.alternatives_by_service_type.get(service_type, {}).keys():
-            self.logger.warning('Duplicated rated worker stream key. Will ignored new one in favor of the previous.')
-            return
+        alternative = self.get_alternative_from_rated_worker(rated_worker)
         service_alternatives = self.alternatives_by_service_type.setdefault(service_type, {})
-        service_alternatives[stream_key] = self.get_alternative_from_rated_worker(rated_worker)
-        self.update_slr_profile_rankings_of_service_type(service_type)
+        ranker = self.ranker_by_service_type.get(service_type, None)
+        alternatives_lru = self.alternatives_lru_by_service_type.setdefault(service_type, OrderedDict())
+        alternatives_lru[stream_key] = None
+        alternatives_lru.move_to_end(stream_key)
+        if stream_key in service_alternatives.keys():
+            if np.array_equal(service_alternatives[stream_key], alternative):
+                self.logger.debug('Rated worker profile did not change. Will ignore it.')
+                return
+            # re-rated worker keeps its position in the alternatives
+            alt_index = list(service_alternatives.keys()).index(stream_key)
+            service_alternatives[stream_key] = alternative
+            if ranker is not None:
+                with self.time_ranking(service_type):
+                    ranker.replace_alternative(alt_index, alternative)
+        else:
+            service_alternatives[stream_key] = alternative
+            if ranker is not None:
+                # only the criteria whose normalisation changed with the new worker are ranked again
+                with self.time_ranking(service_type):
+                    ranker.add_alternative(alternative)
+            self.evict_least_recently_rated_alternatives(service_type)
+        self.schedule_slr_profile_rankings_update(service_type)
+
+    def process_worker_profile_removed(self, removed_worker):
+        # removed_worker = {
+        #     'service_type': SERVICE_DETAILS_SERVICE_TYPE,
+        #     'stream_key': SERVICE_DETAILS_STREAM_KEY,
+        # }
+        stream_key = removed_worker['stream_key']
+        service_type = removed_worker['service_type']
+        service_alternatives = self.alternatives_by_service_type.get(service_type, {})
+        if stream_key not in service_alternatives.keys():
+            self.logger.warning('Unknown removed worker stream key. Will ignore it.')
+            return
+        self.remove_service_type_alternative(service_type, stream_key)
+        self.schedule_slr_profile_rankings_update(service_type)
+
+    def remove_service_type_alternative(self, service_type, stream_key):
+        service_alternatives = self.alternatives_by_service_type[service_type]
+        alt_index = list(service_alternatives.keys()).index(stream_key)
+        del service_alternatives[stream_key]
+        self.alternatives_lru_by_service_type.get(service_type, {}).pop(stream_key, None)
+        if len(service_alternatives) > 1:
+            ranker = self.ranker_by_service_type.get(service_type, None)
+            if ranker is not None:
+                with self.time_ranking(service_type):
+                    ranker.remove_alternative(alt_index)
+        else:
+            # with one (or no) alternative there is nothing to rank
+            self.invalidate_service_type_ranker(service_type)
+
+    def remove_service_type_slr_profile(self, service_type, slr_profile_id):
+        "drops a profile (and its criteria weights from the service type ranker), so it is no longer ranked nor published"
+        service_slr_profiles = self.slr_profiles_by_service[service_type]
+        batch_index = list(service_slr_profiles.keys()).index(slr_profile_id)
+        del service_slr_profiles[slr_profile_id]
+        if service_slr_profiles:
+            ranker = self.ranker_by_service_type.get(service_type, None)
+            if ranker is not None:
+                ranker.remove_criteria_weights(batch_index)
+        else:
+            # the service type is left as if it never had profiles, so its workers don't trigger empty re-rankings
+            del self.slr_profiles_by_service[service_type]
+            self.invalidate_service_type_ranker(service_type)
+        self.published_slr_profile_rankings_by_service.get(service_type, {}).pop(slr_profile_id, None)
+        self.slr_profiles_lru.pop((service_type, slr_profile_id), None)
+        self.removed_slr_profile_ids_by_service.setdefault(service_type, []).append(slr_profile_id)
+
+    def process_query_removed(self, query_id):
+        """
+        The number of query ids of a SLR profile is its reference count:
+        the query is removed from its profiles, and the profiles left without queries are dropped.
+        """
+        slr_profile_ids = self.query_slr_profiles_map.pop(query_id, None)
+        evicted_slr_profile_ids = self.evicted_query_slr_profiles_map.pop(query_id, None)
+        if slr_profile_ids is None:
+            if evicted_slr_profile_ids is None:
+                self.logger.warning('Unknown removed query id. Will ignore it.')
+            return
+        changed_service_types = set()
+        for service_type, service_slr_profiles in list(self.slr_profiles_by_service.items()):
+            for slr_profile_id in slr_profile_ids.intersection(service_slr_profiles.keys()):
+                slr_profile = service_slr_profiles[slr_profile_id]
+                slr_profile['query_ids'].remove(query_id)
+                if not slr_profile['query_ids']:
+                    changed_service_types.add(service_type)
+                    self.remove_service_type_slr_profile(service_type, slr_profile_id)
+        self.publish_service_types_with_removed_slr_profiles(changed_service_types)
+
+    def publish_service_types_with_removed_slr_profiles(self, service_types):
+        "the rankings of the other profiles don't change, so unless a re-rank is already pending they are published right away"
+        for service_type in service_types:
+            if service_type not in self.dirty_service_types:
+                self.publish_service_slr_profiles_ranked(service_type)
+
+    def evict_least_recently_used_slr_profiles(self):
+        """
+        Drops the profiles that were least recently used by a query while there are more than the max SLR profiles,
+        removing them from their queries as well. If a query with the same criteria weights comes again
+        (or the same query is sent again, see `evicted_query_slr_profiles_map`) the profile is created and ranked again.
+        """
+        if not self.max_slr_profiles:
+            return
+        evicted_service_types = set()
+        num_evicted = 0
+        while len(self.slr_profiles_lru) > self.max_slr_profiles:
+            service_type, slr_profile_id = next(iter(self.slr_profiles_lru))
+            slr_profile = self.slr_profiles_by_service[service_type][slr_profile_id]
+            for query_id in slr_profile['query_ids']:
+                query_slr_profile_ids = self.query_slr_profiles_map.get(query_id, set())
+                query_slr_profile_ids.discard(slr_profile_id)
+                if not query_slr_profile_ids:
+                    self.query_slr_profiles_map.pop(query_id, None)
+                self.evicted_query_slr_profiles_map.setdefault(query_id, set()).add(slr_profile_id)
+            self.remove_service_type_slr_profile(service_type, slr_profile_id)
+            self.evicted_slr_profiles_by_service[service_type] = self.evicted_slr_profiles_by_service.get(service_type, 0) + 1
+            evicted_service_types.add(service_type)
+            num_evicted += 1
+        if num_evicted:
+            self.logger.debug(
+                f'Evicted {num_evicted} least recently used SLR profiles (max: {self.max_slr_profiles}) '
+                f'of service types: {sorted(evicted_service_types)}'
+            )
+            self.publish_service_types_with_removed_slr_profiles(evicted_service_types)
+
+    def evict_least_recently_rated_alternatives(self, service_type):
+        "removes the workers that were least recently rated while the service type has more than the max alternatives"
+        if not self.max_alternatives_per_service_type:
+            return
+        alternatives_lru = self.alternatives_lru_by_service_type.get(service_type, OrderedDict())
+        num_evicted = 0
+        while len(alternatives_lru) > self.max_alternatives_per_service_type:
+            stream_key = next(iter(alternatives_lru))
+            self.remove_service_type_alternative(service_type, stream_key)
+            num_evicted += 1
+        if num_evicted:
+            self.evicted_alternatives_by_service[service_type] = self.evicted_alternatives_by_service.get(service_type, 0) + num_evicted
+            self.logger.debug(
+                f'Evicted {num_evicted} least recently rated workers of service type {service_type} '
+                f'(max: {self.max_alternatives_per_service_type})'
+            )
 
     def process_query_services_qos_criteria_ranked(self, event_data):
         query_id = event_data['query_id']
@@ -137,27 +560,40 @@ class SLRWorkerRanking(BaseEventDrivenCMDService):
         #         'throughput': [1, 2, 3], # if fuzzy
         #     }
         # }
-        if query_id not in self.query_slr_profiles_map:
-            criteria_weights = [event_data['qos_rank'][k] for k in self.ranker_criteria]
-            required_services = event_data['required_services']
-            for service_type in required_services:
-                slr_profile_id = self.get_slr_profile_id_from_service_type_and_criteria_weights(service_type, criteria_weights)
-                service_slr_profiles = self.slr_profiles_by_service.setdefault(service_type, {})
-                is_new_profile = slr_profile_id not in service_slr_profiles.keys()
-
-                slr_profile = service_slr_profiles.setdefault(
-                    slr_profile_id,
-                    {'query_ids': [], 'criteria_weights': criteria_weights}
-                )
-                slr_profile['query_ids'].append(query_id)
-                self.query_slr_profiles_map.setdefault(query_id, set()).add(slr_profile_id)
-                if is_new_profile:
-                    self.update_slr_profile_rankings_of_service_type(service_type)
-        else:
-            self.logger.warning('Duplicated query id. Will ignored new one in favor of the previous.')
-            return
+        criteria_weights = [event_data['qos_rank'][k] for k in self.ranker_criteria]
+        required_services = event_data['required_services']
+        if query_id in self.query_slr_profiles_map or query_id in self.evicted_query_slr_profiles_map:
+            # a known query only gets back its profiles that were evicted meanwhile, anything else is a duplicate
+            evicted_slr_profile_ids = self.evicted_query_slr_profiles_map.get(query_id, set())
+            required_services = [
+                service_type for service_type in required_services
+                if self.get_slr_profile_id_from_service_type_and_criteria_weights(service_type, criteria_weights) in evicted_slr_profile_ids
+            ]
+            if not required_services:
+                self.logger.warning('Duplicated query id. Will ignored new one in favor of the previous.')
+                return
+        for service_type in required_services:
+            slr_profile_id = self.get_slr_profile_id_from_service_type_and_criteria_weights(service_type, criteria_weights)
+            service_slr_profiles = self.slr_profiles_by_service.setdefault(service_type, {})
+            is_new_profile = slr_profile_id not in service_slr_profiles.keys()
+
+            slr_profile = service_slr_profiles.setdefault(
+                slr_profile_id,
+                {'query_ids': [], 'criteria_weights': criteria_weights}
+            )
+            slr_profile['query_ids'].append(query_id)
+            self.query_slr_profiles_map.setdefault(query_id, set()).add(slr_profile_id)
+            evicted_slr_profile_ids = self.evicted_query_slr_profiles_map.get(query_id)
+            if evicted_slr_profile_ids is not None:
+                evicted_slr_profile_ids.discard(slr_profile_id)
+                if not evicted_slr_profile_ids:
+                    del self.evicted_query_slr_profiles_map[query_id]
+            self.slr_profiles_lru[(service_type, slr_profile_id)] = None
+            self.slr_profiles_lru.move_to_end((service_type, slr_profile_id))
+            if is_new_profile:
+                self.update_new_slr_profile_ranking(service_type, slr_profile)
+        self.evict_least_recently_used_slr_profiles()
 
-    @timer_logger
     def process_event_type(self, event_type, event_data, json_msg):
         if not super(SLRWorkerRanking, self).process_event_type(event_type, event_data, json_msg):
             return False
@@ -169,6 +605,263 @@ class SLRWorkerRanking(BaseEventDrivenCMDService):
             rated_worker = event_data['worker']
             self.process_worker_profile_rated(rated_worker)
 
+        if event_type == LISTEN_EVENT_TYPE_WORKER_PROFILE_REMOVED:
+            removed_worker = event_data['worker']
+            self.process_worker_profile_removed(removed_worker)
+
+        if event_type == LISTEN_EVENT_TYPE_QUERY_REMOVED:
+            self.process_query_removed(event_data['query_id'])
+
+        if event_type == LISTEN_EVENT_TYPE_SERVICE_SLR_PROFILES_SNAPSHOT_REQUESTED:
+            self.publish_service_slr_profiles_ranked(event_data['service_type'], full_snapshot=True)
+
+        if event_type == LISTEN_EVENT_TYPE_SERVICE_PROFILING_REQUESTED:
+            self.start_profiling(
+                event_data.get('events', self.DEFAULT_PROFILING_EVENTS), trace_memory=event_data.get('trace_memory', True))
+
+    def start_profiling(self, num_events, trace_memory=True):
+        "profiles the processing of the next `num_events` events (see `process_cmd`)"
+        if self.profiler is not None:
+            self.logger.warning('Ignoring profiling request, the service is already being profiled.')
+            return False
+        self.profiler = EventsProfiler(self.profiling_dir, num_events, trace_memory=trace_memory)
+        self.logger.info(f'Profiling the next {num_events} events.')
+        return True
+
+    def stop_profiling(self):
+        """
+        Writes the profiling results to the profiling dir, and returns their paths.
+        Profiling is only a diagnostic, so a failure to write the results (e.g., a bad profiling dir) is only logged.
+        """
+        profiler = self.profiler
+        self.profiler = None
+        try:
+            paths = profiler.write_results(name=self.name)
+        except Exception as e:
+            self.logger.error(f'Error writing the profiling results to: {self.profiling_dir}')
+            self.logger.exception(e)
+            return []
+        finally:
+            profiler.stop()
+        self.logger.info(f'Wrote the profiling results of {profiler.calls} events to: {", ".join(paths)}')
+        return paths
+
+
+    def get_snapshot_state_and_arrays(self):
+        "the alternatives matrices go into the snapshot arrays, and everything else into its (JSON) state"
+        state = {
+            'stream_offsets': self.stream_offsets,
+            'alternatives_ids': {},
+            'slr_profiles': self.slr_profiles_by_service,
+            'query_slr_profiles': {query_id: sorted(slr_profile_ids) for query_id, slr_profile_ids in self.query_slr_profiles_map.items()},
+            'evicted_query_slr_profiles': {
+                query_id: sorted(slr_profile_ids) for query_id, slr_profile_ids in self.evicted_query_slr_profiles_map.items()
+            },
+            'slr_profiles_versions': self.slr_profiles_version_by_service,
+            'published_slr_profile_rankings': self.published_slr_profile_rankings_by_service,
+            'dirty_service_types': list(self.dirty_service_types.keys()),
+            'slr_profiles_lru': list(self.slr_profiles_lru.keys()),
+            'alternatives_lru': {service_type: list(lru.keys()) for service_type, lru in self.alternatives_lru_by_service_type.items()},
+            # ids of the removed profiles not published yet, so that the delta consumers still get them after a restore
+            'removed_slr_profile_ids': self.removed_slr_profile_ids_by_service,
+            'suppressed_publishes': self.suppressed_publishes_by_service,
+            'evicted_slr_profiles': self.evicted_slr_profiles_by_service,
+            'evicted_alternatives': self.evicted_alternatives_by_service,
+        }
+        arrays = {}
+        for service_type, service_alternatives in self.alternatives_by_service_type.items():
+            state['alternatives_ids'][service_type] = list(service_alternatives.keys())
+            if service_alternatives:
+                arrays[service_type] = np.asarray(list(service_alternatives.values()), dtype=float)
+        return state, arrays
+
+    def save_snapshot(self):
+        state, arrays = self.get_snapshot_state_and_arrays()
+        write_snapshot(self.snapshot_path, state, arrays)
+        self.last_snapshot_at = time.monotonic()
+        self.logger.info(f'Saved service state snapshot to: {self.snapshot_path}')
+
+    def log_latency_summary(self):
+        "logs the latency percentiles of each event type and the evictions since the last summary, and starts a new one"
+        elapsed = time.monotonic() - self.last_latency_summary_at
+        for event_type, summary in self.event_latency_histograms.summary().items():
+            self.logger.info(
+                f'Latency of "{event_type}" in the last {elapsed:.0f} secs: {summary["count"]} events, '
+                f'p50={summary["p50"] * 1e3:.3f}ms p95={summary["p95"] * 1e3:.3f}ms '
+                f'p99={summary["p99"] * 1e3:.3f}ms max={summary["max"] * 1e3:.3f}ms'
+            )
+        eviction_totals = self.get_eviction_totals()
+        evicted_slr_profiles, evicted_alternatives = (
+            total - summarized for total, summarized in zip(eviction_totals, self.summarized_evictions))
+        if evicted_slr_profiles or evicted_alternatives:
+            self.logger.info(
+                f'Evicted in the last {elapsed:.0f} secs: {evicted_slr_profiles} SLR profiles '
+                f'(max: {self.max_slr_profiles}), {evicted_alternatives} workers (max per service type: '
+                f'{self.max_alternatives_per_service_type})'
+            )
+        self.summarized_evictions = eviction_totals
+        self.event_latency_histograms.reset()
+        self.last_latency_summary_at = time.monotonic()
+
+    def get_eviction_totals(self):
+        "total number of evicted SLR profiles and alternatives (of all service types)"
+        return sum(self.evicted_slr_profiles_by_service.values()), sum(self.evicted_alternatives_by_service.values())
+
+    def log_latency_summary_if_due(self):
+        if self.latency_summary_interval and time.monotonic() - self.last_latency_summary_at >= self.latency_summary_interval:
+            self.log_latency_summary()
+
+    def save_snapshot_if_due(self):
+        "a failed snapshot (e.g., disk full) is only logged, and tried again after the next interval"
+        if self.snapshot_path and time.monotonic() - self.last_snapshot_at >= self.snapshot_interval:
+            try:
+                self.save_snapshot()
+            except Exception as e:
+                self.logger.error(f'Error saving the service state snapshot to: {self.snapshot_path}')
+                self.logger.exception(e)
+                self.last_snapshot_at = time.monotonic()
+
+    def restore_snapshot(self):
+        """
+        Restores the service state from the snapshot file (if any).
+        The alternatives are rows of the memory-mapped matrices of the snapshot, and the service type rankers
+        are only created again on their next change. Service types that were waiting for a re-rank are re-ranked on the next flush.
+        """
+        if not self.snapshot_path or not os.path.exists(self.snapshot_path):
+            return False
+        state, arrays = read_snapshot(self.snapshot_path)
+        self.stream_offsets = state['stream_offsets']
+        self.alternatives_by_service_type = {
+            service_type: dict(zip(alternatives_ids, arrays[service_type] if alternatives_ids else []))
+            for service_type, alternatives_ids in state['alternatives_ids'].items()
+        }
+        self.slr_profiles_by_service = state['slr_profiles']
+        self.query_slr_profiles_map = {query_id: set(slr_profile_ids) for query_id, slr_profile_ids in state['query_slr_profiles'].items()}
+        self.slr_profiles_version_by_service = state['slr_profiles_versions']
+        self.published_slr_profile_rankings_by_service = {
+            service_type: {slr_profile_id: tuple(tuple(values) for values in ranking) for slr_profile_id, ranking in published_rankings.items()}
+            for service_type, published_rankings in state['published_slr_profile_rankings'].items()
+        }
+        self.slr_profiles_lru = OrderedDict((tuple(key), None) for key in state['slr_profiles_lru'])
+        self.alternatives_lru_by_service_type = {
+            service_type: OrderedDict.fromkeys(stream_keys) for service_type, stream_keys in state['alternatives_lru'].items()
+        }
+        # snapshots from before these were saved don't have them
+        self.removed_slr_profile_ids_by_service = state.get('removed_slr_profile_ids', {})
+        self.evicted_query_slr_profiles_map = {
+            query_id: set(slr_profile_ids) for query_id, slr_profile_ids in state.get('evicted_query_slr_profiles', {}).items()
+        }
+        self.suppressed_publishes_by_service = state.get('suppressed_publishes', {})
+        self.evicted_slr_profiles_by_service = state.get('evicted_slr_profiles', {})
+        self.evicted_alternatives_by_service = state.get('evicted_alternatives', {})
+        self.summarized_evictions = self.get_eviction_totals()
+        self.ranker_by_service_type = {}
+        now = time.monotonic()
+        self.dirty_service_types = {service_type: (now, now) for service_type in state['dirty_service_types']}
+        self.logger.info(f'Restored service state snapshot from: {self.snapshot_path}')
+        return True
+
+    def resume_from_stream_offsets(self):
+        "moves the consumer groups back to the last events processed before the snapshot, so the following ones are read again"
+        for cg_sub_group, cmd_stream in self.service_cmd_cg_stream_map.items():
+            consumer_group = getattr(cmd_stream, 'input_consumer_group', None)
+            if consumer_group is None:
+                continue
+            for event_type in self.service_cmd_cg_keys_map[cg_sub_group]:
+                offset = self.stream_offsets.get(event_type)
+                if offset is not None:
+                    getattr(consumer_group, walrus_normalized_cg_stream_key(event_type)).set_id(offset)
+
+    def process_cmd(self, cg_sub_group=None):
+        """
+        Same as the base `process_cmd`, but also keeps the id of the last processed event of each stream
+        (saved in the snapshots), and flushes the pending re-rankings and snapshot afterwards.
+        The latency of each event is aggregated in the event type histogram, and the whole state is
+        only logged after each event in DEBUG level (where each `_log_dict` is formatted).
+        While profiling, the processing of each event and the re-rankings are profiled (the profiling requests themselves are not).
+        """
+        log_state = self.logger.isEnabledFor(logging.DEBUG)
+        profiler = self.profiler
+        if cg_sub_group is None:
+            cg_sub_group = 'default'
+
+        cmd_stream = self.service_cmd_cg_stream_map[cg_sub_group]
+        event_types = self.service_cmd_cg_keys_map[cg_sub_group]
+
+        self.logger.debug(f'Processing CMD-[{cg_sub_group}] from event types: {event_types}')
+
+        stream_event_list = cmd_stream.read_stream_events_list(count=1)
+        for stream_key, event_tuple in stream_event_list:
+            event_type = stream_key.decode('utf-8')
+            event_id, json_msg = event_tuple[0]
+            start = time.perf_counter()
+            try:
+                event_data = self.default_event_deserializer(json_msg)
+                if profiler is None:
+                    self.process_event_type_wrapper(cg_sub_group, event_type, event_data, json_msg)
+                else:
+                    profiler.runcall(self.process_event_type_wrapper, cg_sub_group, event_type, event_data, json_msg)
+                if log_state:
+                    self.log_state()
+            except Exception as e:
+                self.logger.error(f'Error processing {json_msg}:')
+                self.logger.exception(e)
+            latency = time.perf_counter() - start
+            self.event_latency_histograms.observe(event_type, latency)
+            if self.metrics is not None:
+                self.metrics.event_processing_seconds.labels(event_type=event_type).observe(latency)
+            self.stream_offsets[event_type] = event_id.decode('utf-8') if isinstance(event_id, bytes) else event_id
+        if profiler is None:
+            self.flush_dirty_service_types()
+        else:
+            profiler.profile.runcall(self.flush_dirty_service_types)
+            if profiler.is_done():
+                self.stop_profiling()
+        self.save_snapshot_if_due()
+        self.log_latency_summary_if_due()
+
+    def serialize_and_write_event_with_trace(self, event_data, serializer, destination_stream):
+        "same as the base method, but also observes the size of the published event payload in the metrics"
+        event_data = self.inject_current_tracer_into_event_data(event_data)
+        event_msg = serializer(event_data)
+        if self.metrics is not None:
+            payload_bytes = sum(len(value) for value in event_msg.values())
+            self.metrics.publish_payload_bytes.labels(event_type=destination_stream.key).observe(payload_bytes)
+        return destination_stream.write_events(event_msg)
+
+    def get_stream_backlogs(self):
+        """
+        Number of events in each listened stream that were not read yet by the service consumer group
+        (only for the redis streams, the others are ignored).
+        """
+        backlogs = {}
+        for cg_sub_group, cmd_stream in self.service_cmd_cg_stream_map.items():
+            consumer_group = getattr(cmd_stream, 'input_consumer_group', None)
+            if consumer_group is None:
+                continue
+            for event_type in self.service_cmd_cg_keys_map[cg_sub_group]:
+                try:
+                    backlogs[event_type] = self.get_consumer_group_stream_backlog(consumer_group, event_type)
+                except Exception as e:
+                    self.logger.warning(f'Could not get the backlog of the "{event_type}" stream: {e}')
+        return backlogs
+
+    def get_consumer_group_stream_backlog(self, consumer_group, stream_key):
+        database = consumer_group.database
+        group_name = consumer_group.name.encode('utf-8')
+        for group_info in database.xinfo_groups(stream_key):
+            name = group_info['name']
+            if (name if isinstance(name, bytes) else name.encode('utf-8')) != group_name:
+                continue
+            if group_info.get('lag') is not None:
+                return group_info['lag']
+            last_delivered_id = group_info['last-delivered-id']
+            events = database.xrange(stream_key, min=last_delivered_id, max='+', count=self.STREAM_BACKLOG_COUNT_LIMIT + 1)
+            # the range includes the last delivered event itself (if it's still in the stream)
+            if events and events[0][0] == last_delivered_id:
+                events = events[1:]
+            return len(events)
+        return 0
 
     def log_state(self):
         super(SLRWorkerRanking, self).log_state()
@@ -178,8 +871,21 @@ class SLRWorkerRanking(BaseEventDrivenCMDService):
         self._log_dict('Alternatives by Service Type', self.alternatives_by_service_type)
         self._log_dict('Query SLR Profile ID', self.query_slr_profiles_map)
         self._log_dict('SLR Profiles (by Service Type)', self.slr_profiles_by_service)
+        self._log_dict('Service Types waiting for re-ranking', self.dirty_service_types)
+        self._log_dict('Suppressed SLR Profiles publishes (by Service Type)', self.suppressed_publishes_by_service)
+        self._log_dict('Evicted SLR Profiles (by Service Type)', self.evicted_slr_profiles_by_service)
+        self._log_dict('Evicted Alternatives (by Service Type)', self.evicted_alternatives_by_service)
+        if self.ranker_stage_timers is not None:
+            self._log_dict('Ranker Stage Timings', self.get_ranker_stage_timings())
 
     def run(self):
+        if self.restore_snapshot():
+            self.resume_from_stream_offsets()
+        if self.profiling_events:
+            self.start_profiling(self.profiling_events)
+        if self.metrics is not None:
+            self.metrics.start_http_server(self.metrics_port)
+            self.logger.info(f'Serving the Prometheus metrics on port: {self.metrics_port}')
         super(SLRWorkerRanking, self).run()
         self.log_state()
         self.run_forever(self.process_cmd)
\ No newline at end of file
@@ -0,0 +1,70 @@
+import json
+import os
+import struct
+
+import numpy as np
+
+
+SNAPSHOT_MAGIC = b'SLRSNAP1'
+HEADER_LENGTH_FORMAT = '<Q'
+ARRAYS_ALIGNMENT = 64
+
+
+def _aligned(offset):
+    return -(-offset // ARRAYS_ALIGNMENT) * ARRAYS_ALIGNMENT
+
+
+def write_snapshot(path, state, arrays):
+    """
+    Writes the snapshot in a compact binary file: a JSON header with the `state` (and the arrays layout),
+    followed by the raw float64 data of the `arrays`, aligned so that they can be memory-mapped when read.
+    The file is written next to `path` and then renamed, so an interrupted write never replaces the last snapshot.
+    """
+    arrays_layout = {}
+    arrays_data = []
+    data_size = 0
+    for name, array in arrays.items():
+        array = np.ascontiguousarray(array, dtype='<f8')
+        data_size = _aligned(data_size)
+        arrays_layout[name] = {'offset': data_size, 'shape': list(array.shape)}
+        arrays_data.append((data_size, array))
+        data_size += array.nbytes
+
+    header = json.dumps({'state': state, 'arrays': arrays_layout}, separators=(',', ':')).encode('utf-8')
+    data_start = _aligned(len(SNAPSHOT_MAGIC) + struct.calcsize(HEADER_LENGTH_FORMAT) + len(header))
+
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'wb') as snapshot_file:
+        snapshot_file.write(SNAPSHOT_MAGIC)
+        snapshot_file.write(struct.pack(HEADER_LENGTH_FORMAT, len(header)))
+        snapshot_file.write(header)
+        for offset, array in arrays_data:
+            snapshot_file.seek(data_start + offset)
+            snapshot_file.write(array.tobytes())
+        snapshot_file.truncate(data_start + data_size)
+    os.replace(tmp_path, path)
+
+
+def read_snapshot(path, mmap=True):
+    """
+    Returns the `state` and the `arrays` of the snapshot file.
+    With `mmap` the arrays are copy-on-write memory maps of the file, so only the pages that are used are read.
+    """
+    with open(path, 'rb') as snapshot_file:
+        magic = snapshot_file.read(len(SNAPSHOT_MAGIC))
+        if magic != SNAPSHOT_MAGIC:
+            raise ValueError(f'Invalid snapshot file: {path}')
+        header_length, = struct.unpack(HEADER_LENGTH_FORMAT, snapshot_file.read(struct.calcsize(HEADER_LENGTH_FORMAT)))
+        header = json.loads(snapshot_file.read(header_length).decode('utf-8'))
+        data_start = _aligned(snapshot_file.tell())
+
+        arrays = {}
+        for name, layout in header['arrays'].items():
+            shape = tuple(layout['shape'])
+            offset = data_start + layout['offset']
+            if mmap and int(np.prod(shape)) > 0:
+                arrays[name] = np.memmap(snapshot_file, dtype='<f8', mode='c', offset=offset, shape=shape)
+            else:
+                snapshot_file.seek(offset)
+                arrays[name] = np.fromfile(snapshot_file, dtype='<f8', count=int(np.prod(shape))).reshape(shape)
+    return header['state'], arrays
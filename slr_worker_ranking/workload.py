@@ -0,0 +1,195 @@
+#!/usr/bin/env python
+"""
+Synthetic workload of `WORKER_PROFILE_RATED` and `QUERY_SERVICES_QOS_CRITERIA_RANKED` events,
+using the fuzzy linguistic scales of the tests (Nădăban et al., 2016). The events are written as a JSONL
+event log that can be replayed with `slr_worker_ranking.replay`, or sent directly to the Redis streams.
+
+    $ python -m slr_worker_ranking.workload events.jsonl --service-types 5 --workers 50 --profiles 20 --queries 200
+"""
+import argparse
+import json
+import random
+import time
+import uuid
+
+from slr_worker_ranking.conf import (
+    LISTEN_EVENT_TYPE_WORKER_PROFILE_RATED,
+    LISTEN_EVENT_TYPE_QUERY_SERVICES_QOS_CRITERIA_RANKED,
+    RANKER_CRITERIA,
+)
+
+
+RATING_LINGUISTIC_TERMS = {
+    'very_good_rating': (9, 10, 10),
+    'good_rating': (7, 9, 10),
+    'medium_rating': (3, 5, 7),
+    'poor_rating': (1, 3, 5),
+    'very_poor_rating': (1, 1, 3),
+}
+
+WEIGHT_LINGUISTIC_TERMS = {
+    'high_weight': (0.7, 0.9, 1.0),
+    'medium_high_weight': (0.5, 0.7, 0.9),
+    'medium_weight': (0.3, 0.5, 0.7),
+    'medium_low_weight': (0.1, 0.3, 0.5),
+    'low_weight': (0.0, 0.1, 0.3),
+}
+
+ARRIVAL_PATTERNS = ('steady', 'burst')
+
+
+def get_criteria_names(num_criteria=None):
+    "the criteria of the service configuration, or generic names if a different number of criteria is needed"
+    criteria = list(RANKER_CRITERIA.keys())
+    if num_criteria is None or num_criteria == len(criteria):
+        return criteria
+    return [f'criterion_{i}' for i in range(num_criteria)]
+
+
+def rated_worker_event(rng, service_type, stream_key, criteria):
+    rated_worker = {
+        'service_type': service_type,
+        'stream_key': stream_key,
+        'queue_limit': 100,
+        'content_types': ['node_attribute:bounding_box', 'node_attribute:label'],
+    }
+    for criterion in criteria:
+        rated_worker[criterion] = rng.choice(list(RATING_LINGUISTIC_TERMS.values()))
+    return {'event_type': LISTEN_EVENT_TYPE_WORKER_PROFILE_RATED, 'event_data': {'worker': rated_worker}}
+
+
+def weight_profiles(rng, num_weight_profiles, criteria):
+    "distinct QoS weights, limited by the number of linguistic weights combinations"
+    num_weight_profiles = min(num_weight_profiles, len(WEIGHT_LINGUISTIC_TERMS) ** len(criteria))
+    profiles = []
+    seen = set()
+    while len(profiles) < num_weight_profiles:
+        profile = tuple(rng.choice(list(WEIGHT_LINGUISTIC_TERMS.values())) for _ in criteria)
+        if profile not in seen:
+            seen.add(profile)
+            profiles.append(dict(zip(criteria, profile)))
+    return profiles
+
+
+def query_event(rng, query_id, service_types, profiles, max_required_services):
+    required_services = rng.sample(service_types, rng.randint(1, min(max_required_services, len(service_types))))
+    return {
+        'event_type': LISTEN_EVENT_TYPE_QUERY_SERVICES_QOS_CRITERIA_RANKED,
+        'event_data': {
+            'query_id': query_id,
+            'required_services': required_services,
+            'qos_rank': rng.choice(profiles),
+        }
+    }
+
+
+def set_arrival_times(events, arrival_pattern, rate, burst_size):
+    """
+    Steady arrivals are evenly spaced at `rate` events/sec.
+    Bursts arrive all at once, spaced so that the average rate is the same.
+    """
+    for i, event in enumerate(events):
+        if arrival_pattern == 'burst':
+            event['time'] = (i // burst_size) * burst_size / rate
+        else:
+            event['time'] = i / rate
+    return events
+
+
+def generate_workload(num_service_types=2, workers_per_service_type=10, num_weight_profiles=5, num_queries=20,
+                      num_criteria=None, num_rerates=0, arrival_pattern='steady', burst_size=50, rate=100.0,
+                      max_required_services=3, seed=None):
+    """
+    Returns the list of events, each with its `event_type`, `event_data` and arrival `time` (in seconds).
+    Steady arrivals mix the worker ratings, queries and re-ratings in a random order.
+    Bursts keep the ratings of the workers of each service type together, and then the queries and re-ratings.
+    """
+    assert arrival_pattern in ARRIVAL_PATTERNS, f'Invalid arrival pattern: {arrival_pattern}'
+    rng = random.Random(seed)
+    criteria = get_criteria_names(num_criteria)
+    service_types = [f'Service{i}' for i in range(num_service_types)]
+    workers = [(service_type, f'{service_type}-worker-{i}') for service_type in service_types for i in range(workers_per_service_type)]
+    profiles = weight_profiles(rng, num_weight_profiles, criteria)
+
+    rated_worker_events = [rated_worker_event(rng, service_type, stream_key, criteria) for service_type, stream_key in workers]
+    query_events = [
+        query_event(rng, f'query-{i}', service_types, profiles, max_required_services) for i in range(num_queries)
+    ]
+    rerate_events = [rated_worker_event(rng, *rng.choice(workers), criteria) for _ in range(num_rerates)] if workers else []
+
+    events = rated_worker_events + query_events + rerate_events
+    if arrival_pattern == 'steady':
+        rng.shuffle(events)
+    return set_arrival_times(events, arrival_pattern, rate, burst_size)
+
+
+def write_events_jsonl(events, path):
+    with open(path, 'w') as events_file:
+        for event in events:
+            events_file.write(json.dumps(event) + '\n')
+
+
+def send_events_to_redis(events, host, port, paced=True):
+    """
+    Writes the events to the service command streams, the same way as `send_msgs_test.py`.
+    When paced, each event is only written at its arrival `time` (since the first event was written),
+    so the service gets the arrival pattern of the workload. Otherwise, the events are written as fast as possible.
+    """
+    from event_service_utils.streams.redis import RedisStreamFactory
+
+    stream_factory = RedisStreamFactory(host=host, port=port)
+    streams = {}
+    started_at = time.monotonic()
+    for event in events:
+        if paced:
+            delay = event.get('time', 0) - (time.monotonic() - started_at)
+            if delay > 0:
+                time.sleep(delay)
+        event_type = event['event_type']
+        if event_type not in streams:
+            streams[event_type] = stream_factory.create(event_type, stype='streamOnly')
+        event_data = dict(event['event_data'], id=str(uuid.uuid4()))
+        streams[event_type].write_events({'event': json.dumps(event_data)})
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Generates a synthetic workload of worker ratings and queries.')
+    parser.add_argument('events_path', nargs='?', help='JSONL file to write the events to')
+    parser.add_argument('--service-types', type=int, default=2)
+    parser.add_argument('--workers', type=int, default=10, help='workers per service type')
+    parser.add_argument('--profiles', type=int, default=5, help='distinct QoS weight profiles')
+    parser.add_argument('--queries', type=int, default=20)
+    parser.add_argument('--criteria', type=int, default=None, help='number of criteria (defaults to the RANKER_CRITERIA)')
+    parser.add_argument('--rerates', type=int, default=0, help='worker re-ratings after the workers are rated')
+    parser.add_argument('--arrival-pattern', choices=ARRIVAL_PATTERNS, default='steady')
+    parser.add_argument('--burst-size', type=int, default=50)
+    parser.add_argument('--rate', type=float, default=100.0, help='average events/sec of the arrival times')
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--redis', action='store_true', help='sends the events to the redis streams (REDIS_ADDRESS and REDIS_PORT)')
+    parser.add_argument(
+        '--no-pacing', dest='paced', action='store_false',
+        help='sends the events to redis as fast as possible, instead of at their arrival times')
+    args = parser.parse_args(argv)
+
+    events = generate_workload(
+        num_service_types=args.service_types,
+        workers_per_service_type=args.workers,
+        num_weight_profiles=args.profiles,
+        num_queries=args.queries,
+        num_criteria=args.criteria,
+        num_rerates=args.rerates,
+        arrival_pattern=args.arrival_pattern,
+        burst_size=args.burst_size,
+        rate=args.rate,
+        seed=args.seed,
+    )
+    if args.events_path:
+        write_events_jsonl(events, args.events_path)
+    if args.redis:
+        from slr_worker_ranking.conf import REDIS_ADDRESS, REDIS_PORT
+        send_events_to_redis(events, REDIS_ADDRESS, REDIS_PORT, paced=args.paced)
+    return events
+
+
+if __name__ == '__main__':
+    main()
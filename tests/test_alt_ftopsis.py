@@ -1,6 +1,8 @@
 from unittest import TestCase
 from unittest.mock import Mock, patch
 
+import numpy as np
+
 from slr_worker_ranking.mcdm.ftopsis import AltFuzzyTOPSIS
 
 
@@ -69,8 +71,8 @@ class TestAltuzzyTOPSIS(TestCase):
         exp_FPIS_indexes = [0, 1, 1]
         exp_FNIS_indexes = [1, 0, 0]
 
-        self.assertListEqual(self.ranker.FPIS_indexes, exp_FPIS_indexes)
-        self.assertListEqual(self.ranker.FNIS_indexes, exp_FNIS_indexes)
+        np.testing.assert_array_equal(self.ranker.FPIS_indexes, exp_FPIS_indexes)
+        np.testing.assert_array_equal(self.ranker.FNIS_indexes, exp_FNIS_indexes)
 
     def test_fuzzy_number_distance_calculation(self):
         dist = self.ranker._fuzzy_number_distance_calculation((1.0,2.0,3.0), (6.0, 5.0, 4.0))
@@ -132,6 +134,99 @@ class TestAltuzzyTOPSIS(TestCase):
         self.assertAlmostEqual(self.ranker.fnis_distances[1], exp_fnis_distances[1], places=3)
 
 
+    def test_evaluate_criteria_weights_batch_same_as_single_evaluations(self):
+        decision_matrix = self.dm_2['decision_matrix']
+        criteria_weights_batch = [self.dm_1['criteria_weights'], self.dm_2['criteria_weights']]
+        ranker = AltFuzzyTOPSIS(criteria_benefit_indicator=self.criteria_benefit_indicator)
+        ranker.set_decision_matrix(decision_matrix)
+        rankings = ranker.evaluate_criteria_weights_batch(criteria_weights_batch)
+        scores = ranker.get_alternatives_ranking_scores()
+
+        for i, criteria_weights in enumerate(criteria_weights_batch):
+            single_ranker = AltFuzzyTOPSIS(criteria_benefit_indicator=self.criteria_benefit_indicator)
+            single_ranker.add_decision_maker(decision_matrix=decision_matrix, criteria_weights=criteria_weights)
+            self.assertListEqual(rankings[i], single_ranker.evaluate())
+            np.testing.assert_almost_equal(scores[i], single_ranker.get_alternatives_ranking_scores())
+
+    def test_add_alternative_same_as_full_evaluation(self):
+        decision_matrix = self.dm_2['decision_matrix']
+        criteria_weights_batch = [self.dm_1['criteria_weights'], self.dm_2['criteria_weights']]
+        ranker = AltFuzzyTOPSIS(criteria_benefit_indicator=self.criteria_benefit_indicator)
+        ranker.set_decision_matrix(decision_matrix)
+        ranker.evaluate_criteria_weights_batch(criteria_weights_batch)
+        new_alternatives = [
+            [self.rat_lf['medium_rating'], self.rat_lf['medium_rating'], self.rat_lf['medium_rating']],
+            [self.rat_lf['very_good_rating'], self.rat_lf['very_poor_rating'], self.rat_lf['very_good_rating']],
+        ]
+        for new_alternative in new_alternatives:
+            decision_matrix = decision_matrix + [new_alternative]
+            rankings = ranker.add_alternative(new_alternative)
+
+            full_ranker = AltFuzzyTOPSIS(criteria_benefit_indicator=self.criteria_benefit_indicator)
+            full_ranker.set_decision_matrix(decision_matrix)
+            self.assertListEqual(rankings, full_ranker.evaluate_criteria_weights_batch(criteria_weights_batch))
+            np.testing.assert_almost_equal(ranker.norm_decision_matrix, full_ranker.norm_decision_matrix)
+            np.testing.assert_almost_equal(ranker.get_alternatives_ranking_scores(), full_ranker.get_alternatives_ranking_scores())
+        np.testing.assert_array_equal(ranker.FPIS_indexes, full_ranker.FPIS_indexes)
+        np.testing.assert_array_equal(ranker.FNIS_indexes, full_ranker.FNIS_indexes)
+
+    def test_replace_and_remove_alternative_same_as_full_evaluation(self):
+        decision_matrix = self.dm_1['decision_matrix'] + self.dm_2['decision_matrix']
+        criteria_weights_batch = [self.dm_1['criteria_weights'], self.dm_2['criteria_weights']]
+        ranker = AltFuzzyTOPSIS(criteria_benefit_indicator=self.criteria_benefit_indicator)
+        ranker.set_decision_matrix(decision_matrix)
+        ranker.evaluate_criteria_weights_batch(criteria_weights_batch)
+        replaced_alternative = [self.rat_lf['very_good_rating'], self.rat_lf['very_poor_rating'], self.rat_lf['good_rating']]
+        for change in [('replace', 1), ('remove', 0), ('replace', 0), ('remove', 2)]:
+            operation, alt_index = change
+            decision_matrix = list(decision_matrix)
+            if operation == 'replace':
+                decision_matrix[alt_index] = replaced_alternative
+                rankings = ranker.replace_alternative(alt_index, replaced_alternative)
+            else:
+                del decision_matrix[alt_index]
+                rankings = ranker.remove_alternative(alt_index)
+
+            full_ranker = AltFuzzyTOPSIS(criteria_benefit_indicator=self.criteria_benefit_indicator)
+            full_ranker.set_decision_matrix(decision_matrix)
+            self.assertListEqual(rankings, full_ranker.evaluate_criteria_weights_batch(criteria_weights_batch))
+            self.assertEqual(ranker.num_alternatives, len(decision_matrix))
+            np.testing.assert_almost_equal(ranker.norm_decision_matrix, full_ranker.norm_decision_matrix)
+            np.testing.assert_almost_equal(ranker.get_alternatives_ranking_scores(), full_ranker.get_alternatives_ranking_scores())
+            np.testing.assert_array_equal(ranker.FPIS_indexes, full_ranker.FPIS_indexes)
+            np.testing.assert_array_equal(ranker.FNIS_indexes, full_ranker.FNIS_indexes)
+
+    def test_append_criteria_weights_batch_ranks_only_new_criteria_weights(self):
+        decision_matrix = self.dm_2['decision_matrix']
+        ranker = AltFuzzyTOPSIS(criteria_benefit_indicator=self.criteria_benefit_indicator)
+        ranker.set_decision_matrix(decision_matrix)
+        ranker.evaluate_criteria_weights_batch([self.dm_1['criteria_weights']])
+        new_rankings = ranker.append_criteria_weights_batch([self.dm_2['criteria_weights']])
+
+        full_ranker = AltFuzzyTOPSIS(criteria_benefit_indicator=self.criteria_benefit_indicator)
+        full_ranker.set_decision_matrix(decision_matrix)
+        full_rankings = full_ranker.evaluate_criteria_weights_batch([self.dm_1['criteria_weights'], self.dm_2['criteria_weights']])
+        self.assertListEqual(new_rankings, full_rankings[1:])
+        self.assertListEqual(ranker.ranking_indexes, full_rankings)
+        np.testing.assert_almost_equal(ranker.get_alternatives_ranking_scores(), full_ranker.get_alternatives_ranking_scores())
+        np.testing.assert_almost_equal(
+            ranker.get_alternatives_ranking_scores(batch_indexes=[1]), full_ranker.get_alternatives_ranking_scores()[1:])
+
+
+    def test_remove_criteria_weights_keeps_other_rankings_consistent(self):
+        decision_matrix = self.dm_2['decision_matrix']
+        ranker = AltFuzzyTOPSIS(criteria_benefit_indicator=self.criteria_benefit_indicator)
+        ranker.set_decision_matrix(decision_matrix)
+        ranker.evaluate_criteria_weights_batch([self.dm_1['criteria_weights'], self.dm_2['criteria_weights']])
+        ranker.remove_criteria_weights(0)
+        new_alternative = [self.rat_lf['very_good_rating'], self.rat_lf['very_poor_rating'], self.rat_lf['very_good_rating']]
+        rankings = ranker.add_alternative(new_alternative)
+
+        full_ranker = AltFuzzyTOPSIS(criteria_benefit_indicator=self.criteria_benefit_indicator)
+        full_ranker.set_decision_matrix(decision_matrix + [new_alternative])
+        self.assertListEqual(rankings, full_ranker.evaluate_criteria_weights_batch([self.dm_2['criteria_weights']]))
+        np.testing.assert_almost_equal(ranker.get_alternatives_ranking_scores(), full_ranker.get_alternatives_ranking_scores())
+
     def test_logically_sound_example_cost_criteria(self):
 
         criteria_rank = {
@@ -0,0 +1,28 @@
+from unittest import TestCase
+
+from slr_worker_ranking.benchmark import compare_to_baseline, run_benchmarks
+
+
+class TestBenchmark(TestCase):
+
+    def test_compare_to_baseline(self):
+        baseline = {'results': {
+            'a': {'min': 1.0, 'median': 1.0},
+            'b': {'min': 2.0, 'median': 2.0},
+            'removed': {'min': 1.0, 'median': 1.0},
+        }}
+        results = {'results': {
+            'a': {'min': 1.5, 'median': 1.5},
+            'b': {'min': 1.0, 'median': 1.0},
+            'new': {'min': 1.0, 'median': 1.0},
+        }}
+        comparison, regressions = compare_to_baseline(results, baseline, threshold=10)
+        self.assertListEqual(comparison, [('a', 1.0, 1.5, 50.0), ('b', 2.0, 1.0, -50.0)])
+        self.assertListEqual(regressions, ['a'])
+
+    def test_run_filtered_quick_benchmarks(self):
+        results = run_benchmarks(quick=True, repeat=1, name_filter='crisp-topsis:dm=1')
+        self.assertListEqual(list(results['results'].keys()), ['ranker.evaluate:crisp-topsis:dm=1,alt=10,crit=3'])
+        result = results['results']['ranker.evaluate:crisp-topsis:dm=1,alt=10,crit=3']
+        self.assertGreater(result['min'], 0)
+        self.assertLessEqual(result['min'], result['median'])
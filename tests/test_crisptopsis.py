@@ -1,7 +1,11 @@
-from unittest import TestCase
+import importlib.util
+from unittest import TestCase, skipIf
 from unittest.mock import Mock, patch
 
-from slr_worker_ranking.mcdm.crisptopsis import CrispTOPSIS
+import numpy as np
+
+from slr_worker_ranking.histograms import LatencyHistograms
+from slr_worker_ranking.mcdm.crisptopsis import CrispTOPSIS, SKCriteriaCrispTOPSIS
 
 
 class TestCrispTOPSIS(TestCase):
@@ -50,6 +54,72 @@ class TestCrispTOPSIS(TestCase):
         self.assertAlmostEqual(scores[0], expected_ccs[0], places=3)
         self.assertAlmostEqual(scores[1], expected_ccs[1], places=3)
 
+    def test_evaluate_criteria_weights_batch_same_as_single_evaluations(self):
+        decision_matrix = self.dm_1['decision_matrix']
+        criteria_weights_batch = [
+            self.dm_1['criteria_weights'],
+            [self.crit_lf['low_weight'], self.crit_lf['high_weight'], self.crit_lf['medium_weight']],
+        ]
+        self.ranker.set_decision_matrix(decision_matrix)
+        rankings = self.ranker.evaluate_criteria_weights_batch(criteria_weights_batch)
+        scores = self.ranker.get_alternatives_ranking_scores()
+
+        self.assertListEqual(rankings[0], [1, 0])
+        self.assertAlmostEqual(scores[0][0], 0.3516287, places=3)
+        self.assertAlmostEqual(scores[0][1], 0.6483713, places=3)
+        for i, criteria_weights in enumerate(criteria_weights_batch):
+            single_ranker = CrispTOPSIS(criteria_benefit_indicator=self.criteria_benefit_indicator)
+            single_ranker.add_decision_maker(decision_matrix=decision_matrix, criteria_weights=criteria_weights)
+            self.assertListEqual(rankings[i], single_ranker.evaluate())
+            for score, single_score in zip(scores[i], single_ranker.get_alternatives_ranking_scores()):
+                self.assertAlmostEqual(score, single_score)
+
+    def test_add_alternative_and_append_criteria_weights_same_as_full_evaluation(self):
+        decision_matrix = self.dm_1['decision_matrix']
+        criteria_weights_batch = [
+            self.dm_1['criteria_weights'],
+            [self.crit_lf['low_weight'], self.crit_lf['high_weight'], self.crit_lf['medium_weight']],
+        ]
+        new_alternative = [self.rat_lf['good_rating'], self.rat_lf['very_poor_rating'], self.rat_lf['medium_rating']]
+        self.ranker.set_decision_matrix(decision_matrix)
+        self.ranker.evaluate_criteria_weights_batch(criteria_weights_batch[:1])
+        self.ranker.add_alternative(new_alternative)
+        new_rankings = self.ranker.append_criteria_weights_batch(criteria_weights_batch[1:])
+
+        full_ranker = CrispTOPSIS(criteria_benefit_indicator=self.criteria_benefit_indicator)
+        full_ranker.set_decision_matrix(decision_matrix + [new_alternative])
+        full_rankings = full_ranker.evaluate_criteria_weights_batch(criteria_weights_batch)
+        self.assertListEqual(new_rankings, full_rankings[1:])
+        self.assertListEqual(self.ranker.ranking_indexes, full_rankings)
+        for scores, full_scores in zip(self.ranker.get_alternatives_ranking_scores(), full_ranker.get_alternatives_ranking_scores()):
+            for score, full_score in zip(scores, full_scores):
+                self.assertAlmostEqual(score, full_score)
+
+
+    def test_remove_criteria_weights_keeps_other_rankings(self):
+        criteria_weights_batch = [
+            self.dm_1['criteria_weights'],
+            [self.crit_lf['low_weight'], self.crit_lf['high_weight'], self.crit_lf['medium_weight']],
+        ]
+        self.ranker.set_decision_matrix(self.dm_1['decision_matrix'])
+        full_rankings = self.ranker.evaluate_criteria_weights_batch(criteria_weights_batch)
+        full_scores = self.ranker.get_alternatives_ranking_scores()
+        self.ranker.remove_criteria_weights(0)
+        self.assertListEqual(self.ranker.ranking_indexes, full_rankings[1:])
+        self.assertListEqual(self.ranker.get_alternatives_ranking_scores(), full_scores[1:])
+
+    def test_stage_timers_observe_each_stage(self):
+        self.ranker.stage_timers = LatencyHistograms()
+        self.ranker.set_decision_matrix(self.dm_1['decision_matrix'])
+        self.ranker.evaluate_criteria_weights_batch([self.dm_1['criteria_weights']] * 3)
+        self.assertListEqual(list(self.ranker.stage_timers.summary().keys()), [
+            ('CrispTOPSIS', 'dm=1,alt=2,crit=3,batch=0', '_normalized_decision_matrix'),
+            ('CrispTOPSIS', 'dm=1,alt=2,crit=3,batch=4', '_weighted_normalized_decision_matrix'),
+            ('CrispTOPSIS', 'dm=1,alt=2,crit=3,batch=4', '_distance_from_ideal_solutions'),
+            ('CrispTOPSIS', 'dm=1,alt=2,crit=3,batch=4', '_calculate_closeness_coefficients'),
+            ('CrispTOPSIS', 'dm=1,alt=2,crit=3,batch=4', '_rank_alternatives'),
+        ])
+
     def test_logically_sound_example_cost_criteria(self):
         criteria_rank = {
             'high_importance': 0.9,
@@ -105,3 +175,23 @@ class TestCrispTOPSIS(TestCase):
 
         self.assertEqual(ret[0], 0)
         self.assertListEqual(ret, [0, 2, 1])
+
+
+@skipIf(importlib.util.find_spec('skcriteria') is None, 'scikit-criteria reference backend is not installed')
+class TestCrispTOPSISAgainstSKCriteria(TestCase):
+
+    def test_same_as_skcriteria_reference(self):
+        rng = np.random.default_rng(42)
+        for criteria_benefit_indicator in [[True, False, True], [False, False, True, True]]:
+            for num_alternatives in [2, 5, 30]:
+                decision_matrix = rng.uniform(1, 100, (num_alternatives, len(criteria_benefit_indicator))).tolist()
+                criteria_weights = rng.uniform(0.1, 1, len(criteria_benefit_indicator)).tolist()
+
+                ranker = CrispTOPSIS(criteria_benefit_indicator=criteria_benefit_indicator)
+                ranker.add_decision_maker(decision_matrix=decision_matrix, criteria_weights=criteria_weights)
+                reference_ranker = SKCriteriaCrispTOPSIS(criteria_benefit_indicator=criteria_benefit_indicator)
+                reference_ranker.add_decision_maker(decision_matrix=decision_matrix, criteria_weights=criteria_weights)
+
+                self.assertListEqual(ranker.evaluate(), reference_ranker.evaluate())
+                np.testing.assert_almost_equal(
+                    ranker.get_alternatives_ranking_scores(), reference_ranker.get_alternatives_ranking_scores())
@@ -3,6 +3,7 @@ from unittest.mock import Mock, patch
 
 import numpy as np
 
+from slr_worker_ranking.histograms import LatencyHistograms
 from slr_worker_ranking.mcdm.ftopsis import FuzzyTOPSIS, AltFuzzyTOPSIS
 
 
@@ -136,7 +137,7 @@ class TestFuzzyTOPSIS(TestCase):
             [(0.3, 0.75, 1.0), (1/10, 1/7, 1/3), (0.1, 0.4, 0.7)], # alt1
             [(0.3, 0.7, 1.0), (1/5, 1/3, 1.0), (0.3, 0.75, 1)], # alt2
         ]
-        self.assertEqual(self.ranker.norm_decision_matrix, exp_norm_decision_matrix)
+        np.testing.assert_array_equal(self.ranker.norm_decision_matrix, exp_norm_decision_matrix)
 
     def test_weighted_normalized_decision_matrix(self):
         self.ranker.agg_criteria_weights = [(0.3, 0.7, 1.0), (0.3, 0.6, 0.9), (0.3, 0.6, 0.9)]
@@ -169,8 +170,8 @@ class TestFuzzyTOPSIS(TestCase):
         exp_FPIS_value = [[1, 1, 1], [1, 1, 1], [1, 1, 1]]
         exp_FNIS_value = [[0, 0, 0], [0, 0, 0], [0, 0, 0]]
 
-        self.assertListEqual(self.ranker.FPIS_value, exp_FPIS_value)
-        self.assertListEqual(self.ranker.FNIS_value, exp_FNIS_value)
+        np.testing.assert_array_equal(self.ranker.FPIS_value, exp_FPIS_value)
+        np.testing.assert_array_equal(self.ranker.FNIS_value, exp_FNIS_value)
 
     def test_fuzzy_number_distance_calculation(self):
         dist = self.ranker._fuzzy_number_distance_calculation((1.0,2.0,3.0), (6.0, 5.0, 4.0))
@@ -270,6 +271,208 @@ class TestFuzzyTOPSIS(TestCase):
         self.assertAlmostEqual(self.ranker.closeness_coefficients[0], expected_ccs[0], places=3)
         self.assertAlmostEqual(self.ranker.closeness_coefficients[1], expected_ccs[1], places=3)
 
+    def test_evalute_end_to_end_with_per_cell_methods(self):
+        ranker = FuzzyTOPSIS(
+            criteria_benefit_indicator=self.criteria_benefit_indicator,
+            decision_matrix_list=self.decision_matrix_list,
+            criteria_weights_list=self.criteria_weights_list
+        )
+        ranker.agg_alt_fuzzy_method = ranker._defaut_alt_agg_fuzzy_rating_method
+        ranker.agg_crit_fuzzy_method = ranker._defaut_crit_agg_fuzzy_weight_method
+        ranker.norm_alt_fuzzy_method = ranker._default_normalize_alternative_method
+        ret = ranker.evaluate()
+        self.assertListEqual(ret, self.ranker.evaluate())
+        np.testing.assert_almost_equal(
+            ranker.get_alternatives_ranking_scores(), self.ranker.get_alternatives_ranking_scores())
+
+    def test_evaluate_criteria_weights_batch_same_as_single_evaluations(self):
+        decision_matrix = self.dm_2['decision_matrix']
+        criteria_weights_batch = [self.dm_1['criteria_weights'], self.dm_2['criteria_weights']]
+        ranker = FuzzyTOPSIS(criteria_benefit_indicator=self.criteria_benefit_indicator)
+        ranker.set_decision_matrix(decision_matrix)
+        rankings = ranker.evaluate_criteria_weights_batch(criteria_weights_batch)
+        scores = ranker.get_alternatives_ranking_scores()
+
+        self.assertEqual(len(rankings), 2)
+        self.assertEqual(len(scores), 2)
+        for i, criteria_weights in enumerate(criteria_weights_batch):
+            single_ranker = FuzzyTOPSIS(criteria_benefit_indicator=self.criteria_benefit_indicator)
+            single_ranker.add_decision_maker(decision_matrix=decision_matrix, criteria_weights=criteria_weights)
+            self.assertListEqual(rankings[i], single_ranker.evaluate())
+            np.testing.assert_almost_equal(scores[i], single_ranker.get_alternatives_ranking_scores())
+
+    def test_add_alternative_same_as_full_evaluation(self):
+        decision_matrix = self.dm_2['decision_matrix']
+        criteria_weights_batch = [self.dm_1['criteria_weights'], self.dm_2['criteria_weights']]
+        ranker = FuzzyTOPSIS(criteria_benefit_indicator=self.criteria_benefit_indicator)
+        ranker.set_decision_matrix(decision_matrix)
+        ranker.evaluate_criteria_weights_batch(criteria_weights_batch)
+        new_alternatives = [
+            [self.rat_lf['medium_rating'], self.rat_lf['medium_rating'], self.rat_lf['medium_rating']],
+            [self.rat_lf['very_good_rating'], self.rat_lf['very_poor_rating'], self.rat_lf['very_good_rating']],
+        ]
+        for new_alternative in new_alternatives:
+            decision_matrix = decision_matrix + [new_alternative]
+            rankings = ranker.add_alternative(new_alternative)
+
+            full_ranker = FuzzyTOPSIS(criteria_benefit_indicator=self.criteria_benefit_indicator)
+            full_ranker.set_decision_matrix(decision_matrix)
+            self.assertListEqual(rankings, full_ranker.evaluate_criteria_weights_batch(criteria_weights_batch))
+            np.testing.assert_almost_equal(ranker.norm_decision_matrix, full_ranker.norm_decision_matrix)
+            np.testing.assert_almost_equal(ranker.get_alternatives_ranking_scores(), full_ranker.get_alternatives_ranking_scores())
+
+    def test_added_alternatives_grow_into_spare_capacity(self):
+        decision_matrix = self.dm_2['decision_matrix']
+        criteria_weights_batch = [self.dm_1['criteria_weights'], self.dm_2['criteria_weights']]
+        ranker = FuzzyTOPSIS(criteria_benefit_indicator=self.criteria_benefit_indicator)
+        ranker.set_decision_matrix(decision_matrix)
+        ranker.evaluate_criteria_weights_batch(criteria_weights_batch)
+        new_alternative = [self.rat_lf['medium_rating'], self.rat_lf['medium_rating'], self.rat_lf['medium_rating']]
+        ranker.add_alternative(new_alternative)
+        weighted_norm_capacity = ranker.weighted_norm_decision_matrix.base
+        decision_matrix = decision_matrix + [new_alternative]
+        self.assertEqual(weighted_norm_capacity.shape[1], 2 * len(decision_matrix))
+
+        for _ in range(len(decision_matrix)):
+            decision_matrix = decision_matrix + [new_alternative]
+            ranker.add_alternative(new_alternative)
+            self.assertIs(ranker.weighted_norm_decision_matrix.base, weighted_norm_capacity)
+        decision_matrix = decision_matrix + [new_alternative]
+        ranker.add_alternative(new_alternative)
+        self.assertIsNot(ranker.weighted_norm_decision_matrix.base, weighted_norm_capacity)
+
+        full_ranker = FuzzyTOPSIS(criteria_benefit_indicator=self.criteria_benefit_indicator)
+        full_ranker.set_decision_matrix(decision_matrix)
+        self.assertListEqual(ranker.ranking_indexes, full_ranker.evaluate_criteria_weights_batch(criteria_weights_batch))
+        np.testing.assert_almost_equal(ranker.weighted_norm_decision_matrix, full_ranker.weighted_norm_decision_matrix)
+        np.testing.assert_almost_equal(ranker.get_alternatives_ranking_scores(), full_ranker.get_alternatives_ranking_scores())
+
+    def test_replace_and_remove_alternative_same_as_full_evaluation(self):
+        decision_matrix = self.dm_1['decision_matrix'] + self.dm_2['decision_matrix']
+        criteria_weights_batch = [self.dm_1['criteria_weights'], self.dm_2['criteria_weights']]
+        ranker = FuzzyTOPSIS(criteria_benefit_indicator=self.criteria_benefit_indicator)
+        ranker.set_decision_matrix(decision_matrix)
+        ranker.evaluate_criteria_weights_batch(criteria_weights_batch)
+        replaced_alternative = [self.rat_lf['very_good_rating'], self.rat_lf['very_poor_rating'], self.rat_lf['good_rating']]
+        for change in [('replace', 1), ('remove', 0), ('replace', 0), ('remove', 2)]:
+            operation, alt_index = change
+            decision_matrix = list(decision_matrix)
+            if operation == 'replace':
+                decision_matrix[alt_index] = replaced_alternative
+                rankings = ranker.replace_alternative(alt_index, replaced_alternative)
+            else:
+                del decision_matrix[alt_index]
+                rankings = ranker.remove_alternative(alt_index)
+
+            full_ranker = FuzzyTOPSIS(criteria_benefit_indicator=self.criteria_benefit_indicator)
+            full_ranker.set_decision_matrix(decision_matrix)
+            self.assertListEqual(rankings, full_ranker.evaluate_criteria_weights_batch(criteria_weights_batch))
+            self.assertEqual(ranker.num_alternatives, len(decision_matrix))
+            np.testing.assert_almost_equal(ranker.norm_decision_matrix, full_ranker.norm_decision_matrix)
+            np.testing.assert_almost_equal(ranker.get_alternatives_ranking_scores(), full_ranker.get_alternatives_ranking_scores())
+
+    def test_append_criteria_weights_batch_ranks_only_new_criteria_weights(self):
+        decision_matrix = self.dm_2['decision_matrix']
+        ranker = FuzzyTOPSIS(criteria_benefit_indicator=self.criteria_benefit_indicator)
+        ranker.set_decision_matrix(decision_matrix)
+        ranker.evaluate_criteria_weights_batch([self.dm_1['criteria_weights']])
+        new_rankings = ranker.append_criteria_weights_batch([self.dm_2['criteria_weights']])
+
+        full_ranker = FuzzyTOPSIS(criteria_benefit_indicator=self.criteria_benefit_indicator)
+        full_ranker.set_decision_matrix(decision_matrix)
+        full_rankings = full_ranker.evaluate_criteria_weights_batch([self.dm_1['criteria_weights'], self.dm_2['criteria_weights']])
+        self.assertListEqual(new_rankings, full_rankings[1:])
+        self.assertListEqual(ranker.ranking_indexes, full_rankings)
+        np.testing.assert_almost_equal(ranker.get_alternatives_ranking_scores(), full_ranker.get_alternatives_ranking_scores())
+        np.testing.assert_almost_equal(
+            ranker.get_alternatives_ranking_scores(batch_indexes=[1]), full_ranker.get_alternatives_ranking_scores()[1:])
+
+
+    def test_remove_criteria_weights_keeps_other_rankings_consistent(self):
+        decision_matrix = self.dm_2['decision_matrix']
+        ranker = FuzzyTOPSIS(criteria_benefit_indicator=self.criteria_benefit_indicator)
+        ranker.set_decision_matrix(decision_matrix)
+        ranker.evaluate_criteria_weights_batch([self.dm_1['criteria_weights'], self.dm_2['criteria_weights']])
+        ranker.remove_criteria_weights(0)
+        new_alternative = [self.rat_lf['very_good_rating'], self.rat_lf['very_poor_rating'], self.rat_lf['very_good_rating']]
+        rankings = ranker.add_alternative(new_alternative)
+
+        full_ranker = FuzzyTOPSIS(criteria_benefit_indicator=self.criteria_benefit_indicator)
+        full_ranker.set_decision_matrix(decision_matrix + [new_alternative])
+        self.assertListEqual(rankings, full_ranker.evaluate_criteria_weights_batch([self.dm_2['criteria_weights']]))
+        np.testing.assert_almost_equal(ranker.get_alternatives_ranking_scores(), full_ranker.get_alternatives_ranking_scores())
+
+    def test_stage_timers_observe_each_evaluate_stage(self):
+        self.ranker.stage_timers = LatencyHistograms()
+        ranking_indexes = self.ranker.evaluate()
+        self.assertListEqual(ranking_indexes, FuzzyTOPSIS(
+            criteria_benefit_indicator=self.criteria_benefit_indicator,
+            decision_matrix_list=self.decision_matrix_list,
+            criteria_weights_list=self.criteria_weights_list
+        ).evaluate())
+
+        stages = [stage for (ranker_cls_name, problem_shape, stage) in self.ranker.stage_timers.summary().keys()]
+        self.assertListEqual(stages, [
+            'validate_inputs', '_aggregated_ratings_and_weights', '_normalized_decision_matrix',
+            '_weighted_normalized_decision_matrix', '_calculate_FPIS_FNIS', '_distance_from_FPIS_FNIS',
+            '_calculate_closeness_coefficients', '_rank_alternatives',
+        ])
+        ranker_cls_name, problem_shape, _ = next(iter(self.ranker.stage_timers.summary().keys()))
+        self.assertEqual(ranker_cls_name, 'FuzzyTOPSIS')
+        self.assertEqual(problem_shape, 'dm=2,alt=2,crit=3,batch=0')
+
+    def test_stage_timers_observe_incremental_stages(self):
+        ranker = FuzzyTOPSIS(criteria_benefit_indicator=self.criteria_benefit_indicator)
+        ranker.stage_timers = LatencyHistograms()
+        ranker.set_decision_matrix(self.dm_1['decision_matrix'])
+        ranker.evaluate_criteria_weights_batch([self.dm_1['criteria_weights'], self.dm_2['criteria_weights']])
+        ranker.add_alternative(self.dm_2['decision_matrix'][0])
+
+        stage_counts = {}
+        for (_, problem_shape, stage), summary in ranker.stage_timers.summary().items():
+            stage_counts[stage] = stage_counts.get(stage, 0) + summary['count']
+        self.assertEqual(stage_counts['_aggregated_ratings'], 1)
+        self.assertEqual(stage_counts['_update_normalized_decision_matrix'], 1)
+        self.assertEqual(stage_counts['_update_criteria_weights_batch'], 1)
+        self.assertIn(('FuzzyTOPSIS', 'dm=1,alt=4,crit=3,batch=2', '_update_criteria_weights_batch'), ranker.stage_timers.histograms)
+
+    def test_reset_evaluates_new_problem_same_as_new_ranker(self):
+        self.ranker.evaluate()
+        self.ranker.reset()
+        self.ranker.add_decision_maker(**self.dm_2)
+        ret = self.ranker.evaluate()
+
+        new_ranker = FuzzyTOPSIS(criteria_benefit_indicator=self.criteria_benefit_indicator)
+        new_ranker.add_decision_maker(**self.dm_2)
+        self.assertListEqual(ret, new_ranker.evaluate())
+        self.assertEqual(self.ranker.num_decision_makers, 1)
+        np.testing.assert_almost_equal(self.ranker.get_alternatives_ranking_scores(), new_ranker.get_alternatives_ranking_scores())
+
+    def test_evaluate_criteria_weights_batch_reuses_buffers_with_same_shape(self):
+        criteria_weights_batch = [self.dm_1['criteria_weights'], self.dm_2['criteria_weights']]
+        ranker = FuzzyTOPSIS(criteria_benefit_indicator=self.criteria_benefit_indicator)
+        ranker.set_decision_matrix(self.dm_1['decision_matrix'])
+        ranker.evaluate_criteria_weights_batch(criteria_weights_batch)
+        weighted_norm_decision_matrix = ranker.weighted_norm_decision_matrix
+        fpis_distances_per_criterion = ranker.fpis_distances_per_criterion
+
+        ranker.reset()
+        ranker.set_decision_matrix(self.dm_2['decision_matrix'])
+        rankings = ranker.evaluate_criteria_weights_batch(criteria_weights_batch[::-1])
+        self.assertIs(ranker.weighted_norm_decision_matrix, weighted_norm_decision_matrix)
+        self.assertIs(ranker.fpis_distances_per_criterion, fpis_distances_per_criterion)
+
+        new_ranker = FuzzyTOPSIS(criteria_benefit_indicator=self.criteria_benefit_indicator)
+        new_ranker.set_decision_matrix(self.dm_2['decision_matrix'])
+        self.assertListEqual(rankings, new_ranker.evaluate_criteria_weights_batch(criteria_weights_batch[::-1]))
+        np.testing.assert_almost_equal(ranker.get_alternatives_ranking_scores(), new_ranker.get_alternatives_ranking_scores())
+
+    def test_get_alternatives_ranking_scores_returns_list(self):
+        self.ranker.evaluate()
+        scores = self.ranker.get_alternatives_ranking_scores()
+        self.assertIsInstance(scores, list)
+        self.assertEqual(len(scores), 2)
+
 
 class TestFuzzyTOPSISWithChenInputs(TestCase):
 
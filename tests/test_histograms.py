@@ -0,0 +1,40 @@
+from unittest import TestCase
+
+from slr_worker_ranking.histograms import LatencyHistogram, LatencyHistograms
+
+
+class TestLatencyHistogram(TestCase):
+
+    def test_percentiles_are_the_upper_bound_of_their_bucket(self):
+        histogram = LatencyHistogram(buckets=(0.001, 0.01, 0.1, float('inf')))
+        for seconds in [0.0005] * 90 + [0.005] * 9 + [0.05]:
+            histogram.observe(seconds)
+        self.assertEqual(histogram.count, 100)
+        self.assertEqual(histogram.percentile(50), 0.001)
+        self.assertEqual(histogram.percentile(95), 0.01)
+        self.assertEqual(histogram.percentile(100), 0.05)
+
+    def test_percentiles_are_capped_by_the_max_latency(self):
+        histogram = LatencyHistogram(buckets=(0.001, float('inf')))
+        histogram.observe(2.0)
+        self.assertEqual(histogram.percentile(99), 2.0)
+
+    def test_summary_of_empty_histogram(self):
+        summary = LatencyHistogram().summary()
+        self.assertDictEqual(summary, {'count': 0, 'mean': 0.0, 'max': 0.0, 'p50': 0.0, 'p95': 0.0, 'p99': 0.0})
+
+
+class TestLatencyHistograms(TestCase):
+
+    def test_observe_creates_one_histogram_per_key(self):
+        histograms = LatencyHistograms()
+        histograms.observe(('a', 'stage'), 0.001)
+        histograms.observe(('a', 'stage'), 0.003)
+        histograms.observe(('b', 'stage'), 0.002)
+        summary = histograms.summary()
+        self.assertEqual(summary[('a', 'stage')]['count'], 2)
+        self.assertAlmostEqual(summary[('a', 'stage')]['mean'], 0.002)
+        self.assertEqual(summary[('b', 'stage')]['count'], 1)
+
+        histograms.reset()
+        self.assertDictEqual(histograms.summary(), {})
@@ -0,0 +1,62 @@
+from unittest import TestCase
+from unittest.mock import Mock
+
+from prometheus_client import generate_latest
+
+from slr_worker_ranking.replay import create_replay_service, replay_events
+from slr_worker_ranking.workload import generate_workload
+
+
+class TestServiceMetrics(TestCase):
+
+    def setUp(self):
+        self.service = create_replay_service(metrics_port=8000, ranker_stage_timers=True)
+
+    def get_sample_value(self, name, labels=None):
+        return self.service.metrics.registry.get_sample_value(name, labels or {})
+
+    def test_metrics_disabled_by_default(self):
+        self.assertIsNone(create_replay_service().metrics)
+
+    def test_event_processing_ranking_and_publish_metrics(self):
+        events = generate_workload(num_service_types=1, workers_per_service_type=3, num_weight_profiles=2, num_queries=2, seed=1)
+        events = [(event['event_type'], event['event_data']) for event in events]
+        replay_events(self.service, events)
+
+        self.assertEqual(
+            self.get_sample_value('slr_worker_ranking_event_processing_seconds_count', {'event_type': 'WorkerProfileRated'}), 3)
+        self.assertEqual(
+            self.get_sample_value('slr_worker_ranking_event_processing_seconds_count', {'event_type': 'QueryServicesQoSRanked'}), 2)
+        self.assertGreater(self.get_sample_value('slr_worker_ranking_ranking_seconds_count', {'service_type': 'Service0'}), 0)
+        self.assertGreater(
+            self.get_sample_value('slr_worker_ranking_publish_payload_bytes_sum', {'event_type': 'ServiceSLRProfilesRanked'}), 0)
+
+        self.assertEqual(self.get_sample_value('slr_worker_ranking_alternatives', {'service_type': 'Service0'}), 3)
+        self.assertEqual(
+            self.get_sample_value('slr_worker_ranking_slr_profiles', {'service_type': 'Service0'}),
+            len(self.service.slr_profiles_by_service['Service0']))
+        self.assertEqual(self.get_sample_value('slr_worker_ranking_queries'), 2)
+
+        metrics_text = generate_latest(self.service.metrics.registry).decode('utf-8')
+        self.assertIn('slr_worker_ranking_ranker_stage_seconds_bucket{', metrics_text)
+
+    def test_stream_backlog_from_consumer_group_lag(self):
+        consumer_group = Mock()
+        consumer_group.name = 'cg-SLRWorkerRanking'
+        consumer_group.database.xinfo_groups.return_value = [
+            {'name': b'other-cg', 'lag': 100, 'last-delivered-id': b'0-0'},
+            {'name': b'cg-SLRWorkerRanking', 'lag': 5, 'last-delivered-id': b'1-0'},
+        ]
+        self.service.service_cmd_cg_stream_map = {'default': Mock(input_consumer_group=consumer_group)}
+        self.service.service_cmd_cg_keys_map = {'default': ['WorkerProfileRated']}
+        self.assertDictEqual(self.service.get_stream_backlogs(), {'WorkerProfileRated': 5})
+        self.assertEqual(self.get_sample_value('slr_worker_ranking_stream_backlog', {'event_type': 'WorkerProfileRated'}), 5)
+
+    def test_stream_backlog_without_lag_counts_events_after_last_delivered(self):
+        consumer_group = Mock()
+        consumer_group.name = 'cg-SLRWorkerRanking'
+        consumer_group.database.xinfo_groups.return_value = [
+            {'name': b'cg-SLRWorkerRanking', 'last-delivered-id': b'2-0'},
+        ]
+        consumer_group.database.xrange.return_value = [(b'2-0', {}), (b'3-0', {}), (b'4-0', {})]
+        self.assertEqual(self.service.get_consumer_group_stream_backlog(consumer_group, 'WorkerProfileRated'), 2)
@@ -0,0 +1,48 @@
+import os
+import pstats
+import tempfile
+import tracemalloc
+from unittest import TestCase
+
+from slr_worker_ranking.profiling import EventsProfiler
+
+
+def some_function(n):
+    return sorted(str(i) for i in range(n))
+
+
+class TestEventsProfiler(TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.output_dir = os.path.join(self.tmp_dir.name, 'profiles')
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_profiles_bounded_window_of_calls(self):
+        profiler = EventsProfiler(self.output_dir, num_calls=2)
+        self.assertEqual(profiler.runcall(some_function, 3), ['0', '1', '2'])
+        self.assertFalse(profiler.is_done())
+        profiler.runcall(some_function, 10)
+        self.assertTrue(profiler.is_done())
+
+        paths = profiler.write_results(name='SomeService')
+        profiler.stop()
+        self.assertFalse(tracemalloc.is_tracing())
+        self.assertListEqual([os.path.splitext(path)[1] for path in paths], ['.prof', '.txt', '.tracemalloc'])
+        stats = pstats.Stats(paths[0])
+        self.assertTrue(any(function_name == 'some_function' for _, _, function_name in stats.stats.keys()))
+        tracemalloc.Snapshot.load(paths[2])
+        with open(paths[1]) as report_file:
+            report = report_file.read()
+        self.assertIn('2 profiled calls', report)
+        self.assertIn('memory allocations', report)
+
+    def test_without_trace_memory(self):
+        profiler = EventsProfiler(self.output_dir, num_calls=1, trace_memory=False)
+        self.assertFalse(tracemalloc.is_tracing())
+        profiler.runcall(some_function, 3)
+        paths = profiler.write_results()
+        profiler.stop()
+        self.assertListEqual([os.path.splitext(path)[1] for path in paths], ['.prof', '.txt'])
@@ -0,0 +1,46 @@
+import subprocess
+import sys
+from unittest import TestCase
+from unittest.mock import patch
+
+from slr_worker_ranking.mcdm import registry
+from slr_worker_ranking.mcdm.base import BaseTOPSIS
+from slr_worker_ranking.mcdm.ftopsis import FuzzyTOPSIS
+
+
+class TestRankerRegistry(TestCase):
+
+    def setUp(self):
+        self.ranker_types_patcher = patch.dict(registry.RANKER_TYPES)
+        self.ranker_types_patcher.start()
+
+    def tearDown(self):
+        self.ranker_types_patcher.stop()
+
+    def test_get_ranker_class_imports_backend(self):
+        self.assertIs(registry.get_ranker_class('chen-ftopsis'), FuzzyTOPSIS)
+        self.assertIs(registry.RANKER_TYPES['chen-ftopsis'], FuzzyTOPSIS)
+
+    def test_get_ranker_class_unknown_type(self):
+        with self.assertRaises(ValueError):
+            registry.get_ranker_class('unknown-topsis')
+
+    def test_register_ranker_type_as_decorator(self):
+        @registry.register_ranker_type('my-topsis')
+        class MyTOPSIS(BaseTOPSIS):
+            pass
+
+        self.assertIs(registry.get_ranker_class('my-topsis'), MyTOPSIS)
+
+    def test_register_ranker_type_with_lazy_path(self):
+        registry.register_ranker_type('my-alt-ftopsis', 'slr_worker_ranking.mcdm.ftopsis:AltFuzzyTOPSIS')
+        ranker_cls = registry.get_ranker_class('my-alt-ftopsis')
+        self.assertEqual(ranker_cls.__name__, 'AltFuzzyTOPSIS')
+
+    def test_service_module_does_not_import_unused_backends(self):
+        code = (
+            'import sys; import slr_worker_ranking.service; '
+            'print("slr_worker_ranking.mcdm.crisptopsis" in sys.modules, "slr_worker_ranking.mcdm.ftopsis" in sys.modules)'
+        )
+        output = subprocess.check_output([sys.executable, '-c', code], text=True)
+        self.assertEqual(output.strip(), 'False False')
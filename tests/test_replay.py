@@ -0,0 +1,55 @@
+import json
+import os
+import tempfile
+from unittest import TestCase
+
+from slr_worker_ranking.replay import create_replay_service, load_events, replay_events
+
+from slr_worker_ranking.conf import (
+    LISTEN_EVENT_TYPE_WORKER_PROFILE_RATED,
+    LISTEN_EVENT_TYPE_QUERY_SERVICES_QOS_CRITERIA_RANKED,
+)
+
+
+class TestReplay(TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.events_path = os.path.join(self.tmp_dir.name, 'events.jsonl')
+        events = []
+        for stream_key, rating in [('worker-a', (7, 9, 10)), ('worker-b', (1, 1, 3)), ('worker-c', (3, 5, 7))]:
+            events.append({'event_type': LISTEN_EVENT_TYPE_WORKER_PROFILE_RATED, 'event_data': {'worker': {
+                'service_type': 'SomeService',
+                'stream_key': stream_key,
+                'throughput': rating,
+                'accuracy': (3, 5, 7),
+                'energy_consumption': (1, 3, 5),
+            }}})
+        events.append({'event_type': LISTEN_EVENT_TYPE_QUERY_SERVICES_QOS_CRITERIA_RANKED, 'event_data': {
+            'query_id': 'query-1',
+            'required_services': ['SomeService'],
+            'qos_rank': {
+                'energy_consumption': (0.3, 0.5, 0.7),
+                'throughput': (0.7, 0.9, 1.0),
+                'accuracy': (0.1, 0.3, 0.5),
+            }
+        }})
+        with open(self.events_path, 'w') as events_file:
+            for event in events:
+                events_file.write(json.dumps(event) + '\n')
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_replay_events_through_service(self):
+        service = create_replay_service()
+        stats = replay_events(service, load_events(self.events_path), trace_memory=True)
+
+        self.assertEqual(stats['events'], 4)
+        self.assertEqual(stats['published_events'], 1)
+        self.assertEqual(stats['latency_ms'][LISTEN_EVENT_TYPE_WORKER_PROFILE_RATED]['count'], 3)
+        self.assertIn('p99', stats['latency_ms'][LISTEN_EVENT_TYPE_QUERY_SERVICES_QOS_CRITERIA_RANKED])
+        self.assertGreater(stats['events_per_sec'], 0)
+        self.assertGreater(stats['peak_traced_memory_mb'], 0)
+        slr_profile = list(service.slr_profiles_by_service['SomeService'].values())[0]
+        self.assertListEqual(slr_profile['ranking_index'][:1], [0])
@@ -0,0 +1,15 @@
+from unittest import TestCase
+
+from slr_worker_ranking.run import get_stream_read_block
+
+
+class TestRun(TestCase):
+
+    def test_stream_read_block_is_the_shortest_configured_period(self):
+        self.assertEqual(get_stream_read_block(0.5, 60, 'state.snapshot', 30), 500)
+        self.assertEqual(get_stream_read_block(0, 60, 'state.snapshot', 30), 30000)
+        self.assertEqual(get_stream_read_block(0, 60, None, 30), 60000)
+        self.assertEqual(get_stream_read_block(0.0001, 60, None, 30), 1)
+
+    def test_stream_read_blocks_forever_without_periodic_work(self):
+        self.assertEqual(get_stream_read_block(0, 0, None, 30), 0)
@@ -1,8 +1,13 @@
+import copy
+import os
+import tempfile
 from unittest.mock import patch
 
 from event_service_utils.tests.base_test_case import MockedEventDrivenServiceStreamTestCase
+from opentracing.mocktracer import MockTracer
 from event_service_utils.tests.json_msg_helper import prepare_event_msg_tuple
 
+from slr_worker_ranking.histograms import LatencyHistograms
 from slr_worker_ranking.service import SLRWorkerRanking
 
 from slr_worker_ranking.conf import (
@@ -56,3 +61,902 @@ class TestSLRWorkerRanking(MockedEventDrivenServiceStreamTestCase):
         self.assertTrue(mocked_process_event_type.called)
         self.service.process_event_type.assert_called_once_with(event_type=event_type, event_data=event_data, json_msg=msg_tuple[1])
 
+
+    def prepare_service_type_profiles_and_alternatives(self):
+        self.service.alternatives_by_service_type = {
+            'SomeService': {
+                'worker-a': [(7, 9, 10), (1, 1, 3), (7, 9, 10)],
+                'worker-b': [(1, 1, 3), (7, 9, 10), (1, 3, 5)],
+                'worker-c': [(3, 5, 7), (3, 5, 7), (3, 5, 7)],
+            }
+        }
+        self.service.slr_profiles_by_service = {
+            'SomeService': {
+                'profile-1': {
+                    'query_ids': ['query-1'],
+                    'criteria_weights': [(0.1, 0.3, 0.5), (0.7, 0.9, 1.0), (0.3, 0.5, 0.7)],
+                },
+                'profile-2': {
+                    'query_ids': ['query-2'],
+                    'criteria_weights': [(0.7, 0.9, 1.0), (0.1, 0.3, 0.5), (0.1, 0.3, 0.5)],
+                },
+            }
+        }
+
+    @patch('slr_worker_ranking.service.SLRWorkerRanking.publish_service_slr_profiles_ranked')
+    def test_invalidated_service_type_ranker_is_reset_and_reused(self, mocked_pub):
+        self.prepare_service_type_profiles_and_alternatives()
+        self.service.update_slr_profile_rankings_of_service_type('SomeService')
+        ranker = self.service.ranker_by_service_type['SomeService']
+        weighted_norm_decision_matrix = ranker.weighted_norm_decision_matrix
+        exp_rankings = {
+            slr_profile_id: slr_profile['ranking_index']
+            for slr_profile_id, slr_profile in self.service.slr_profiles_by_service['SomeService'].items()
+        }
+
+        with patch.object(ranker, 'reset', wraps=ranker.reset) as mocked_reset:
+            self.service.invalidate_service_type_ranker('SomeService')
+            mocked_reset.assert_called_once()
+        self.assertNotIn('SomeService', self.service.ranker_by_service_type)
+
+        self.service.update_slr_profile_rankings_of_service_type('SomeService')
+        self.assertIs(self.service.ranker_by_service_type['SomeService'], ranker)
+        self.assertIs(ranker.weighted_norm_decision_matrix, weighted_norm_decision_matrix)
+        self.assertDictEqual(self.service.idle_ranker_by_service_type, {})
+        for slr_profile_id, slr_profile in self.service.slr_profiles_by_service['SomeService'].items():
+            self.assertListEqual(slr_profile['ranking_index'], exp_rankings[slr_profile_id])
+
+    def test_initialize_ranker_reuses_ranker_instance(self):
+        ranker = self.service.ranker
+        with patch.object(ranker, 'reset') as mocked_reset:
+            self.service.initialize_ranker()
+            mocked_reset.assert_called_once()
+        self.assertIs(self.service.ranker, ranker)
+
+    @patch('slr_worker_ranking.service.SLRWorkerRanking.publish_service_slr_profiles_ranked')
+    def test_update_slr_profile_rankings_of_service_type_ranks_every_profile(self, mocked_pub):
+        self.prepare_service_type_profiles_and_alternatives()
+        self.service.update_slr_profile_rankings_of_service_type('SomeService')
+
+        decision_matrix = list(self.service.alternatives_by_service_type['SomeService'].values())
+        for slr_profile in self.service.slr_profiles_by_service['SomeService'].values():
+            self.service.initialize_ranker()
+            self.service.ranker.add_decision_maker(decision_matrix=decision_matrix, criteria_weights=slr_profile['criteria_weights'])
+            exp_ranking_index = self.service.ranker.evaluate()
+            exp_ranking_scores = self.service.ranker.get_alternatives_ranking_scores()
+
+            self.assertListEqual(slr_profile['alternatives_ids'], ['worker-a', 'worker-b', 'worker-c'])
+            self.assertListEqual(slr_profile['ranking_index'], exp_ranking_index)
+            for score, exp_score in zip(slr_profile['ranking_scores'], exp_ranking_scores):
+                self.assertAlmostEqual(score, exp_score)
+        mocked_pub.assert_called_once_with('SomeService')
+
+    @patch('slr_worker_ranking.service.SLRWorkerRanking.publish_service_slr_profiles_ranked')
+    def test_update_slr_profile_rankings_of_service_type_with_single_alternative(self, mocked_pub):
+        self.prepare_service_type_profiles_and_alternatives()
+        self.service.alternatives_by_service_type['SomeService'].pop('worker-b')
+        self.service.alternatives_by_service_type['SomeService'].pop('worker-c')
+        self.service.update_slr_profile_rankings_of_service_type('SomeService')
+
+        for slr_profile in self.service.slr_profiles_by_service['SomeService'].values():
+            self.assertListEqual(slr_profile['alternatives_ids'], ['worker-a'])
+            self.assertListEqual(slr_profile['ranking_index'], [0])
+            self.assertListEqual(slr_profile['ranking_scores'], [0])
+        mocked_pub.assert_called_once_with('SomeService')
+
+    @patch('slr_worker_ranking.service.SLRWorkerRanking.publish_service_slr_profiles_ranked')
+    def test_new_query_profile_reuses_service_type_normalized_decision_matrix(self, mocked_pub):
+        self.prepare_service_type_profiles_and_alternatives()
+        self.service.update_slr_profile_rankings_of_service_type('SomeService')
+        ranker = self.service.ranker_by_service_type['SomeService']
+        with patch.object(ranker, 'set_decision_matrix') as mocked_set_dm:
+            self.service.process_query_services_qos_criteria_ranked({
+                'query_id': 'query-3',
+                'required_services': ['SomeService'],
+                'qos_rank': {
+                    'energy_consumption': (0.3, 0.5, 0.7),
+                    'throughput': (0.3, 0.5, 0.7),
+                    'accuracy': (0.7, 0.9, 1.0),
+                }
+            })
+            self.assertFalse(mocked_set_dm.called)
+        self.assertIs(self.service.ranker_by_service_type['SomeService'], ranker)
+        self.assertEqual(len(self.service.slr_profiles_by_service['SomeService']), 3)
+
+    @patch('slr_worker_ranking.service.SLRWorkerRanking.publish_service_slr_profiles_ranked')
+    def test_new_worker_updates_service_type_ranker_incrementally(self, mocked_pub):
+        self.prepare_service_type_profiles_and_alternatives()
+        self.service.update_slr_profile_rankings_of_service_type('SomeService')
+        ranker = self.service.ranker_by_service_type['SomeService']
+        with patch.object(ranker, 'add_alternative', wraps=ranker.add_alternative) as mocked_add_alt:
+            self.service.process_worker_profile_rated({
+                'service_type': 'SomeService',
+                'stream_key': 'worker-d',
+                'throughput': (9, 10, 10),
+                'accuracy': (9, 10, 10),
+                'energy_consumption': (1, 1, 3),
+            })
+            mocked_add_alt.assert_called_once_with([(1, 1, 3), (9, 10, 10), (9, 10, 10)])
+        self.assertIs(self.service.ranker_by_service_type['SomeService'], ranker)
+        self.assertEqual(ranker.num_alternatives, 4)
+        for slr_profile in self.service.slr_profiles_by_service['SomeService'].values():
+            self.assertListEqual(slr_profile['alternatives_ids'], ['worker-a', 'worker-b', 'worker-c', 'worker-d'])
+            self.assertEqual(slr_profile['ranking_index'][0], 3)
+
+    @patch('slr_worker_ranking.service.SLRWorkerRanking.publish_service_slr_profiles_ranked')
+    def test_new_worker_and_query_rankings_same_as_full_ranking(self, mocked_pub):
+        self.prepare_service_type_profiles_and_alternatives()
+        self.service.update_slr_profile_rankings_of_service_type('SomeService')
+        self.service.process_query_services_qos_criteria_ranked({
+            'query_id': 'query-3',
+            'required_services': ['SomeService'],
+            'qos_rank': {
+                'energy_consumption': (0.3, 0.5, 0.7),
+                'throughput': (0.3, 0.5, 0.7),
+                'accuracy': (0.7, 0.9, 1.0),
+            }
+        })
+        self.service.process_worker_profile_rated({
+            'service_type': 'SomeService',
+            'stream_key': 'worker-d',
+            'throughput': (1, 3, 5),
+            'accuracy': (3, 5, 7),
+            'energy_consumption': (9, 10, 10),
+        })
+
+        decision_matrix = list(self.service.alternatives_by_service_type['SomeService'].values())
+        for slr_profile in self.service.slr_profiles_by_service['SomeService'].values():
+            self.service.initialize_ranker()
+            self.service.ranker.add_decision_maker(decision_matrix=decision_matrix, criteria_weights=slr_profile['criteria_weights'])
+            exp_ranking_index = self.service.ranker.evaluate()
+            exp_ranking_scores = self.service.ranker.get_alternatives_ranking_scores()
+
+            self.assertListEqual(slr_profile['ranking_index'], exp_ranking_index)
+            for score, exp_score in zip(slr_profile['ranking_scores'], exp_ranking_scores):
+                self.assertAlmostEqual(score, exp_score)
+
+    @patch('slr_worker_ranking.service.SLRWorkerRanking.publish_service_slr_profiles_ranked')
+    def test_rerated_worker_replaces_alternative_in_place(self, mocked_pub):
+        self.prepare_service_type_profiles_and_alternatives()
+        self.service.update_slr_profile_rankings_of_service_type('SomeService')
+        ranker = self.service.ranker_by_service_type['SomeService']
+        with patch.object(ranker, 'replace_alternative', wraps=ranker.replace_alternative) as mocked_replace_alt:
+            self.service.process_worker_profile_rated({
+                'service_type': 'SomeService',
+                'stream_key': 'worker-c',
+                'throughput': (9, 10, 10),
+                'accuracy': (9, 10, 10),
+                'energy_consumption': (1, 1, 3),
+            })
+            mocked_replace_alt.assert_called_once_with(2, [(1, 1, 3), (9, 10, 10), (9, 10, 10)])
+        self.assertIs(self.service.ranker_by_service_type['SomeService'], ranker)
+        self.assertEqual(self.service.alternatives_by_service_type['SomeService']['worker-c'], [(1, 1, 3), (9, 10, 10), (9, 10, 10)])
+        for slr_profile in self.service.slr_profiles_by_service['SomeService'].values():
+            self.assertListEqual(slr_profile['alternatives_ids'], ['worker-a', 'worker-b', 'worker-c'])
+            self.assertEqual(slr_profile['ranking_index'][0], 2)
+        mocked_pub.assert_called_with('SomeService')
+
+    @patch('slr_worker_ranking.service.SLRWorkerRanking.publish_service_slr_profiles_ranked')
+    def test_rerated_worker_without_changes_is_ignored(self, mocked_pub):
+        self.prepare_service_type_profiles_and_alternatives()
+        self.service.process_worker_profile_rated({
+            'service_type': 'SomeService',
+            'stream_key': 'worker-c',
+            'throughput': (3, 5, 7),
+            'accuracy': (3, 5, 7),
+            'energy_consumption': (3, 5, 7),
+        })
+        self.assertFalse(mocked_pub.called)
+
+    @patch('slr_worker_ranking.service.SLRWorkerRanking.publish_service_slr_profiles_ranked')
+    def test_removed_worker_rankings_same_as_full_ranking(self, mocked_pub):
+        self.prepare_service_type_profiles_and_alternatives()
+        self.service.update_slr_profile_rankings_of_service_type('SomeService')
+        ranker = self.service.ranker_by_service_type['SomeService']
+        with patch.object(ranker, 'remove_alternative', wraps=ranker.remove_alternative) as mocked_remove_alt:
+            self.service.process_worker_profile_removed({'service_type': 'SomeService', 'stream_key': 'worker-a'})
+            mocked_remove_alt.assert_called_once_with(0)
+
+        decision_matrix = list(self.service.alternatives_by_service_type['SomeService'].values())
+        for slr_profile in self.service.slr_profiles_by_service['SomeService'].values():
+            self.service.initialize_ranker()
+            self.service.ranker.add_decision_maker(decision_matrix=decision_matrix, criteria_weights=slr_profile['criteria_weights'])
+            self.assertListEqual(slr_profile['alternatives_ids'], ['worker-b', 'worker-c'])
+            self.assertListEqual(slr_profile['ranking_index'], self.service.ranker.evaluate())
+        mocked_pub.assert_called_with('SomeService')
+
+    @patch('slr_worker_ranking.service.SLRWorkerRanking.publish_service_slr_profiles_ranked')
+    def test_removed_worker_leaving_single_alternative_drops_ranker(self, mocked_pub):
+        self.prepare_service_type_profiles_and_alternatives()
+        self.service.update_slr_profile_rankings_of_service_type('SomeService')
+        self.service.process_worker_profile_removed({'service_type': 'SomeService', 'stream_key': 'worker-a'})
+        self.service.process_worker_profile_removed({'service_type': 'SomeService', 'stream_key': 'worker-b'})
+        self.assertNotIn('SomeService', self.service.ranker_by_service_type)
+        for slr_profile in self.service.slr_profiles_by_service['SomeService'].values():
+            self.assertListEqual(slr_profile['alternatives_ids'], ['worker-c'])
+            self.assertListEqual(slr_profile['ranking_index'], [0])
+
+    def test_unknown_removed_worker_is_ignored(self):
+        self.prepare_service_type_profiles_and_alternatives()
+        self.service.process_worker_profile_removed({'service_type': 'SomeService', 'stream_key': 'worker-z'})
+        self.assertEqual(len(self.service.alternatives_by_service_type['SomeService']), 3)
+
+    @patch('slr_worker_ranking.service.SLRWorkerRanking.publish_service_slr_profiles_ranked')
+    def test_new_query_profile_ranks_only_the_new_profile(self, mocked_pub):
+        self.prepare_service_type_profiles_and_alternatives()
+        self.service.update_slr_profile_rankings_of_service_type('SomeService')
+        existing_rankings = {
+            slr_profile_id: slr_profile['ranking_index']
+            for slr_profile_id, slr_profile in self.service.slr_profiles_by_service['SomeService'].items()
+        }
+        ranker = self.service.ranker_by_service_type['SomeService']
+        with patch.object(ranker, 'evaluate_criteria_weights_batch', wraps=ranker.evaluate_criteria_weights_batch) as mocked_eval:
+            self.service.process_query_services_qos_criteria_ranked({
+                'query_id': 'query-3',
+                'required_services': ['SomeService'],
+                'qos_rank': {
+                    'energy_consumption': (0.3, 0.5, 0.7),
+                    'throughput': (0.3, 0.5, 0.7),
+                    'accuracy': (0.7, 0.9, 1.0),
+                }
+            })
+            mocked_eval.assert_called_once()
+            self.assertEqual(len(mocked_eval.call_args[0][0]), 1)
+
+        service_slr_profiles = self.service.slr_profiles_by_service['SomeService']
+        for slr_profile_id, ranking_index in existing_rankings.items():
+            self.assertIs(service_slr_profiles[slr_profile_id]['ranking_index'], ranking_index)
+        new_slr_profile = service_slr_profiles[list(service_slr_profiles.keys())[-1]]
+        self.assertListEqual(new_slr_profile['query_ids'], ['query-3'])
+        self.assertEqual(len(new_slr_profile['ranking_index']), 3)
+        mocked_pub.assert_called_with('SomeService')
+
+    @patch('slr_worker_ranking.service.SLRWorkerRanking.publish_service_slr_profiles_ranked')
+    def test_new_query_profile_for_service_type_without_workers(self, mocked_pub):
+        self.prepare_service_type_profiles_and_alternatives()
+        self.service.process_query_services_qos_criteria_ranked({
+            'query_id': 'query-3',
+            'required_services': ['UnknownService', 'SomeService'],
+            'qos_rank': {
+                'energy_consumption': (0.3, 0.5, 0.7),
+                'throughput': (0.3, 0.5, 0.7),
+                'accuracy': (0.7, 0.9, 1.0),
+            }
+        })
+        unknown_slr_profile = list(self.service.slr_profiles_by_service['UnknownService'].values())[0]
+        self.assertListEqual(unknown_slr_profile['alternatives_ids'], [])
+        self.assertListEqual(unknown_slr_profile['ranking_index'], [])
+        self.assertEqual(len(self.service.query_slr_profiles_map['query-3']), 2)
+        mocked_pub.assert_called_once_with('SomeService')
+
+    def rate_new_workers_of_some_service(self, stream_keys):
+        for stream_key in stream_keys:
+            self.service.process_worker_profile_rated({
+                'service_type': 'SomeService',
+                'stream_key': stream_key,
+                'throughput': (9, 10, 10),
+                'accuracy': (7, 9, 10),
+                'energy_consumption': (1, 3, 5),
+            })
+
+    @patch('slr_worker_ranking.service.time.monotonic')
+    @patch('slr_worker_ranking.service.SLRWorkerRanking.publish_service_slr_profiles_ranked')
+    def test_burst_of_new_workers_is_ranked_and_published_once_after_quiet_period(self, mocked_pub, mocked_time):
+        self.prepare_service_type_profiles_and_alternatives()
+        self.service.rerank_quiet_period = 0.5
+        self.service.rerank_max_delay = 5
+        mocked_time.return_value = 100
+        with patch.object(self.service, 'rank_slr_profiles', wraps=self.service.rank_slr_profiles) as mocked_rank:
+            self.rate_new_workers_of_some_service(['worker-d', 'worker-e', 'worker-f'])
+            self.assertFalse(mocked_rank.called)
+            self.assertIn('SomeService', self.service.dirty_service_types)
+
+            mocked_time.return_value = 100.4
+            self.service.flush_dirty_service_types()
+            self.assertFalse(mocked_pub.called)
+
+            mocked_time.return_value = 100.5
+            self.service.flush_dirty_service_types()
+            mocked_rank.assert_called_once()
+        mocked_pub.assert_called_once_with('SomeService')
+        self.assertEqual(self.service.dirty_service_types, {})
+        for slr_profile in self.service.slr_profiles_by_service['SomeService'].values():
+            self.assertEqual(len(slr_profile['ranking_index']), 6)
+
+    @patch('slr_worker_ranking.service.time.monotonic')
+    @patch('slr_worker_ranking.service.SLRWorkerRanking.publish_service_slr_profiles_ranked')
+    def test_service_type_that_keeps_changing_is_ranked_after_max_delay(self, mocked_pub, mocked_time):
+        self.prepare_service_type_profiles_and_alternatives()
+        self.service.rerank_quiet_period = 0.5
+        self.service.rerank_max_delay = 1
+        for i, now in enumerate([100, 100.3, 100.6, 100.9]):
+            mocked_time.return_value = now
+            self.rate_new_workers_of_some_service([f'worker-{i}'])
+            self.service.flush_dirty_service_types()
+        self.assertFalse(mocked_pub.called)
+
+        mocked_time.return_value = 101.2
+        self.rate_new_workers_of_some_service(['worker-4'])
+        self.service.flush_dirty_service_types()
+        mocked_pub.assert_called_once_with('SomeService')
+        self.assertNotIn('SomeService', self.service.dirty_service_types)
+
+    @patch('slr_worker_ranking.service.SLRWorkerRanking.publish_service_slr_profiles_ranked')
+    def test_new_query_profile_of_service_type_waiting_for_reranking_is_published_with_it(self, mocked_pub):
+        self.prepare_service_type_profiles_and_alternatives()
+        self.service.update_slr_profile_rankings_of_service_type('SomeService')
+        mocked_pub.reset_mock()
+        self.service.rerank_quiet_period = 10
+        self.rate_new_workers_of_some_service(['worker-d'])
+        self.service.process_query_services_qos_criteria_ranked({
+            'query_id': 'query-3',
+            'required_services': ['SomeService'],
+            'qos_rank': {
+                'energy_consumption': (0.3, 0.5, 0.7),
+                'throughput': (0.3, 0.5, 0.7),
+                'accuracy': (0.7, 0.9, 1.0),
+            }
+        })
+        self.assertFalse(mocked_pub.called)
+
+        self.service.flush_dirty_service_types(force=True)
+        mocked_pub.assert_called_once_with('SomeService')
+        for slr_profile in self.service.slr_profiles_by_service['SomeService'].values():
+            self.assertEqual(len(slr_profile['ranking_index']), 4)
+
+    @patch('slr_worker_ranking.service.SLRWorkerRanking.publish_event_type_to_stream')
+    def test_publish_full_slr_profiles_with_increasing_version_by_default(self, mocked_pub):
+        self.prepare_service_type_profiles_and_alternatives()
+        self.service.update_slr_profile_rankings_of_service_type('SomeService')
+        self.service.update_slr_profile_rankings_of_service_type('SomeService')
+
+        self.assertEqual(mocked_pub.call_count, 2)
+        for exp_version, call in enumerate(mocked_pub.call_args_list, start=1):
+            event_data = call[1]['new_event_data']
+            self.assertEqual(event_data['version'], exp_version)
+            self.assertFalse(event_data['is_delta'])
+            self.assertListEqual(list(event_data['slr_profiles'].keys()), ['profile-1', 'profile-2'])
+
+    @patch('slr_worker_ranking.service.SLRWorkerRanking.publish_event_type_to_stream')
+    def test_publish_delta_only_publishes_new_or_changed_slr_profiles(self, mocked_pub):
+        self.prepare_service_type_profiles_and_alternatives()
+        self.service.publish_delta_slr_profiles = True
+        self.service.update_slr_profile_rankings_of_service_type('SomeService')
+        event_data = mocked_pub.call_args[1]['new_event_data']
+        self.assertEqual(event_data['version'], 1)
+        self.assertTrue(event_data['is_delta'])
+        self.assertListEqual(list(event_data['slr_profiles'].keys()), ['profile-1', 'profile-2'])
+
+        mocked_pub.reset_mock()
+        self.service.update_slr_profile_rankings_of_service_type('SomeService')
+        self.assertFalse(mocked_pub.called)
+
+        self.service.process_query_services_qos_criteria_ranked({
+            'query_id': 'query-3',
+            'required_services': ['SomeService'],
+            'qos_rank': {
+                'energy_consumption': (0.3, 0.5, 0.7),
+                'throughput': (0.3, 0.5, 0.7),
+                'accuracy': (0.7, 0.9, 1.0),
+            }
+        })
+        event_data = mocked_pub.call_args[1]['new_event_data']
+        self.assertEqual(event_data['version'], 2)
+        self.assertEqual(len(event_data['slr_profiles']), 1)
+        self.assertListEqual(event_data['slr_profiles'][list(event_data['slr_profiles'].keys())[0]]['query_ids'], ['query-3'])
+
+    @patch('slr_worker_ranking.service.SLRWorkerRanking.publish_event_type_to_stream')
+    def test_snapshot_request_publishes_every_slr_profile(self, mocked_pub):
+        self.prepare_service_type_profiles_and_alternatives()
+        self.service.publish_delta_slr_profiles = True
+        self.service.update_slr_profile_rankings_of_service_type('SomeService')
+        mocked_pub.reset_mock()
+
+        self.service.process_event_type(
+            event_type='ServiceSLRProfilesSnapshotRequested',
+            event_data={'id': 'some-id', 'service_type': 'SomeService'},
+            json_msg={},
+        )
+        event_data = mocked_pub.call_args[1]['new_event_data']
+        self.assertEqual(event_data['version'], 2)
+        self.assertFalse(event_data['is_delta'])
+        self.assertListEqual(list(event_data['slr_profiles'].keys()), ['profile-1', 'profile-2'])
+
+    @patch('slr_worker_ranking.service.SLRWorkerRanking.publish_event_type_to_stream')
+    def test_order_suppression_skips_publish_when_only_scores_change(self, mocked_pub):
+        self.prepare_service_type_profiles_and_alternatives()
+        self.service.publish_suppression = 'order'
+        self.service.update_slr_profile_rankings_of_service_type('SomeService')
+        self.assertEqual(mocked_pub.call_count, 1)
+
+        slr_profile = self.service.slr_profiles_by_service['SomeService']['profile-1']
+        slr_profile['ranking_scores'] = [score + 0.01 for score in slr_profile['ranking_scores']]
+        self.service.publish_service_slr_profiles_ranked('SomeService')
+        self.assertEqual(mocked_pub.call_count, 1)
+        self.assertEqual(self.service.suppressed_publishes_by_service, {'SomeService': 1})
+
+        slr_profile['ranking_index'] = list(reversed(slr_profile['ranking_index']))
+        self.service.publish_service_slr_profiles_ranked('SomeService')
+        self.assertEqual(mocked_pub.call_count, 2)
+        event_data = mocked_pub.call_args[1]['new_event_data']
+        self.assertEqual(event_data['version'], 2)
+        self.assertListEqual(list(event_data['slr_profiles'].keys()), ['profile-1', 'profile-2'])
+
+    @patch('slr_worker_ranking.service.SLRWorkerRanking.publish_event_type_to_stream')
+    def test_scores_suppression_compares_scores_within_epsilon(self, mocked_pub):
+        self.prepare_service_type_profiles_and_alternatives()
+        self.service.publish_suppression = 'scores'
+        self.service.publish_score_epsilon = 0.001
+        self.service.update_slr_profile_rankings_of_service_type('SomeService')
+
+        slr_profile = self.service.slr_profiles_by_service['SomeService']['profile-2']
+        published_scores = slr_profile['ranking_scores']
+        slr_profile['ranking_scores'] = [score + 0.0005 for score in published_scores]
+        self.service.publish_service_slr_profiles_ranked('SomeService')
+        self.assertEqual(mocked_pub.call_count, 1)
+        self.assertEqual(self.service.suppressed_publishes_by_service, {'SomeService': 1})
+
+        slr_profile['ranking_scores'] = [score + 0.002 for score in published_scores]
+        self.service.publish_service_slr_profiles_ranked('SomeService')
+        self.assertEqual(mocked_pub.call_count, 2)
+
+    def test_slr_profile_id_ignores_criteria_weights_float_noise(self):
+        get_slr_profile_id = self.service.get_slr_profile_id_from_service_type_and_criteria_weights
+        slr_profile_id = get_slr_profile_id('SomeService', [(0.1, 0.3, 0.5), (0.7, 0.9, 1.0)])
+        self.assertEqual(get_slr_profile_id('SomeService', [(0.1, 0.1 + 0.2, 0.5), (0.7, 0.9, 1)]), slr_profile_id)
+        self.assertNotEqual(get_slr_profile_id('SomeService', [(0.1, 0.3, 0.5), (0.7, 0.9, 0.9)]), slr_profile_id)
+        self.assertNotEqual(get_slr_profile_id('OtherService', [(0.1, 0.3, 0.5), (0.7, 0.9, 1.0)]), slr_profile_id)
+        self.assertNotEqual(get_slr_profile_id('SomeService', [0.1, 0.3, 0.5, 0.7, 0.9, 1.0]), slr_profile_id)
+
+    @patch('slr_worker_ranking.service.SLRWorkerRanking.publish_service_slr_profiles_ranked')
+    def test_queries_with_near_identical_criteria_weights_share_slr_profile(self, mocked_pub):
+        self.prepare_service_type_profiles_and_alternatives()
+        self.service.slr_profiles_by_service = {}
+        self.service.slr_profile_weights_resolution = 0.01
+        for query_id, accuracy in [('query-1', (0.7, 0.9, 1.0)), ('query-2', (0.701, 0.899, 1.0)), ('query-3', (0.5, 0.7, 0.9))]:
+            self.service.process_query_services_qos_criteria_ranked({
+                'query_id': query_id,
+                'required_services': ['SomeService'],
+                'qos_rank': {
+                    'energy_consumption': (0.3, 0.5, 0.7),
+                    'throughput': (0.3, 0.5, 0.7),
+                    'accuracy': accuracy,
+                }
+            })
+        slr_profiles = list(self.service.slr_profiles_by_service['SomeService'].values())
+        self.assertEqual(len(slr_profiles), 2)
+        self.assertListEqual(slr_profiles[0]['query_ids'], ['query-1', 'query-2'])
+        self.assertEqual(self.service.query_slr_profiles_map['query-1'], self.service.query_slr_profiles_map['query-2'])
+
+    def prepare_query_slr_profiles_map(self):
+        self.service.query_slr_profiles_map = {
+            'query-1': {'profile-1'},
+            'query-2': {'profile-2'},
+        }
+
+    @patch('slr_worker_ranking.service.SLRWorkerRanking.publish_service_slr_profiles_ranked')
+    def test_removed_query_of_shared_slr_profile_keeps_profile(self, mocked_pub):
+        self.prepare_service_type_profiles_and_alternatives()
+        self.prepare_query_slr_profiles_map()
+        self.service.slr_profiles_by_service['SomeService']['profile-1']['query_ids'].append('query-3')
+        self.service.query_slr_profiles_map['query-3'] = {'profile-1'}
+
+        self.service.process_query_removed('query-3')
+        self.assertNotIn('query-3', self.service.query_slr_profiles_map)
+        self.assertListEqual(self.service.slr_profiles_by_service['SomeService']['profile-1']['query_ids'], ['query-1'])
+        self.assertFalse(mocked_pub.called)
+
+    @patch('slr_worker_ranking.service.SLRWorkerRanking.publish_service_slr_profiles_ranked')
+    def test_removed_query_drops_unused_slr_profile_from_ranking(self, mocked_pub):
+        self.prepare_service_type_profiles_and_alternatives()
+        self.prepare_query_slr_profiles_map()
+        self.service.update_slr_profile_rankings_of_service_type('SomeService')
+        mocked_pub.reset_mock()
+        ranker = self.service.ranker_by_service_type['SomeService']
+
+        self.service.process_query_removed('query-1')
+        self.assertListEqual(list(self.service.slr_profiles_by_service['SomeService'].keys()), ['profile-2'])
+        self.assertEqual(len(ranker.criteria_weights_batch), 1)
+        mocked_pub.assert_called_once_with('SomeService')
+
+        self.rate_new_workers_of_some_service(['worker-d'])
+        decision_matrix = list(self.service.alternatives_by_service_type['SomeService'].values())
+        slr_profile = self.service.slr_profiles_by_service['SomeService']['profile-2']
+        self.service.initialize_ranker()
+        self.service.ranker.add_decision_maker(decision_matrix=decision_matrix, criteria_weights=slr_profile['criteria_weights'])
+        self.assertListEqual(slr_profile['ranking_index'], self.service.ranker.evaluate())
+
+        self.service.process_query_removed('query-2')
+        self.assertNotIn('SomeService', self.service.slr_profiles_by_service)
+        self.assertNotIn('SomeService', self.service.ranker_by_service_type)
+        self.assertEqual(self.service.query_slr_profiles_map, {})
+
+    @patch('slr_worker_ranking.service.SLRWorkerRanking.publish_event_type_to_stream')
+    def test_publish_delta_includes_removed_slr_profiles(self, mocked_pub):
+        self.prepare_service_type_profiles_and_alternatives()
+        self.prepare_query_slr_profiles_map()
+        self.service.publish_delta_slr_profiles = True
+        self.service.update_slr_profile_rankings_of_service_type('SomeService')
+
+        self.service.process_query_removed('query-1')
+        event_data = mocked_pub.call_args[1]['new_event_data']
+        self.assertEqual(event_data['version'], 2)
+        self.assertEqual(event_data['slr_profiles'], {})
+        self.assertListEqual(event_data['removed_slr_profile_ids'], ['profile-1'])
+        self.assertEqual(self.service.removed_slr_profile_ids_by_service, {})
+
+    def test_unknown_removed_query_is_ignored(self):
+        self.prepare_service_type_profiles_and_alternatives()
+        self.service.process_query_removed('query-1')
+        self.assertEqual(len(self.service.slr_profiles_by_service['SomeService']), 2)
+
+    def send_query_with_accuracy_weight(self, query_id, accuracy, required_services=('SomeService',)):
+        self.service.process_query_services_qos_criteria_ranked({
+            'query_id': query_id,
+            'required_services': list(required_services),
+            'qos_rank': {
+                'energy_consumption': (0.3, 0.5, 0.7),
+                'throughput': (0.3, 0.5, 0.7),
+                'accuracy': accuracy,
+            }
+        })
+
+    @patch('slr_worker_ranking.service.SLRWorkerRanking.publish_event_type_to_stream')
+    def test_removed_only_query_of_service_type_waiting_for_reranking_is_published_by_flush(self, mocked_pub):
+        for publish_delta_slr_profiles in (False, True):
+            self.prepare_service_type_profiles_and_alternatives()
+            self.service.slr_profiles_by_service = {}
+            self.service.removed_slr_profile_ids_by_service = {}
+            self.service.publish_delta_slr_profiles = publish_delta_slr_profiles
+            self.service.rerank_quiet_period = 10
+            self.send_query_with_accuracy_weight('query-1', (0.1, 0.3, 0.5))
+            removed_slr_profile_id = next(iter(self.service.query_slr_profiles_map['query-1']))
+            self.rate_new_workers_of_some_service(['worker-d'])
+            mocked_pub.reset_mock()
+
+            self.service.process_query_removed('query-1')
+            self.assertFalse(mocked_pub.called)
+            self.service.flush_dirty_service_types(force=True)
+            mocked_pub.assert_called_once()
+            removed_event_data = mocked_pub.call_args[1]['new_event_data']
+            self.assertDictEqual(removed_event_data['slr_profiles'], {})
+            if publish_delta_slr_profiles:
+                self.assertListEqual(removed_event_data['removed_slr_profile_ids'], [removed_slr_profile_id])
+            self.assertNotIn('SomeService', self.service.removed_slr_profile_ids_by_service)
+
+    @patch('slr_worker_ranking.service.SLRWorkerRanking.publish_event_type_to_stream')
+    def test_worker_rated_after_removing_only_query_of_service_type(self, mocked_pub):
+        self.prepare_service_type_profiles_and_alternatives()
+        self.service.slr_profiles_by_service = {}
+        self.send_query_with_accuracy_weight('query-1', (0.1, 0.3, 0.5))
+        self.service.process_query_removed('query-1')
+        self.assertNotIn('SomeService', self.service.slr_profiles_by_service)
+        removed_event_data = mocked_pub.call_args[1]['new_event_data']
+        self.assertDictEqual(removed_event_data['slr_profiles'], {})
+
+        mocked_pub.reset_mock()
+        for _ in range(2):
+            self.service.process_worker_profile_rated({
+                'service_type': 'SomeService',
+                'stream_key': 'worker-d',
+                'throughput': (7, 9, 10),
+                'accuracy': (7, 9, 10),
+                'energy_consumption': (1, 1, 3),
+            })
+            self.service.process_worker_profile_rated({
+                'service_type': 'SomeService',
+                'stream_key': 'worker-d',
+                'throughput': (1, 3, 5),
+                'accuracy': (7, 9, 10),
+                'energy_consumption': (1, 1, 3),
+            })
+        self.assertNotIn('SomeService', self.service.ranker_by_service_type)
+        self.assertFalse(mocked_pub.called)
+        self.assertEqual(len(self.service.alternatives_by_service_type['SomeService']), 4)
+
+    @patch('slr_worker_ranking.service.SLRWorkerRanking.publish_service_slr_profiles_ranked')
+    def test_least_recently_used_slr_profiles_are_evicted_above_max(self, mocked_pub):
+        self.prepare_service_type_profiles_and_alternatives()
+        self.service.slr_profiles_by_service = {}
+        self.service.max_slr_profiles = 2
+        self.send_query_with_accuracy_weight('query-1', (0.1, 0.3, 0.5))
+        self.send_query_with_accuracy_weight('query-2', (0.3, 0.5, 0.7))
+        self.send_query_with_accuracy_weight('query-3', (0.1, 0.3, 0.5))
+        self.send_query_with_accuracy_weight('query-4', (0.7, 0.9, 1.0))
+
+        service_slr_profiles = self.service.slr_profiles_by_service['SomeService']
+        self.assertEqual(len(service_slr_profiles), 2)
+        self.assertListEqual(
+            sorted(query_id for slr_profile in service_slr_profiles.values() for query_id in slr_profile['query_ids']),
+            ['query-1', 'query-3', 'query-4'])
+        self.assertNotIn('query-2', self.service.query_slr_profiles_map)
+        self.assertEqual(self.service.evicted_slr_profiles_by_service, {'SomeService': 1})
+        self.assertEqual(len(self.service.ranker_by_service_type['SomeService'].criteria_weights_batch), 2)
+
+        self.send_query_with_accuracy_weight('query-2', (0.3, 0.5, 0.7))
+        self.assertIn('query-2', self.service.query_slr_profiles_map)
+        self.assertEqual(self.service.evicted_slr_profiles_by_service, {'SomeService': 2})
+        for slr_profile in service_slr_profiles.values():
+            self.assertEqual(len(slr_profile['ranking_index']), 3)
+
+    @patch('slr_worker_ranking.service.SLRWorkerRanking.publish_service_slr_profiles_ranked')
+    def test_resent_query_recreates_its_evicted_slr_profiles(self, mocked_pub):
+        self.prepare_service_type_profiles_and_alternatives()
+        self.service.slr_profiles_by_service = {}
+        self.service.max_slr_profiles = 2
+        self.send_query_with_accuracy_weight('query-1', (0.1, 0.3, 0.5))
+        self.send_query_with_accuracy_weight('query-1', (0.1, 0.3, 0.5))
+        self.assertEqual(len(self.service.slr_profiles_by_service['SomeService']), 1)
+        self.service.query_slr_profiles_map['query-1'].add('other-service-profile')
+        self.send_query_with_accuracy_weight('query-2', (0.3, 0.5, 0.7))
+        self.send_query_with_accuracy_weight('query-3', (0.7, 0.9, 1.0))
+        self.assertSetEqual(self.service.query_slr_profiles_map['query-1'], {'other-service-profile'})
+
+        self.send_query_with_accuracy_weight('query-1', (0.1, 0.3, 0.5))
+        query_slr_profile_ids = self.service.query_slr_profiles_map['query-1']
+        self.assertEqual(len(query_slr_profile_ids), 2)
+        service_slr_profiles = self.service.slr_profiles_by_service['SomeService']
+        recreated_slr_profile_id = (query_slr_profile_ids - {'other-service-profile'}).pop()
+        self.assertListEqual(service_slr_profiles[recreated_slr_profile_id]['query_ids'], ['query-1'])
+        self.assertEqual(len(service_slr_profiles[recreated_slr_profile_id]['ranking_index']), 3)
+        self.assertNotIn('query-1', self.service.evicted_query_slr_profiles_map)
+
+    @patch('slr_worker_ranking.service.SLRWorkerRanking.publish_service_slr_profiles_ranked')
+    def test_resent_query_with_changed_weights_is_ignored_as_duplicate(self, mocked_pub):
+        self.prepare_service_type_profiles_and_alternatives()
+        self.service.slr_profiles_by_service = {}
+        self.service.max_slr_profiles = 2
+        self.send_query_with_accuracy_weight('query-1', (0.1, 0.3, 0.5))
+        self.send_query_with_accuracy_weight('query-1', (0.7, 0.9, 1.0), required_services=('SomeService', 'OtherService'))
+        self.assertEqual(len(self.service.query_slr_profiles_map['query-1']), 1)
+        self.assertNotIn('OtherService', self.service.slr_profiles_by_service)
+
+        self.send_query_with_accuracy_weight('query-2', (0.3, 0.5, 0.7))
+        self.send_query_with_accuracy_weight('query-3', (0.5, 0.7, 0.9))
+        self.assertNotIn('query-1', self.service.query_slr_profiles_map)
+        self.send_query_with_accuracy_weight('query-1', (0.7, 0.9, 1.0))
+        self.assertNotIn('query-1', self.service.query_slr_profiles_map)
+        self.assertEqual(len(self.service.evicted_query_slr_profiles_map['query-1']), 1)
+
+        with patch.object(self.service.logger, 'warning') as mocked_warning:
+            self.service.process_query_removed('query-1')
+            self.assertFalse(mocked_warning.called)
+        self.assertNotIn('query-1', self.service.evicted_query_slr_profiles_map)
+
+    def test_log_latency_summary_logs_evictions_since_last_summary(self):
+        self.service.evicted_slr_profiles_by_service = {'SomeService': 3}
+        with patch.object(self.service.logger, 'info') as mocked_info:
+            self.service.log_latency_summary()
+            self.assertIn('3 SLR profiles', mocked_info.call_args[0][0])
+            mocked_info.reset_mock()
+
+            self.service.log_latency_summary()
+            self.assertFalse(mocked_info.called)
+
+            self.service.evicted_alternatives_by_service = {'SomeService': 2}
+            self.service.log_latency_summary()
+            self.assertIn('0 SLR profiles', mocked_info.call_args[0][0])
+            self.assertIn('2 workers', mocked_info.call_args[0][0])
+
+    @patch('slr_worker_ranking.service.SLRWorkerRanking.publish_service_slr_profiles_ranked')
+    def test_least_recently_rated_alternatives_are_evicted_above_max(self, mocked_pub):
+        self.service.max_alternatives_per_service_type = 2
+        self.rate_new_workers_of_some_service(['worker-a', 'worker-b'])
+        self.send_query_with_accuracy_weight('query-1', (0.1, 0.3, 0.5))
+        self.rate_new_workers_of_some_service(['worker-a'])
+        mocked_pub.reset_mock()
+        with patch.object(self.service, 'rank_slr_profiles', wraps=self.service.rank_slr_profiles) as mocked_rank:
+            self.rate_new_workers_of_some_service(['worker-c'])
+            mocked_rank.assert_called_once()
+        mocked_pub.assert_called_once_with('SomeService')
+
+        self.assertListEqual(list(self.service.alternatives_by_service_type['SomeService'].keys()), ['worker-a', 'worker-c'])
+        self.assertEqual(self.service.evicted_alternatives_by_service, {'SomeService': 1})
+        for slr_profile in self.service.slr_profiles_by_service['SomeService'].values():
+            self.assertListEqual(slr_profile['alternatives_ids'], ['worker-a', 'worker-c'])
+
+    @patch('slr_worker_ranking.service.SLRWorkerRanking.publish_service_slr_profiles_ranked')
+    def test_restored_snapshot_state_ranks_same_as_before(self, mocked_pub):
+        self.prepare_service_type_profiles_and_alternatives()
+        self.prepare_query_slr_profiles_map()
+        self.service.update_slr_profile_rankings_of_service_type('SomeService')
+        self.service.stream_offsets = {'WorkerProfileRated': '1526919030474-55'}
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            self.service.snapshot_path = os.path.join(tmp_dir, 'state.snapshot')
+            self.service.save_snapshot()
+            slr_profiles = copy.deepcopy(self.service.slr_profiles_by_service)
+
+            self.service.alternatives_by_service_type = {}
+            self.service.slr_profiles_by_service = {}
+            self.service.query_slr_profiles_map = {}
+            self.service.ranker_by_service_type = {}
+            self.assertTrue(self.service.restore_snapshot())
+
+            self.assertEqual(self.service.stream_offsets, {'WorkerProfileRated': '1526919030474-55'})
+            self.assertEqual(self.service.query_slr_profiles_map, {'query-1': {'profile-1'}, 'query-2': {'profile-2'}})
+            self.assertListEqual(list(self.service.alternatives_by_service_type['SomeService'].keys()), ['worker-a', 'worker-b', 'worker-c'])
+            for slr_profile_id, slr_profile in self.service.slr_profiles_by_service['SomeService'].items():
+                self.assertListEqual(slr_profile['ranking_index'], slr_profiles['SomeService'][slr_profile_id]['ranking_index'])
+
+            self.service.process_worker_profile_rated({
+                'service_type': 'SomeService',
+                'stream_key': 'worker-a',
+                'throughput': (1, 1, 3),
+                'accuracy': (7, 9, 10),
+                'energy_consumption': (7, 9, 10),
+            })
+            self.assertNotIn('SomeService', self.service.ranker_by_service_type)
+
+            self.rate_new_workers_of_some_service(['worker-d'])
+            decision_matrix = list(self.service.alternatives_by_service_type['SomeService'].values())
+            for slr_profile in self.service.slr_profiles_by_service['SomeService'].values():
+                self.service.initialize_ranker()
+                self.service.ranker.add_decision_maker(decision_matrix=decision_matrix, criteria_weights=slr_profile['criteria_weights'])
+                self.assertListEqual(slr_profile['ranking_index'], self.service.ranker.evaluate())
+
+    def test_ranker_stage_timings_by_ranker_shape_and_stage(self):
+        self.assertDictEqual(self.service.get_ranker_stage_timings(), {})
+
+        self.service.ranker_stage_timers = LatencyHistograms()
+        self.prepare_service_type_profiles_and_alternatives()
+        self.service.update_slr_profile_rankings_of_service_type('SomeService')
+        timings = self.service.get_ranker_stage_timings()
+        self.assertListEqual(list(timings.keys()), ['FuzzyTOPSIS'])
+        self.assertIn('dm=1,alt=4,crit=3,batch=2', timings['FuzzyTOPSIS'])
+        self.assertEqual(timings['FuzzyTOPSIS']['dm=1,alt=4,crit=3,batch=2']['_distance_from_FPIS_FNIS']['count'], 1)
+
+    def test_restore_snapshot_without_snapshot_file(self):
+        self.service.snapshot_path = os.path.join(tempfile.gettempdir(), 'missing-slr-worker-ranking.snapshot')
+        self.assertFalse(self.service.restore_snapshot())
+
+    @patch('slr_worker_ranking.service.SLRWorkerRanking.process_event_type')
+    def test_process_cmd_keeps_last_event_id_of_stream(self, mocked_process_event_type):
+        event_data = {'id': 1, 'some': 'stuff'}
+        msg_tuple = prepare_event_msg_tuple(event_data)
+        mocked_process_event_type.__name__ = 'process_event_type'
+        self.service.service_cmd.mocked_values_dict = {
+            b'SomeEventType': [msg_tuple]
+        }
+        self.service.process_cmd()
+        self.assertEqual(self.service.stream_offsets, {'SomeEventType': msg_tuple[0]})
+
+    @patch('slr_worker_ranking.service.SLRWorkerRanking.log_state')
+    @patch('slr_worker_ranking.service.SLRWorkerRanking.process_event_type')
+    def test_process_cmd_aggregates_event_latency_without_logging_state(self, mocked_process_event_type, mocked_log_state):
+        mocked_process_event_type.__name__ = 'process_event_type'
+        self.service.service_cmd.mocked_values_dict = {
+            b'SomeEventType': [prepare_event_msg_tuple({'id': 1}), prepare_event_msg_tuple({'id': 2})]
+        }
+        self.service.process_cmd()
+        self.service.process_cmd()
+        self.assertEqual(self.service.event_latency_histograms.summary()['SomeEventType']['count'], 2)
+        self.assertFalse(mocked_log_state.called)
+
+    def test_log_latency_summary_if_due_logs_percentiles_and_starts_new_summary(self):
+        self.service.event_latency_histograms.observe('SomeEventType', 0.002)
+        self.service.latency_summary_interval = 60
+        with patch.object(self.service.logger, 'info') as mocked_info:
+            self.service.log_latency_summary_if_due()
+            self.assertFalse(mocked_info.called)
+
+            self.service.last_latency_summary_at -= 60
+            self.service.log_latency_summary_if_due()
+        log_msg = mocked_info.call_args[0][0]
+        self.assertIn('"SomeEventType"', log_msg)
+        self.assertIn('1 events, p50=2.000ms p95=2.000ms p99=2.000ms', log_msg)
+        self.assertDictEqual(self.service.event_latency_histograms.summary(), {})
+
+    @patch('slr_worker_ranking.service.SLRWorkerRanking.publish_event_type_to_stream')
+    def test_ranking_spans_are_children_of_update_span_with_problem_tags(self, mocked_pub):
+        self.prepare_service_type_profiles_and_alternatives()
+        self.service.tracer = MockTracer()
+        self.service.update_slr_profile_rankings_of_service_type('SomeService')
+
+        spans_by_name = {span.operation_name: span for span in self.service.tracer.finished_spans()}
+        update_span = spans_by_name['update_slr_profile_rankings_of_service_type']
+        rank_span = spans_by_name['rank_slr_profiles']
+        publish_span = spans_by_name['publish_service_slr_profiles_ranked']
+        self.assertIsNone(update_span.parent_id)
+        self.assertEqual(rank_span.parent_id, update_span.context.span_id)
+        self.assertEqual(publish_span.parent_id, update_span.context.span_id)
+        for span in [update_span, rank_span, publish_span]:
+            self.assertEqual(span.tags['service-type'], 'SomeService')
+            self.assertEqual(span.tags['alternatives-count'], 3)
+            self.assertEqual(span.tags['slr-profiles-count'], 2)
+            self.assertEqual(span.tags['ranker-type'], RANKER_TYPE)
+        self.assertFalse(rank_span.tags['only-new-profiles'])
+        self.assertEqual(publish_span.tags['slr-profiles-version'], 1)
+
+    @patch('slr_worker_ranking.service.SLRWorkerRanking.process_event_type_wrapper')
+    def test_profiling_request_profiles_next_events_and_writes_results(self, mocked_process_event_type_wrapper):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            self.service.profiling_dir = tmp_dir
+            self.service.process_event_type(
+                event_type='ServiceProfilingRequested',
+                event_data={'id': 'some-id', 'events': 2, 'trace_memory': False},
+                json_msg={},
+            )
+            self.assertEqual(self.service.profiler.num_calls, 2)
+            self.service.service_cmd.mocked_values_dict = {
+                b'SomeEventType': [prepare_event_msg_tuple({'id': 1}), prepare_event_msg_tuple({'id': 2})]
+            }
+            self.service.process_cmd()
+            self.assertEqual(self.service.profiler.calls, 1)
+            self.assertEqual(os.listdir(tmp_dir), [])
+
+            self.service.process_cmd()
+            self.assertIsNone(self.service.profiler)
+            self.assertListEqual(sorted(os.path.splitext(path)[1] for path in os.listdir(tmp_dir)), ['.prof', '.txt'])
+        self.assertEqual(mocked_process_event_type_wrapper.call_count, 2)
+
+    def test_profiling_request_ignored_while_profiling(self):
+        self.assertTrue(self.service.start_profiling(10, trace_memory=False))
+        profiler = self.service.profiler
+        self.assertFalse(self.service.start_profiling(5, trace_memory=False))
+        self.assertIs(self.service.profiler, profiler)
+        self.service.profiler = None
+
+    @patch('slr_worker_ranking.service.SLRWorkerRanking.publish_service_slr_profiles_ranked')
+    def test_failed_debounced_rerank_is_logged_and_does_not_stop_process_cmd(self, mocked_pub):
+        self.prepare_service_type_profiles_and_alternatives()
+        self.service.rerank_quiet_period = 1
+        self.service.rerank_max_delay = 0
+        self.service.update_slr_profile_rankings_of_service_type('SomeService')
+        ranker = self.service.ranker_by_service_type['SomeService']
+        self.rate_new_workers_of_some_service(['worker-d'])
+        self.assertIn('SomeService', self.service.dirty_service_types)
+
+        with patch.object(ranker, 'get_alternatives_ranking_scores', side_effect=ValueError('some ranker error')), \
+                patch.object(self.service.logger, 'exception') as mocked_exception:
+            self.service.process_cmd()
+        self.assertTrue(mocked_exception.called)
+        self.assertNotIn('SomeService', self.service.dirty_service_types)
+        self.assertNotIn('SomeService', self.service.ranker_by_service_type)
+
+        self.rate_new_workers_of_some_service(['worker-e'])
+        self.service.flush_dirty_service_types()
+        self.assertEqual(len(self.service.slr_profiles_by_service['SomeService']['profile-1']['ranking_index']), 5)
+
+    def test_failed_snapshot_is_logged_and_retried_after_interval(self):
+        self.service.snapshot_path = os.path.join(tempfile.gettempdir(), 'missing-dir', 'missing-subdir', 'state.snapshot')
+        self.service.snapshot_interval = 60
+        self.service.last_snapshot_at -= 60
+        with patch.object(self.service.logger, 'exception') as mocked_exception:
+            self.service.process_cmd()
+        self.assertTrue(mocked_exception.called)
+        with patch.object(self.service, 'save_snapshot') as mocked_save:
+            self.service.save_snapshot_if_due()
+        self.assertFalse(mocked_save.called)
+
+    def test_snapshot_keeps_unpublished_removed_slr_profile_ids_and_counters(self):
+        self.service.removed_slr_profile_ids_by_service = {'SomeService': ['profile-1']}
+        self.service.suppressed_publishes_by_service = {'SomeService': 2}
+        self.service.evicted_slr_profiles_by_service = {'SomeService': 3}
+        self.service.evicted_alternatives_by_service = {'SomeService': 4}
+        self.service.evicted_query_slr_profiles_map = {'query-1': {'profile-2'}}
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            self.service.snapshot_path = os.path.join(tmp_dir, 'state.snapshot')
+            self.service.save_snapshot()
+            self.service.removed_slr_profile_ids_by_service = {}
+            self.service.suppressed_publishes_by_service = {}
+            self.service.evicted_slr_profiles_by_service = {}
+            self.service.evicted_alternatives_by_service = {}
+            self.service.evicted_query_slr_profiles_map = {}
+            self.assertTrue(self.service.restore_snapshot())
+        self.assertEqual(self.service.removed_slr_profile_ids_by_service, {'SomeService': ['profile-1']})
+        self.assertEqual(self.service.suppressed_publishes_by_service, {'SomeService': 2})
+        self.assertEqual(self.service.evicted_slr_profiles_by_service, {'SomeService': 3})
+        self.assertEqual(self.service.evicted_alternatives_by_service, {'SomeService': 4})
+        self.assertEqual(self.service.evicted_query_slr_profiles_map, {'query-1': {'profile-2'}})
+
+    @patch('slr_worker_ranking.service.SLRWorkerRanking.process_event_type_wrapper')
+    def test_failed_profiling_results_are_logged_and_do_not_stop_process_cmd(self, mocked_process_event_type_wrapper):
+        with tempfile.NamedTemporaryFile() as not_a_dir:
+            self.service.profiling_dir = os.path.join(not_a_dir.name, 'profiles')
+            self.service.start_profiling(1, trace_memory=False)
+            self.service.service_cmd.mocked_values_dict = {b'SomeEventType': [prepare_event_msg_tuple({'id': 1})]}
+            with patch.object(self.service.logger, 'exception') as mocked_exception:
+                self.service.process_cmd()
+        self.assertTrue(mocked_exception.called)
+        self.assertIsNone(self.service.profiler)
+        self.assertTrue(mocked_process_event_type_wrapper.called)
@@ -0,0 +1,46 @@
+import os
+import tempfile
+from unittest import TestCase
+
+import numpy as np
+
+from slr_worker_ranking.snapshot import read_snapshot, write_snapshot
+
+
+class TestSnapshot(TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, 'state.snapshot')
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_write_and_read_state_and_arrays(self):
+        state = {'stream_offsets': {'WorkerProfileRated': '1-0'}, 'ids': ['a', 'b']}
+        arrays = {
+            'SomeService': np.arange(18, dtype=float).reshape(2, 3, 3),
+            'OtherService': np.array([[0.5, 0.25]]),
+        }
+        write_snapshot(self.path, state, arrays)
+        read_state, read_arrays = read_snapshot(self.path)
+
+        self.assertEqual(read_state, state)
+        self.assertListEqual(list(read_arrays.keys()), ['SomeService', 'OtherService'])
+        for name, array in arrays.items():
+            np.testing.assert_array_equal(read_arrays[name], array)
+        self.assertIsInstance(read_arrays['SomeService'], np.memmap)
+        self.assertFalse(os.path.exists(f'{self.path}.tmp'))
+
+    def test_memory_mapped_arrays_are_copy_on_write(self):
+        write_snapshot(self.path, {}, {'SomeService': np.ones((2, 3))})
+        _, arrays = read_snapshot(self.path)
+        arrays['SomeService'][0, 0] = 5
+        _, arrays = read_snapshot(self.path, mmap=False)
+        np.testing.assert_array_equal(arrays['SomeService'], np.ones((2, 3)))
+
+    def test_invalid_snapshot_file(self):
+        with open(self.path, 'wb') as snapshot_file:
+            snapshot_file.write(b'something else')
+        with self.assertRaises(ValueError):
+            read_snapshot(self.path)
@@ -0,0 +1,50 @@
+from unittest import TestCase
+
+import numpy as np
+
+from slr_worker_ranking.mcdm.tfn import TFN, tfn_array
+
+
+class TestTFN(TestCase):
+
+    def test_behaves_as_fuzzy_number_tuple(self):
+        tfn = TFN(1, 3, 5)
+        left, middle, right = tfn
+        self.assertEqual((left, middle, right), (1, 3, 5))
+        self.assertEqual(tfn[2], 5)
+        self.assertEqual(len(tfn), 3)
+        self.assertEqual(tfn, (1, 3, 5))
+        self.assertEqual(tfn, [1, 3, 5])
+        self.assertNotEqual(tfn, (1, 3, 7))
+
+    def test_has_no_instance_dict(self):
+        tfn = TFN(1, 3, 5)
+        self.assertFalse(hasattr(tfn, '__dict__'))
+        with self.assertRaises(AttributeError):
+            tfn.other = 1
+
+    def test_from_array(self):
+        tfn = TFN.from_array(np.array([0.1, 0.3, 0.5]))
+        self.assertEqual(tfn, (0.1, 0.3, 0.5))
+        self.assertIsInstance(tfn.left, float)
+
+
+class TestTFNArray(TestCase):
+
+    def test_from_nested_fuzzy_numbers(self):
+        matrix = tfn_array([[(1, 3, 5), TFN(3, 5, 7)], [(7, 9, 10), (9, 10, 10)]])
+        self.assertEqual(matrix.shape, (2, 2, 3))
+        self.assertEqual(matrix.dtype, float)
+        np.testing.assert_array_equal(matrix[0, 1], [3, 5, 7])
+
+    def test_does_not_copy_float_arrays(self):
+        matrix = np.ones((2, 2, 3))
+        self.assertIs(tfn_array(matrix), matrix)
+
+    def test_reshape(self):
+        matrix = tfn_array([(1, 3, 5), (3, 5, 7)], shape=(1, 2))
+        self.assertEqual(matrix.shape, (1, 2, 3))
+
+    def test_invalid_fuzzy_numbers(self):
+        with self.assertRaises(AssertionError):
+            tfn_array([(1, 3), (3, 5)])
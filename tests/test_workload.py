@@ -0,0 +1,71 @@
+from unittest import TestCase
+from unittest.mock import patch
+
+from slr_worker_ranking.replay import create_replay_service, replay_events
+from slr_worker_ranking.workload import RATING_LINGUISTIC_TERMS, generate_workload, send_events_to_redis
+
+from slr_worker_ranking.conf import (
+    LISTEN_EVENT_TYPE_WORKER_PROFILE_RATED,
+    LISTEN_EVENT_TYPE_QUERY_SERVICES_QOS_CRITERIA_RANKED,
+)
+
+
+class TestWorkload(TestCase):
+
+    def test_generate_workload_counts(self):
+        events = generate_workload(
+            num_service_types=3, workers_per_service_type=4, num_weight_profiles=2, num_queries=10, num_rerates=5, seed=1)
+        event_types = [event['event_type'] for event in events]
+        self.assertEqual(event_types.count(LISTEN_EVENT_TYPE_WORKER_PROFILE_RATED), 3 * 4 + 5)
+        self.assertEqual(event_types.count(LISTEN_EVENT_TYPE_QUERY_SERVICES_QOS_CRITERIA_RANKED), 10)
+
+        query_events = [event['event_data'] for event in events if event['event_type'] == LISTEN_EVENT_TYPE_QUERY_SERVICES_QOS_CRITERIA_RANKED]
+        self.assertLessEqual(len({tuple(query['qos_rank'].values()) for query in query_events}), 2)
+        for event in events:
+            if event['event_type'] == LISTEN_EVENT_TYPE_WORKER_PROFILE_RATED:
+                self.assertIn(event['event_data']['worker']['throughput'], RATING_LINGUISTIC_TERMS.values())
+
+    def test_generate_workload_is_deterministic_with_seed(self):
+        self.assertEqual(generate_workload(seed=7), generate_workload(seed=7))
+
+    def test_burst_arrivals(self):
+        events = generate_workload(workers_per_service_type=5, num_queries=5, arrival_pattern='burst', burst_size=5, rate=10, seed=1)
+        times = [event['time'] for event in events]
+        self.assertListEqual(times[:6], [0, 0, 0, 0, 0, 0.5])
+        self.assertTrue(all(event['event_type'] == LISTEN_EVENT_TYPE_WORKER_PROFILE_RATED for event in events[:10]))
+
+    def test_generated_criteria_workload_can_be_replayed(self):
+        events = generate_workload(num_criteria=5, num_queries=5, seed=3)
+        ranker_criteria = {f'criterion_{i}': i % 2 == 0 for i in range(5)}
+        service = create_replay_service(ranker_criteria=ranker_criteria)
+        stats = replay_events(service, ((event['event_type'], event['event_data']) for event in events))
+        self.assertEqual(stats['events'], len(events))
+        for service_slr_profiles in service.slr_profiles_by_service.values():
+            for slr_profile in service_slr_profiles.values():
+                self.assertEqual(len(slr_profile['ranking_index']), 10)
+
+    def send_events_with_fake_clock(self, events, paced=True):
+        "returns the (fake) time at which each event was written to its stream"
+        clock = [100.0]
+        send_times = []
+        with patch('slr_worker_ranking.workload.time') as mocked_time, \
+                patch('event_service_utils.streams.redis.RedisStreamFactory') as mocked_factory:
+            mocked_time.monotonic.side_effect = lambda: clock[0]
+            mocked_time.sleep.side_effect = lambda seconds: clock.__setitem__(0, clock[0] + seconds)
+            mocked_factory.return_value.create.return_value.write_events.side_effect = (
+                lambda *args: send_times.append(round(clock[0] - 100.0, 6)))
+            send_events_to_redis(events, 'localhost', 6379, paced=paced)
+        return send_times
+
+    def test_send_events_to_redis_is_paced_by_arrival_pattern(self):
+        workload_kwargs = dict(workers_per_service_type=5, num_queries=5, burst_size=5, rate=10, seed=1)
+        steady_events = generate_workload(arrival_pattern='steady', **workload_kwargs)
+        burst_events = generate_workload(arrival_pattern='burst', **workload_kwargs)
+
+        steady_send_times = self.send_events_with_fake_clock(steady_events)
+        burst_send_times = self.send_events_with_fake_clock(burst_events)
+        self.assertListEqual(steady_send_times[:6], [0, 0.1, 0.2, 0.3, 0.4, 0.5])
+        self.assertListEqual(burst_send_times[:6], [0, 0, 0, 0, 0, 0.5])
+        self.assertListEqual(burst_send_times, [event['time'] for event in burst_events])
+
+        self.assertListEqual(self.send_events_with_fake_clock(steady_events, paced=False), [0] * len(steady_events))